@@ -0,0 +1,263 @@
+import os
+import json
+import math
+import time
+import zlib
+import threading
+
+from starlette.concurrency import run_in_threadpool
+
+
+# ==============================
+# LIMITS (ENV)
+# ==============================
+# Sustained events/second accepted across all bulk requests, and how
+# many can arrive at once before producers get 429 + Retry-After
+INGEST_RATE = float(os.getenv("EVENT_INGEST_RATE", "5000"))
+INGEST_BURST = float(os.getenv("EVENT_INGEST_BURST", "50000"))
+
+MAX_LINE_BYTES = 64 * 1024
+MAX_BODY_BYTES = 64 * 1024 * 1024       # after decompression
+
+# gzip is inflated in slices of at most this many bytes
+INFLATE_SLICE = 1024 * 1024
+
+# Events are validated (in the threadpool) and stored in batches of this size
+INGEST_BATCH = 500
+
+# Events kept in memory (oldest dropped first), and how many lines may
+# be waiting to be parsed across all requests before producers get 503
+EVENT_STORE_SIZE = int(os.getenv("EVENT_STORE_SIZE", "100000"))
+INGEST_QUEUE_DEPTH = int(os.getenv("EVENT_INGEST_QUEUE_DEPTH", str(10 * INGEST_BATCH)))
+
+MAX_REPORTED_ERRORS = 20
+
+
+class IngestError(Exception):
+    """
+    The body itself is unusable (bad gzip, oversized line or body).
+    """
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens/second, at most `burst` banked.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, n: int) -> int:
+        """
+        Take up to n tokens; returns how many were granted.
+        """
+        with self._lock:
+            self._refill()
+            granted = min(n, int(self._tokens))
+            self._tokens -= granted
+            return granted
+
+    def retry_after(self, n: int = 1) -> int:
+        """
+        Whole seconds until n tokens are available.
+        """
+        with self._lock:
+            self._refill()
+            missing = min(n, self.burst) - self._tokens
+            return max(1, math.ceil(missing / self.rate)) if missing > 0 else 0
+
+
+class IngestQueue:
+    """
+    Lines handed to the threadpool for parsing but not stored yet,
+    across all requests. reserve() fails once that depth would pass
+    `limit` (a lone batch is always let through).
+    """
+
+    def __init__(self, limit: int = INGEST_QUEUE_DEPTH):
+        self.limit = limit
+        self.depth = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, n: int) -> bool:
+        with self._lock:
+            if self.depth and self.depth + n > self.limit:
+                return False
+            self.depth += n
+            return True
+
+    def release(self, n: int):
+        with self._lock:
+            self.depth -= n
+
+    def full(self) -> bool:
+        return self.depth >= self.limit
+
+
+# ==============================
+# STREAMING NDJSON
+# ==============================
+def _inflate(inflater, data, room):
+    """
+    Decompressed slices of `data`, never more than `room` + 1 bytes in
+    total, so a small gzip chunk can't expand into one huge buffer.
+    """
+    while data:
+        try:
+            out = inflater.decompress(data, min(INFLATE_SLICE, room + 1))
+        except zlib.error as e:
+            raise IngestError(400, f"Invalid gzip body: {e}")
+
+        room -= len(out)
+        if room < 0:
+            raise IngestError(413, f"Body exceeds {MAX_BODY_BYTES} bytes")
+
+        data = inflater.unconsumed_tail
+        if out:
+            yield out
+
+
+async def iter_lines(chunks, gzipped: bool):
+    """
+    (line number, raw line) pairs from an async byte stream, inflating
+    gzip on the fly. Only one partial line is ever buffered.
+    """
+    inflater = zlib.decompressobj(wbits=31) if gzipped else None
+    buffer = b""
+    total = 0
+    lineno = 0
+
+    async for raw in chunks:
+        if inflater is not None:
+            pieces = _inflate(inflater, raw, MAX_BODY_BYTES - total)
+        else:
+            pieces = (raw,)
+
+        for chunk in pieces:
+            total += len(chunk)
+            if total > MAX_BODY_BYTES:
+                raise IngestError(413, f"Body exceeds {MAX_BODY_BYTES} bytes")
+
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+
+            if len(buffer) > MAX_LINE_BYTES:
+                raise IngestError(413, f"Line {lineno + len(lines) + 1} exceeds {MAX_LINE_BYTES} bytes")
+
+            for line in lines:
+                lineno += 1
+                yield lineno, line
+
+    if inflater is not None and not inflater.eof and total:
+        raise IngestError(400, "Truncated gzip body")
+
+    if buffer.strip():
+        yield lineno + 1, buffer
+
+
+def parse_event(line: bytes):
+    """
+    One NDJSON line → event dict. Raises ValueError when invalid.
+    """
+    try:
+        event = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e.msg}")
+
+    if not isinstance(event, dict):
+        raise ValueError("Event must be a JSON object")
+
+    device_id = event.get("device_id")
+    if not isinstance(device_id, str) or not device_id:
+        raise ValueError("Event needs a non-empty string device_id")
+
+    return event
+
+
+def parse_batch(lines):
+    """
+    [(lineno, raw line)] → ([(lineno, event)], [{"line", "error"}]).
+    CPU-bound: runs in the threadpool, off the event loop.
+    """
+    events = []
+    failed = []
+    for lineno, line in lines:
+        try:
+            events.append((lineno, parse_event(line)))
+        except ValueError as e:
+            failed.append({"line": lineno, "error": str(e)})
+    return events, failed
+
+
+async def ingest(chunks, gzipped, store, bucket, queue):
+    """
+    Validate and append events from an NDJSON stream in batches.
+    Stops early when the bucket runs dry ("saturated") or too many
+    lines are already waiting to be parsed ("busy"); `resume_line`
+    then tells the producer where to pick up after Retry-After.
+    """
+    accepted = 0
+    rejected = 0
+    errors = []
+    status = None
+    resume_line = None
+
+    async def process(batch):
+        nonlocal accepted, rejected, status, resume_line
+
+        if not queue.reserve(len(batch)):
+            status, resume_line = "busy", batch[0][0]
+            return
+        try:
+            events, failed = await run_in_threadpool(parse_batch, batch)
+        finally:
+            queue.release(len(batch))
+
+        granted = bucket.take(len(events))
+        store.extend(event for _, event in events[:granted])
+        accepted += granted
+
+        if granted < len(events):
+            status, resume_line = "saturated", events[granted][0]
+            # Lines from resume_line on are resent (and re-reported)
+            failed = [f for f in failed if f["line"] < resume_line]
+
+        rejected += len(failed)
+        errors.extend(failed[:MAX_REPORTED_ERRORS - len(errors)])
+
+    batch = []
+    async for lineno, line in iter_lines(chunks, gzipped):
+        if not line.strip():
+            continue
+
+        batch.append((lineno, line))
+        if len(batch) >= INGEST_BATCH:
+            await process(batch)
+            batch = []
+            if status is not None:
+                break
+
+    if batch and status is None:
+        await process(batch)
+
+    return {
+        "accepted": accepted,
+        "rejected": rejected,
+        "errors": errors,
+        "status": status,
+        "resume_line": resume_line,
+    }
@@ -1,20 +1,202 @@
-from fastapi import APIRouter
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, JSONResponse
+from starlette.background import BackgroundTask
+from datetime import datetime, timezone
+import os
+import time
+import tempfile
+from collections import deque
 
-# In-memory store for automation events
-AUTOMATION_EVENTS = []
+from automation.state_utils import features_from_snapshots, reference_ac
+from models.schemas import WhatIfRequest, CommandBatch
+from devices.capabilities import resolve, supported_actions
+from storage.energy_store import absolute_hour, readings_to_dict
+from storage.export import (
+    DATASETS, FORMATS, MEDIA_TYPES, SUFFIXES, ExportUnavailable,
+    export_readings, export_records
+)
+from automation.log_store import iter_logs, log_stats
+from engine.profiler import PROFILER_ENABLED, MAX_PROFILE_SECONDS, SamplingProfiler
+from api.ingest import (
+    EVENT_STORE_SIZE, INGEST_BATCH, INGEST_BURST, INGEST_RATE,
+    IngestError, IngestQueue, TokenBucket, ingest
+)
 
+# Upper bound on rows per what-if request
+MAX_WHAT_IF_ROWS = 1000
 
-def attach_routes(router, devices, rule_engine, predictor, engine):
+# Upper bound on commands per bulk request
+MAX_COMMANDS = 5000
+
+# In-memory store for automation events (newest EVENT_STORE_SIZE)
+AUTOMATION_EVENTS = deque(maxlen=EVENT_STORE_SIZE)
+
+
+def _csv_tuple(value):
+    """
+    "a,b" → ("a", "b") (sorted, so equivalent queries share a cache
+    entry); None → None.
+    """
+    if value is None:
+        return None
+    return tuple(sorted({part.strip() for part in value.split(",") if part.strip()}))
+
+
+def _epoch(value):
+    """
+    ISO timestamp (naive = UTC, like the log's own) → epoch seconds;
+    None → None.
+    """
+    if value is None:
+        return None
+    try:
+        stamp = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid ISO timestamp: {value}")
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.timestamp()
+
+
+def _etags(header):
+    if not header:
+        return set()
+    return {tag.strip() for tag in header.split(",")}
+
+
+def attach_routes(router, devices, rule_engine, predictor, engine, role=None):
+
+    profiler = SamplingProfiler() if PROFILER_ENABLED else None
+
+    def shared_snapshot():
+        """
+        Read-only workers (SHARED_STATE=1) serve state from the owner's
+        shared-memory segment; None means "use the local simulator".
+        """
+        if role is None or role.is_owner:
+            return None
+        snapshot = role.reader.read()
+        if snapshot is None:
+            raise HTTPException(
+                status_code=503,
+                detail="State not published yet",
+                headers={"Retry-After": "1"}
+            )
+        return snapshot
+
+    def require_owner():
+        """
+        Commands, mode changes, in-memory engine aggregates, the plan
+        and tick / rule debug stats are served by the simulator owner
+        only (a reader's local engine never ticks).
+        """
+        if role is not None and not role.is_owner:
+            raise HTTPException(
+                status_code=503,
+                detail="Read-only worker; retry to reach the simulator owner",
+                headers={"Retry-After": "1"}
+            )
+
+    # Shared by every bulk producer
+    ingest_bucket = TokenBucket(INGEST_RATE, INGEST_BURST)
+    ingest_queue = IngestQueue()
 
     # ==============================
     # DEVICE STATE
     # ==============================
+    def serve_state(request, device_ids=None, fields=None):
+        """
+        Pre-encoded body for the current state version (all devices, or
+        a projection). Supports ETag / If-None-Match and gzip.
+        """
+        shared = shared_snapshot()
+        if shared is not None:
+            view = shared.view()
+        else:
+            view = engine.publisher.current if engine.publisher else None
+
+        if view is None:
+            return {
+                device_id: devices[device_id].snapshot()
+                for device_id in (device_ids or devices)
+                if device_id in devices
+            }
+
+        if shared is not None and device_ids is None and fields is None:
+            # Full view: the owner's bytes, served without decoding
+            body, gzip_body, etag = shared.body, shared.gzip, shared.etag
+        else:
+            body, gzip_body, etag = view.render(device_ids, fields)
+        headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+
+        if etag in _etags(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=headers)
+
+        if gzip_body is not None and "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            body = gzip_body
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
     @router.get("/state")
-    def get_state():
+    def get_state(
+        request: Request,
+        device_filter: str | None = Query(None, alias="devices"),
+        fields: str | None = None
+    ):
+        """
+        Serves the pre-encoded body published for the current state
+        version. Supports ETag / If-None-Match and gzip.
+        """
+        return serve_state(request, _csv_tuple(device_filter), _csv_tuple(fields))
+
+    # ==============================
+    # ROOM / TYPE LOOKUPS (REGISTRY INDEXES)
+    # ==============================
+    @router.get("/rooms")
+    def list_rooms():
+        """
+        room → {device_type: count}
+        """
+        return devices.rooms()
+
+    @router.get("/rooms/{room}/state")
+    def get_room_state(
+        room: str,
+        request: Request,
+        device_type: str | None = Query(None, alias="type"),
+        fields: str | None = None
+    ):
+        """
+        State of one room's devices (optionally one type), projected
+        from the published view via the registry's room index.
+        """
+        if room not in devices.by_room:
+            raise HTTPException(status_code=404, detail="Unknown room")
+        return serve_state(
+            request,
+            tuple(devices.ids(room, device_type)),
+            _csv_tuple(fields)
+        )
+
+    @router.get("/devices")
+    def list_devices(
+        device_type: str | None = Query(None, alias="type"),
+        room: str | None = None
+    ):
+        """
+        Devices filtered by ?type= and/or ?room=, read from the indexes.
+        """
         return {
-            device_id: d.snapshot()
-            for device_id, d in devices.items()
+            "count": len(devices.ids(room, device_type)),
+            "devices": [
+                {
+                    "device_id": device.device_id,
+                    "device_type": device.device_type,
+                    "room": device.room
+                }
+                for device in devices.select(room, device_type)
+            ]
         }
 
     # ==============================
@@ -27,24 +209,28 @@ def attach_routes(router, devices, rule_engine, predictor, engine):
         Does NOT affect simulator state.
         Always reflects AUTO logic.
         """
-
-        snapshots = {
-            device_id: d.snapshot()
-            for device_id, d in devices.items()
-        }
+        shared = shared_snapshot()
+        if shared is not None:
+            snapshots = shared.snapshots()
+        else:
+            snapshots = {
+                device_id: d.snapshot()
+                for device_id, d in devices.items()
+            }
 
         # Real-world clock for API preview
         current_hour = datetime.now().hour
 
         # Prefer AC snapshot for environment context
-        ref = snapshots.get("ac_1") or next(iter(snapshots.values()))
+        ac = snapshots.get(reference_ac(devices), {})
+        ref = ac or next(iter(snapshots.values()))
 
         ml_snapshot = {
             "hour_of_day": current_hour,
             "ambient_temperature": ref.get("ambient_temperature", 25),
             "occupancy": ref.get("occupancy", 0),
-            "ac_power": snapshots.get("ac_1", {}).get("power") == "ON",
-            "set_temperature": snapshots.get("ac_1", {}).get("set_temperature", 0),
+            "ac_power": ac.get("power") == "ON",
+            "set_temperature": ac.get("set_temperature", 0),
             "total_current_load": sum(
                 snap.get("power_draw", 0)
                 for snap in snapshots.values()
@@ -54,9 +240,10 @@ def attach_routes(router, devices, rule_engine, predictor, engine):
 
         predicted_energy = predictor.predict(ml_snapshot)
 
-        actions, explanations = rule_engine.evaluate(
-            devices,
-            ml_prediction=predicted_energy
+        # preview(): no incremental cache, stats or verify logging, so
+        # API threads never race the tick's evaluate()
+        [(actions, explanations)] = rule_engine.preview(
+            [(snapshots, predicted_energy)]
         )
 
         return {
@@ -66,6 +253,152 @@ def attach_routes(router, devices, rule_engine, predictor, engine):
             "explanations": explanations
         }
 
+    # ==============================
+    # BATCH WHAT-IF DECISIONS
+    # ==============================
+    @router.post("/decision/batch")
+    def what_if_decisions(request: WhatIfRequest):
+        """
+        Dry-run many hypothetical states at once: one batched model
+        call and one batched rule pass. Does NOT affect simulator state.
+        """
+        if len(request.rows) > MAX_WHAT_IF_ROWS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {MAX_WHAT_IF_ROWS} rows per request"
+            )
+
+        shared = shared_snapshot()
+        if shared is not None:
+            live = shared.snapshots()
+        else:
+            live = {
+                device_id: d.snapshot()
+                for device_id, d in devices.items()
+            }
+        default_hour = datetime.now().hour
+        ac_id = reference_ac(devices)
+
+        scenarios = []
+        feature_rows = []
+
+        for row in request.rows:
+            hour = default_hour if row.hour_of_day is None else row.hour_of_day
+
+            snapshots = {}
+            for device_id, snap in live.items():
+                snapshots[device_id] = {**snap, "hour_of_day": hour}
+            for device_id, overrides in (row.devices or {}).items():
+                base = snapshots.get(device_id, {"device_id": device_id})
+                snapshots[device_id] = {**base, **overrides, "hour_of_day": hour}
+
+            features = features_from_snapshots(snapshots, hour, ac_id)
+            if row.features is not None:
+                features.update(row.features.model_dump(exclude_none=True))
+
+            scenarios.append(snapshots)
+            feature_rows.append(features)
+
+        predictions = predictor.predict_many(feature_rows)
+        decisions = rule_engine.preview(zip(scenarios, predictions))
+
+        return {
+            "mode": "WHAT_IF",
+            "count": len(predictions),
+            "results": [
+                {
+                    "predicted_energy": round(predicted_energy, 3),
+                    "actions": actions,
+                    "explanations": explanations
+                }
+                for predicted_energy, (actions, explanations)
+                in zip(predictions, decisions)
+            ]
+        }
+
+    # ==============================
+    # BULK DEVICE COMMANDS
+    # ==============================
+    @router.post("/commands")
+    def apply_commands(batch: CommandBatch):
+        """
+        Validate many device commands against each device's declared
+        capabilities, then queue the valid ones as a single batch for
+        the simulator thread to apply.
+        """
+        require_owner()
+        if len(batch.commands) > MAX_COMMANDS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {MAX_COMMANDS} commands per request"
+            )
+
+        results = []
+        resolved = []
+
+        for index, command in enumerate(batch.commands):
+            device = devices.get(command.device_id)
+            if device is None:
+                results.append({
+                    "index": index,
+                    "device_id": command.device_id,
+                    "status": "FAILED",
+                    "reason": "Device not found"
+                })
+                continue
+
+            try:
+                method, value = resolve(
+                    device,
+                    command.action,
+                    command.payload.get("value")
+                )
+            except ValueError as e:
+                results.append({
+                    "index": index,
+                    "device_id": command.device_id,
+                    "status": "FAILED",
+                    "reason": str(e)
+                })
+                continue
+
+            resolved.append((device, method, value))
+            results.append({
+                "index": index,
+                "device_id": command.device_id,
+                "action": command.action.upper(),
+                "status": "QUEUED"
+            })
+
+        failed = len(batch.commands) - len(resolved)
+
+        seq = None
+        if batch.atomic and failed:
+            for result in results:
+                if result["status"] == "QUEUED":
+                    result["status"] = "SKIPPED"
+            resolved = []
+        elif resolved:
+            seq = engine.apply_commands(resolved)
+
+        return {
+            "queued": len(resolved),
+            "failed": failed,
+            "command_seq": seq,
+            "results": results
+        }
+
+    @router.get("/devices/{device_id}/actions")
+    def list_device_actions(device_id: str):
+        device = devices.get(device_id)
+        if device is None:
+            raise HTTPException(status_code=404, detail="Unknown device")
+        return {
+            "device_id": device_id,
+            "device_type": device.device_type,
+            "actions": supported_actions(device)
+        }
+
     # ==============================
     # 🔀 MODE TOGGLE ENDPOINTS
     # ==============================
@@ -74,10 +407,12 @@ def attach_routes(router, devices, rule_engine, predictor, engine):
         """
         Activates MANUAL mode.
         """
-        engine.set_manual_mode(payload)
+        require_owner()
+        seq = engine.set_manual_mode(payload)
         return {
             "status": "MANUAL mode activated",
-            "active_mode": "MANUAL"
+            "active_mode": "MANUAL",
+            "command_seq": seq
         }
 
     @router.post("/mode/auto")
@@ -85,10 +420,44 @@ def attach_routes(router, devices, rule_engine, predictor, engine):
         """
         Switches back to AUTO mode.
         """
-        engine.set_auto_mode()
+        require_owner()
+        seq = engine.set_auto_mode()
         return {
             "status": "AUTO mode activated",
-            "active_mode": "AUTO"
+            "active_mode": "AUTO",
+            "command_seq": seq
+        }
+
+    @router.post("/mode/schedule")
+    def activate_schedule_mode(payload: dict = None):
+        """
+        Switches to SCHEDULE mode: execute a day-ahead plan, optionally
+        under {"energy_budget": <sum of hourly predictions>}.
+        """
+        require_owner()
+        budget = (payload or {}).get("energy_budget")
+        if budget is not None and not isinstance(budget, (int, float)):
+            raise HTTPException(status_code=422, detail="energy_budget must be a number")
+
+        seq = engine.set_schedule_mode(budget)
+        return {
+            "status": "SCHEDULE mode activated",
+            "active_mode": "SCHEDULE",
+            "energy_budget": budget,
+            "command_seq": seq
+        }
+
+    @router.get("/schedule")
+    def get_schedule():
+        """
+        The current day-ahead plan (null until SCHEDULE mode has run).
+        """
+        require_owner()
+        plan = engine.plan
+        return {
+            "active_mode": engine.mode.value,
+            "replans": engine.replans,
+            "plan": plan.to_dict() if plan else None
         }
 
     @router.get("/mode")
@@ -96,8 +465,9 @@ def attach_routes(router, devices, rule_engine, predictor, engine):
         """
         Returns current simulator control mode.
         """
+        shared = shared_snapshot()
         return {
-            "active_mode": engine.mode.value
+            "active_mode": shared.meta["mode"] if shared else engine.mode.value
         }
 
     # ==============================
@@ -108,12 +478,93 @@ def attach_routes(router, devices, rule_engine, predictor, engine):
         """
         Health endpoint for Render / uptime monitoring.
         """
+        shared = shared_snapshot()
+        if shared is not None:
+            meta = shared.meta
+            return {
+                "status": "ok",
+                "worker": "reader",
+                "pid": os.getpid(),
+                "owner_pid": meta["pid"],
+                "state_version": meta["version"],
+                "state_age_seconds": round(time.time() - meta["published_at"], 3),
+                "simulator_running": meta["running"],
+                "mode": meta["mode"],
+                "commands_submitted": meta["commands_submitted"],
+                "commands_applied": meta["commands_applied"]
+            }
+
         return {
             "status": "ok",
             "simulator_running": engine.running,
-            "mode": engine.mode.value
+            "mode": engine.mode.value,
+            "commands_submitted": engine.commands.submitted,
+            "commands_applied": engine.commands.applied
         }
 
+    @router.get("/debug/ticks")
+    def list_tick_timings():
+        """
+        Recent live ticks as (monotonic start, duration) in seconds,
+        for measuring tick-period jitter.
+        """
+        require_owner()
+        return {
+            "tick_seconds": engine.tick_seconds,
+            "ticks": [
+                {"start": started, "duration": duration}
+                for started, duration in list(engine.tick_timings)
+            ]
+        }
+
+    @router.get("/debug/rules")
+    def rule_engine_stats():
+        """
+        How many device evaluations the change-driven rule engine ran
+        vs. skipped (and, with RULES_VERIFY=1, any mismatches).
+        """
+        require_owner()
+        return dict(rule_engine.stats)
+
+    @router.get("/rules/analysis")
+    def rule_analysis():
+        """
+        Load-time analysis of the enabled rules: dead (shadowed) rules,
+        duplicates, contradictions, and the merged interval lookups.
+        """
+        require_owner()
+        return rule_engine.analysis_report()
+
+    @router.post("/debug/profile")
+    def run_profile(
+        seconds: float = Query(5.0, gt=0, le=MAX_PROFILE_SECONDS),
+        interval_ms: float = Query(5.0, ge=1, le=1000),
+        threads: str = Query("all", pattern="^(all|simulator|api)$"),
+        top: int = Query(25, ge=1, le=500),
+        format: str = Query("json", pattern="^(json|collapsed)$")
+    ):
+        """
+        Samples thread stacks for `seconds` and returns the hottest
+        functions plus collapsed stacks (flamegraph.pl / speedscope).
+        Disabled unless ENABLE_PROFILER=1.
+        """
+        if profiler is None:
+            raise HTTPException(status_code=404, detail="Profiler disabled")
+
+        try:
+            result = profiler.profile(
+                seconds=seconds,
+                interval=interval_ms / 1000,
+                threads=threads,
+                top=top
+            )
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+
+        if format == "collapsed":
+            return Response(content=result["collapsed"], media_type="text/plain")
+        return result
+
     # ==============================
     # AUTOMATION EVENTS STREAM
     # ==============================
@@ -126,6 +577,323 @@ def attach_routes(router, devices, rule_engine, predictor, engine):
         AUTOMATION_EVENTS.append(event)
         return {"status": "received"}
 
+    @router.post("/automation-events/bulk")
+    async def receive_automation_events_bulk(request: Request):
+        """
+        Newline-delimited JSON events (Content-Encoding: gzip optional),
+        validated while the body streams in. When the ingest budget is
+        exhausted the request stops with 429, and when too many lines are
+        already queued for parsing with 503, both with Retry-After; events
+        before `resume_line` were stored, the producer resends from there.
+        """
+        if ingest_queue.full():
+            return JSONResponse(
+                status_code=503,
+                content={"status": "busy", "accepted": 0, "resume_line": 1},
+                headers={"Retry-After": "1"}
+            )
+
+        retry = ingest_bucket.retry_after(1)
+        if retry:
+            return JSONResponse(
+                status_code=429,
+                content={"status": "saturated", "accepted": 0, "resume_line": 1},
+                headers={"Retry-After": str(retry)}
+            )
+
+        gzipped = "gzip" in request.headers.get("content-encoding", "")
+
+        try:
+            result = await ingest(
+                request.stream(),
+                gzipped,
+                AUTOMATION_EVENTS,
+                ingest_bucket,
+                ingest_queue
+            )
+        except IngestError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+        status = result.pop("status")
+        if status == "saturated":
+            return JSONResponse(
+                status_code=429,
+                content={"status": status, **result},
+                headers={"Retry-After": str(ingest_bucket.retry_after(INGEST_BATCH))}
+            )
+        if status == "busy":
+            return JSONResponse(
+                status_code=503,
+                content={"status": status, **result},
+                headers={"Retry-After": "1"}
+            )
+
+        result.pop("resume_line")
+        return {"status": "received", **result}
+
     @router.get("/automation-events")
     def list_automation_events():
-        return AUTOMATION_EVENTS
+        return list(AUTOMATION_EVENTS)
+
+    # ==============================
+    # 🎓 MODEL VERSIONS / RETRAINING
+    # ==============================
+    def get_retrainer():
+        require_owner()
+        if engine.retrainer is None:
+            raise HTTPException(status_code=404, detail="Retraining disabled")
+        return engine.retrainer
+
+    @router.get("/model")
+    def get_model_status():
+        """
+        Active model version, version history and the last training run.
+        """
+        return get_retrainer().status()
+
+    @router.post("/model/retrain")
+    def retrain_model():
+        """
+        Start a training run now (in a child process); the candidate is
+        swapped in only if it beats the live model on the holdout.
+        """
+        if not get_retrainer().start():
+            raise HTTPException(
+                status_code=409,
+                detail="Training already running or no history recorded yet"
+            )
+        return {"status": "training started"}
+
+    @router.post("/model/rollback")
+    def rollback_model():
+        """
+        Re-activate the previously active model version.
+        """
+        version = get_retrainer().rollback()
+        if version is None:
+            raise HTTPException(status_code=409, detail="No earlier version to roll back to")
+        return {"status": "rolled back", "active_version": version}
+
+    # ==============================
+    # ENERGY ROLLUPS (ROOM / TYPE / DAY)
+    # ==============================
+    # Declared before /energy/{device_id} so "rollups" isn't taken
+    # for a device id
+    @router.get("/energy/rollups")
+    def get_energy_rollups_by(by: str = "room", day: int | None = None):
+        """
+        kWh per room or per device type for one simulated day
+        (default: the current, still open day).
+        """
+        require_owner()
+        try:
+            rollup = engine.energy_rollups.by(by, day)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if rollup is None:
+            raise HTTPException(status_code=404, detail="No energy recorded for that day")
+        return rollup
+
+    @router.get("/energy/rollups/history")
+    def get_energy_rollup_history(
+        by: str = "room",
+        start_day: int | None = None,
+        end_day: int | None = None
+    ):
+        """
+        Daily rollups for start_day..end_day (inclusive); finished
+        days are frozen.
+        """
+        require_owner()
+        try:
+            days = engine.energy_rollups.days(by, start_day, end_day)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"by": by, "days": days}
+
+    # ==============================
+    # ENERGY TIME-SERIES
+    # ==============================
+    def energy_store_for(device_ids):
+        """
+        The store, once every requested id is a registered or stored
+        device (ids name directories, so nothing else reaches it).
+        """
+        store = engine.energy_store
+        if store is None:
+            raise HTTPException(status_code=404, detail="Energy store disabled")
+
+        unknown = [
+            device_id for device_id in device_ids
+            if device_id not in devices and not store.has_device(device_id)
+        ]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Unknown device: {', '.join(unknown)}")
+        return store
+
+    @router.get("/energy/{device_id}")
+    def get_energy_readings(
+        device_id: str,
+        start_day: int | None = None,
+        end_day: int | None = None
+    ):
+        """
+        Per-tick readings for one device, for simulated days
+        start_day..end_day (inclusive).
+        """
+        store = energy_store_for([device_id])
+
+        columns = store.read_range(
+            device_id,
+            start_hour=None if start_day is None else absolute_hour(start_day, 0),
+            end_hour=None if end_day is None else absolute_hour(end_day + 1, 0)
+        )
+        if columns is None:
+            raise HTTPException(status_code=404, detail="Unknown device")
+
+        return {
+            "device_id": device_id,
+            "readings": readings_to_dict(columns)
+        }
+
+    @router.get("/energy/{device_id}/rollups")
+    def get_energy_rollups(
+        device_id: str,
+        granularity: str = "daily",
+        start_day: int | None = None,
+        end_day: int | None = None
+    ):
+        """
+        Precomputed hourly or daily rollups for one device.
+        """
+        store = energy_store_for([device_id])
+
+        if granularity == "hourly":
+            start = None if start_day is None else absolute_hour(start_day, 0)
+            end = None if end_day is None else absolute_hour(end_day + 1, 0)
+        elif granularity == "daily":
+            start = start_day
+            end = None if end_day is None else end_day + 1
+        else:
+            raise HTTPException(status_code=400, detail="granularity must be hourly or daily")
+
+        rollups = store.read_rollups(device_id, granularity, start=start, end=end)
+        if rollups is None:
+            raise HTTPException(status_code=404, detail="Unknown device")
+
+        return {
+            "device_id": device_id,
+            "granularity": granularity,
+            "rollups": rollups
+        }
+
+    # ==============================
+    # AUTOMATION LOG (MEMORY + SPILLED SEGMENTS)
+    # ==============================
+    @router.get("/logs")
+    def list_logs(
+        since: str | None = None,
+        until: str | None = None,
+        after_seq: int | None = None,
+        log_type: str | None = Query(None, alias="type"),
+        limit: int = Query(100, ge=1, le=10000)
+    ):
+        """
+        Log entries oldest first; page with after_seq=<next_seq>.
+        Older pages are read from the on-disk segments via their
+        sparse seq / time index.
+        """
+        entries = []
+        for entry in iter_logs(_epoch(since), _epoch(until), after_seq):
+            if log_type is not None and entry.get("type") != log_type:
+                continue
+            entries.append(entry)
+            if len(entries) >= limit:
+                break
+
+        return {
+            "entries": entries,
+            "next_seq": entries[-1]["seq"] if entries else after_seq
+        }
+
+    @router.get("/logs/stats")
+    def get_log_stats():
+        return log_stats()
+
+    # ==============================
+    # COLUMNAR EXPORT
+    # ==============================
+    @router.get("/export/{dataset}")
+    def export_dataset(
+        dataset: str,
+        format: str = Query("csv"),
+        device_filter: str | None = Query(None, alias="devices"),
+        start_day: int | None = Query(None, ge=1),
+        end_day: int | None = Query(None, ge=1),
+        since: str | None = None,
+        until: str | None = None
+    ):
+        """
+        Readings (start_day..end_day, inclusive as on /energy) or logs,
+        decisions and events (since / until, ISO timestamps) as a CSV,
+        Parquet or Arrow IPC file, written chunk by chunk to a temp
+        file and then streamed. Parquet / Arrow need pyarrow (501
+        without it).
+        """
+        if dataset not in DATASETS:
+            raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+        if format not in FORMATS:
+            raise HTTPException(status_code=400, detail=f"format must be one of {FORMATS}")
+        device_ids = list(_csv_tuple(device_filter)) if device_filter else None
+        if dataset == "readings":
+            energy_store_for(device_ids or [])
+        # Validated (400) and offset-normalised for every record dataset
+        since_ts, until_ts = _epoch(since), _epoch(until)
+
+        fd, path = tempfile.mkstemp(suffix=SUFFIXES[format])
+        os.close(fd)
+
+        try:
+            if dataset == "readings":
+                rows = export_readings(
+                    engine.energy_store,
+                    path,
+                    fmt=format,
+                    devices=device_ids,
+                    start_hour=absolute_hour(start_day, 0) if start_day else None,
+                    end_hour=absolute_hour(end_day + 1, 0) if end_day else None
+                )
+            else:
+                if dataset == "events":
+                    entries = list(AUTOMATION_EVENTS)
+                elif dataset == "decisions":
+                    entries = (
+                        e for e in iter_logs(since_ts, until_ts)
+                        if e.get("type") == "automation"
+                    )
+                else:
+                    entries = iter_logs(since_ts, until_ts)
+
+                rows = export_records(
+                    dataset,
+                    entries,
+                    path,
+                    fmt=format,
+                    devices=device_ids,
+                    since=since_ts,
+                    until=until_ts
+                )
+        except ExportUnavailable as e:
+            os.remove(path)
+            raise HTTPException(status_code=501, detail=str(e))
+        except BaseException:
+            os.remove(path)
+            raise
+
+        return FileResponse(
+            path,
+            media_type=MEDIA_TYPES[format],
+            filename=f"{dataset}{SUFFIXES[format]}",
+            headers={"X-Export-Rows": str(rows)},
+            background=BackgroundTask(os.remove, path)
+        )
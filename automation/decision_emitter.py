@@ -1,16 +1,111 @@
 from automation.log_store import add_log
+from automation.explanation import render_explanation
+from datetime import datetime
 import requests
+import time
 import os
 
+from engine.logging_setup import get_logger
+
+log = get_logger("events")
+
 BASE_URL = os.getenv("BASE_URL", "http://127.0.0.1:8000")
 
+# Headless runs (replay, sweeps) turn HTTP delivery off
+DELIVER_EVENTS = os.getenv("DELIVER_AUTOMATION_EVENTS", "1") != "0"
+
+
+def set_event_delivery(enabled: bool):
+    global DELIVER_EVENTS
+    DELIVER_EVENTS = enabled
+
+
+# Optional callable(payload) replacing the blocking POST below; the
+# asyncio engine (engine.async_runner) hands events to its own sender
+_deliverer = None
+
+
+def set_event_deliverer(deliverer):
+    global _deliverer
+    _deliverer = deliverer
+
+
+class DecisionRecord:
+    """
+    One automation decision, frozen at the moment it was made.
+
+    Sensor and state values are copied (not referenced), and the
+    explanation is kept as a template ID + arguments; text is only
+    rendered when the record is read (to_dict / .explanation).
+    """
 
-def emit_decision(payload: dict):
-    # Log locally
-    add_log({
-        "type": "automation",
-        **payload
-    })
+    __slots__ = (
+        "device_id", "device_type", "hour", "time_of_day",
+        "sensors", "new_state", "predicted_energy", "action_taken",
+        "template", "args", "created",
+    )
+
+    def __init__(self, device_id, device_type, hour, time_of_day, sensors,
+                 new_state, predicted_energy, action_taken, template, args=()):
+        init = object.__setattr__
+        init(self, "device_id", device_id)
+        init(self, "device_type", device_type)
+        init(self, "hour", hour)
+        init(self, "time_of_day", time_of_day)
+        init(self, "sensors", tuple(sensors.items()))
+        init(self, "new_state", tuple(new_state.items()))
+        init(self, "predicted_energy", predicted_energy)
+        init(self, "action_taken", action_taken)
+        init(self, "template", template)
+        init(self, "args", tuple(args))
+        init(self, "created", time.time())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DecisionRecord is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("DecisionRecord is immutable")
+
+    @property
+    def explanation(self):
+        return render_explanation(self.template, self.args)
+
+    def to_dict(self):
+        return {
+            "type": "automation",
+            "device_id": self.device_id,
+            "device_type": self.device_type,
+            "hour": self.hour,
+            "time_of_day": self.time_of_day,
+            "sensors": dict(self.sensors),
+            "new_state": dict(self.new_state),
+            "predicted_energy": self.predicted_energy,
+            "action_taken": self.action_taken,
+            "explanation": self.explanation,
+            "timestamp": datetime.utcfromtimestamp(self.created).isoformat(),
+        }
+
+
+def emit_decision(record):
+    """
+    record: a DecisionRecord (stored as-is) or a plain dict payload.
+    """
+    if isinstance(record, DecisionRecord):
+        add_log(record)
+    else:
+        add_log({
+            "type": "automation",
+            **record
+        })
+
+    if not DELIVER_EVENTS:
+        return
+
+    payload = record.to_dict() if isinstance(record, DecisionRecord) else record
+
+    if _deliverer is not None:
+        _deliverer(payload)
+        return
 
     # Send to API endpoint
     try:
@@ -20,4 +115,7 @@ def emit_decision(payload: dict):
             timeout=2
         )
     except Exception as e:
-        print("[WARN] Automation event not delivered:", e)
+        log.warning(
+            "automation event not delivered: %s", e,
+            extra={"rate_key": "delivery"}
+        )
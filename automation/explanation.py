@@ -0,0 +1,49 @@
+# automation/explanation.py
+#
+# Decision explanations are stored as a template ID plus arguments and
+# only rendered to text when someone reads them.
+
+EXPLANATION_TEMPLATES = {
+    # ---------- AC ----------
+    "ac_ml_off": "AC turned OFF due to high predicted energy usage",
+    "ac_on": (
+        "AC turned ON because the room is occupied "
+        "and the temperature exceeded the {time_of_day} threshold"
+    ),
+    "ac_off": "AC turned OFF because the room is unoccupied or sufficiently cool",
+
+    # ---------- FAN ----------
+    "fan_on": "Fan turned ON because the room is occupied during {time_of_day}",
+    "fan_off": "Fan turned OFF because the room is unoccupied or it is night",
+
+    # ---------- LIGHT ----------
+    "light_on": "Light turned ON because the room is occupied at {time_of_day}",
+    "light_off": "Light turned OFF because it is daytime or the room is empty",
+
+    "default": "Automation rule applied",
+}
+
+
+def explanation_id(device_type: str, action: str, ml_blocked: bool = False) -> str:
+    """
+    Template matching the exact rule that fired.
+    """
+    if device_type == "AC":
+        if ml_blocked:
+            return "ac_ml_off"
+        return "ac_on" if action == "ON" else "ac_off"
+
+    if device_type == "Fan":
+        return "fan_on" if action == "ON" else "fan_off"
+
+    if device_type == "Light":
+        return "light_on" if action == "ON" else "light_off"
+
+    return "default"
+
+
+def render_explanation(template_id: str, args=()) -> str:
+    """
+    args: (name, value) pairs for the template's placeholders.
+    """
+    return EXPLANATION_TEMPLATES[template_id].format(**dict(args))
@@ -0,0 +1,240 @@
+import os
+import json
+import mmap
+import time
+import struct
+import bisect
+import threading
+
+
+# ==============================
+# ON-DISK LAYOUT
+# ==============================
+# <root>/<first seq:012d>.ndjson   one JSON entry per line, append-only
+# <root>/<first seq:012d>.idx      sparse index: every `index_every`-th
+#                                  entry as (seq u64, epoch f64, offset u64)
+#
+# The index is only a lower bound for seeks: a reader jumps to the
+# nearest indexed offset and scans forward, so an index that lags the
+# segment (crash, unflushed tail) is still correct.
+INDEX_RECORD = struct.Struct("<QdQ")
+
+
+class Segment:
+    def __init__(self, root, first_seq):
+        self.first_seq = first_seq
+        base = os.path.join(root, f"{first_seq:012d}")
+        self.path = base + ".ndjson"
+        self.index_path = base + ".idx"
+
+        self.seqs = []
+        self.stamps = []
+        self.offsets = []
+
+        self.size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        self.last_ts = os.path.getmtime(self.path) if self.size else time.time()
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "rb") as f:
+                raw = f.read()
+            usable = len(raw) - len(raw) % INDEX_RECORD.size
+            for seq, ts, offset in INDEX_RECORD.iter_unpack(raw[:usable]):
+                self._add_index(seq, ts, offset)
+
+    def _add_index(self, seq, ts, offset):
+        # offsets first: a concurrent seek() that sees the new seq or
+        # stamp always finds its offset
+        self.offsets.append(offset)
+        self.stamps.append(ts)
+        self.seqs.append(seq)
+
+    def seek(self, after_seq=None, since_ts=None):
+        """
+        Byte offset to start scanning from.
+        """
+        i = 0
+        if after_seq is not None:
+            i = max(i, bisect.bisect_right(self.seqs, after_seq + 1) - 1)
+        if since_ts is not None:
+            i = max(i, bisect.bisect_left(self.stamps, since_ts) - 1)
+        return self.offsets[i] if self.offsets and i >= 0 else 0
+
+    def remove(self):
+        for path in (self.path, self.index_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class SegmentStore:
+    """
+    Rotating append-only segments for entries evicted from the
+    in-memory automation log. Reads memory-map only the segments (and
+    the part of each) a query needs. Retention drops whole segments
+    once the store exceeds max_bytes or a segment's newest entry is
+    older than max_age seconds.
+    """
+
+    def __init__(self, root, segment_bytes=16 * 1024 * 1024,
+                 max_bytes=512 * 1024 * 1024, max_age=None, index_every=256):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index_every = index_every
+
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.segments = [
+            Segment(root, int(name.split(".")[0]))
+            for name in sorted(os.listdir(root))
+            if name.endswith(".ndjson")
+        ]
+        self.last_seq = self._scan_last_seq()
+
+        self._active = None
+        self._data = None
+        self._index = None
+        self._since_index = 0
+
+    def _scan_last_seq(self):
+        if not self.segments:
+            return 0
+        last = self.segments[-1]
+        seq = last.first_seq - 1
+        for entry in self._scan(last, last.seek(after_seq=2 ** 63)):
+            seq = entry["seq"]
+        return seq
+
+    # ==============================
+    # WRITES
+    # ==============================
+    def append(self, batch):
+        """
+        batch: [(seq, epoch, json line bytes without newline), ...]
+        in seq order.
+        """
+        with self._lock:
+            for seq, ts, line in batch:
+                if self._active is None:
+                    self._open(seq)
+
+                segment = self._active
+                if self._since_index == 0:
+                    record = INDEX_RECORD.pack(seq, ts, segment.size)
+                    self._index.write(record)
+                    segment._add_index(seq, ts, segment.size)
+                self._since_index = (self._since_index + 1) % self.index_every
+
+                self._data.write(line + b"\n")
+                segment.size += len(line) + 1
+                segment.last_ts = ts
+                self.last_seq = seq
+
+                if segment.size >= self.segment_bytes:
+                    self._close_active()
+
+            if self._active is not None:
+                self._data.flush()
+                self._index.flush()
+
+        self.enforce_retention()
+
+    def _open(self, first_seq):
+        segment = Segment(self.root, first_seq)
+        self._data = open(segment.path, "ab")
+        self._index = open(segment.index_path, "ab")
+        self._since_index = 0
+        self._active = segment
+        self.segments.append(segment)
+
+    def _close_active(self):
+        self._data.close()
+        self._index.close()
+        self._active = None
+
+    def close(self):
+        with self._lock:
+            if self._active is not None:
+                self._close_active()
+
+    def enforce_retention(self):
+        with self._lock:
+            now = time.time()
+            total = sum(segment.size for segment in self.segments)
+
+            while self.segments and self.segments[0] is not self._active:
+                oldest = self.segments[0]
+                expired = self.max_age is not None and now - oldest.last_ts > self.max_age
+                if total <= self.max_bytes and not expired:
+                    break
+                oldest.remove()
+                total -= oldest.size
+                self.segments.pop(0)
+
+    # ==============================
+    # READS
+    # ==============================
+    def _scan(self, segment, offset, size=None):
+        size = segment.size if size is None else size
+        if size <= offset:
+            return
+        try:
+            with open(segment.path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return      # dropped by retention meanwhile
+
+        with mapped:
+            pos = offset
+            while pos < size:
+                end = mapped.find(b"\n", pos, size)
+                if end == -1:
+                    break
+                yield json.loads(mapped[pos:end])
+                pos = end + 1
+
+    def read(self, after_seq=None, since_ts=None, until_ts=None, before_seq=None):
+        """
+        Entries with seq > after_seq and since_ts <= epoch < until_ts
+        (and seq < before_seq), oldest first.
+        """
+        with self._lock:
+            segments = [(segment, segment.size) for segment in self.segments]
+
+        starts = [segment.first_seq for segment, _ in segments]
+        first = 0
+        if after_seq is not None:
+            first = max(0, bisect.bisect_right(starts, after_seq + 1) - 1)
+
+        for segment, size in segments[first:]:
+            if before_seq is not None and segment.first_seq >= before_seq:
+                return
+            if since_ts is not None and segment.last_ts < since_ts:
+                continue
+            if until_ts is not None and segment.stamps and segment.stamps[0] >= until_ts:
+                return
+
+            for entry in self._scan(segment, segment.seek(after_seq, since_ts), size):
+                seq = entry["seq"]
+                if after_seq is not None and seq <= after_seq:
+                    continue
+                if before_seq is not None and seq >= before_seq:
+                    return
+                ts = entry.pop("_ts", 0)
+                if since_ts is not None and ts < since_ts:
+                    continue
+                if until_ts is not None and ts >= until_ts:
+                    return
+                yield entry
+
+    def stats(self):
+        with self._lock:
+            return {
+                "segments": len(self.segments),
+                "bytes": sum(segment.size for segment in self.segments),
+                "first_seq": self.segments[0].first_seq if self.segments else None,
+                "last_seq": self.last_seq,
+            }
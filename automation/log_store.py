@@ -1,14 +1,186 @@
+import json
+import time
+import threading
+from itertools import islice
 from collections import deque
 from datetime import datetime
 
-# Keep last N log entries (avoid memory blow-up)
-AUTOMATION_LOGS = deque(maxlen=1000)
+from automation.log_segments import SegmentStore
 
+# Keep last N log entries in memory (avoid memory blow-up); older ones
+# are dropped, or spilled to disk once configure_spill() has been called
+MEMORY_ENTRIES = 1000
 
-def add_log(entry: dict):
-    entry["timestamp"] = datetime.utcnow().isoformat()
-    AUTOMATION_LOGS.append(entry)
+# Entries are spilled in batches of at least this size (one write per
+# batch), by a background writer so the tick never waits on the disk
+SPILL_BATCH = 256
 
+# Unspilled entries beyond MEMORY_ENTRIES + MAX_BACKLOG (a disk that
+# can't keep up) are dropped, oldest first, and counted
+MAX_BACKLOG = 64 * SPILL_BATCH
 
-def get_logs():
-    return list(AUTOMATION_LOGS)
+# (seq, epoch, entry)
+AUTOMATION_LOGS = deque()
+
+_lock = threading.Lock()
+_spilling = threading.Condition(_lock)
+_seq = 0
+_store = None
+_writer = None
+_closing = False
+_dropped = 0
+
+
+def configure_spill(root, **options):
+    """
+    Back the in-memory log with rotating segment files under `root`
+    (see automation.log_segments.SegmentStore for options).
+    """
+    global _store, _seq, _writer
+    with _lock:
+        _store = SegmentStore(root, **options)
+
+        # Entries logged before this (startup) are renumbered after
+        # what's on disk: segments and their sparse index assume seqs
+        # only ever increase
+        if AUTOMATION_LOGS and AUTOMATION_LOGS[0][0] <= _store.last_seq:
+            buffered = list(AUTOMATION_LOGS)
+            AUTOMATION_LOGS.clear()
+            for seq, (_, ts, entry) in enumerate(buffered, _store.last_seq + 1):
+                AUTOMATION_LOGS.append((seq, ts, entry))
+            _seq = AUTOMATION_LOGS[-1][0]
+        _seq = max(_seq, _store.last_seq)
+
+    if _writer is None:
+        _writer = threading.Thread(target=_spill_loop, name="log-spill", daemon=True)
+        _writer.start()
+    return _store
+
+
+def _encode(seq, ts, entry):
+    data = entry if isinstance(entry, dict) else entry.to_dict()
+    # The epoch rides along for index-free time filtering on read
+    return json.dumps({**data, "seq": seq, "_ts": ts}, default=str, separators=(",", ":"))
+
+
+def _spill_loop():
+    """
+    Writer thread: spills everything beyond MEMORY_ENTRIES once a
+    batch has built up, and everything left on close_spill().
+    """
+    while True:
+        with _lock:
+            while not _closing and len(AUTOMATION_LOGS) < MEMORY_ENTRIES + SPILL_BATCH:
+                _spilling.wait()
+            keep = 0 if _closing else MEMORY_ENTRIES
+            pending = list(islice(AUTOMATION_LOGS, max(len(AUTOMATION_LOGS) - keep, 0)))
+            if not pending:
+                return
+
+        _spill(pending)
+
+
+def _spill(pending):
+    global _dropped
+
+    batch = [(seq, ts, _encode(seq, ts, entry).encode()) for seq, ts, entry in pending]
+    try:
+        _store.append(batch)
+    except OSError:
+        with _lock:
+            _dropped += len(batch)
+
+    # Written before being removed from memory, so a reader never
+    # finds an entry in neither place
+    last = pending[-1][0]
+    with _lock:
+        while AUTOMATION_LOGS and AUTOMATION_LOGS[0][0] <= last:
+            AUTOMATION_LOGS.popleft()
+
+
+def add_log(entry):
+    """
+    entry: a dict (timestamped here) or a record object with its own
+    timestamp and a to_dict() (automation.decision_emitter.DecisionRecord).
+    """
+    global _seq, _dropped
+
+    if isinstance(entry, dict):
+        entry["timestamp"] = datetime.utcnow().isoformat()
+
+    with _lock:
+        _seq += 1
+        AUTOMATION_LOGS.append((_seq, time.time(), entry))
+
+        if len(AUTOMATION_LOGS) > MEMORY_ENTRIES:
+            if _store is None:
+                AUTOMATION_LOGS.popleft()
+            elif len(AUTOMATION_LOGS) > MEMORY_ENTRIES + MAX_BACKLOG:
+                AUTOMATION_LOGS.popleft()
+                _dropped += 1
+            elif len(AUTOMATION_LOGS) >= MEMORY_ENTRIES + SPILL_BATCH:
+                _spilling.notify()
+
+
+def close_spill():
+    """
+    Spill everything still in memory and close the active segment
+    (shutdown), so a restart picks up where this process left off.
+    """
+    global _store, _writer, _closing
+    with _lock:
+        if _store is None:
+            return
+        _closing = True
+        _spilling.notify()
+
+    if _writer is not None:
+        _writer.join()
+
+    with _lock:
+        _store.close()
+        _store = None
+        _writer = None
+        _closing = False
+
+
+def iter_logs(since=None, until=None, after_seq=None):
+    """
+    Rendered entries, oldest first, one at a time: spilled segments
+    (seeked via their sparse index) then a snapshot of memory.
+    since / until are epoch seconds. Records are rendered only when read.
+    """
+    with _lock:
+        memory = list(AUTOMATION_LOGS)
+
+    first_in_memory = memory[0][0] if memory else _seq + 1
+
+    if _store is not None and (after_seq is None or after_seq + 1 < first_in_memory):
+        yield from _store.read(after_seq, since, until, before_seq=first_in_memory)
+
+    for seq, ts, entry in memory:
+        if after_seq is not None and seq <= after_seq:
+            continue
+        if since is not None and ts < since:
+            continue
+        if until is not None and ts >= until:
+            break
+        data = entry if isinstance(entry, dict) else entry.to_dict()
+        yield {**data, "seq": seq}
+
+
+def get_logs(limit=MEMORY_ENTRIES):
+    """
+    The newest `limit` entries; older ones stay on disk (page through
+    them with iter_logs(after_seq=...)).
+    """
+    return list(iter_logs(after_seq=max(_seq - limit, 0)))
+
+
+def log_stats():
+    return {
+        "memory_entries": len(AUTOMATION_LOGS),
+        "last_seq": _seq,
+        "dropped": _dropped,
+        "spill": _store.stats() if _store is not None else None,
+    }
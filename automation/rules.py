@@ -1,17 +1,32 @@
 # automation/rules.py
+import logging
+
 from .config import automation_config
 from automation.time_utils import get_time_of_day_from_hour
-from automation.decision_emitter import emit_decision
+from automation.decision_emitter import DecisionRecord, emit_decision
+from automation.explanation import explanation_id, render_explanation
+from engine.logging_setup import get_logger
+
+log = get_logger("automation")
 
 
 def _log_automation(device, current_hour):
-    print(
-        f"[AUTOMATION] {device.device_id} | "
-        f"type={device.device_type} | "
-        f"hour={current_hour} | "
-        f"temp={device.sensors.get('ambient_temperature')} | "
-        f"occ={device.sensors.get('occupancy')} | "
-        f"state={device.state.get('power')}"
+    if not log.isEnabledFor(logging.INFO):
+        return
+
+    log.info(
+        "automation decision",
+        extra={
+            "rate_key": device.device_id,
+            "fields": {
+                "device_id": device.device_id,
+                "type": device.device_type,
+                "hour": current_hour,
+                "temp": device.sensors.get("ambient_temperature"),
+                "occ": device.sensors.get("occupancy"),
+                "state": device.state.get("power"),
+            }
+        }
     )
 
 
@@ -28,54 +43,32 @@ def build_explanation(
     Generate a human-readable explanation that matches
     the exact rule that fired.
     """
+    return render_explanation(
+        explanation_id(device_type, action, ml_blocked),
+        (("time_of_day", time_of_day),)
+    )
 
-    # ---------- AC ----------
-    if device_type == "AC":
-        if ml_blocked:
-            return "AC turned OFF due to high predicted energy usage"
-
-        if action == "ON":
-            return (
-                f"AC turned ON because the room is occupied "
-                f"and the temperature exceeded the {time_of_day} threshold"
-            )
-
-        return "AC turned OFF because the room is unoccupied or sufficiently cool"
-
-    # ---------- FAN ----------
-    if device_type == "Fan":
-        if action == "ON":
-            return f"Fan turned ON because the room is occupied during {time_of_day}"
-        return "Fan turned OFF because the room is unoccupied or it is night"
-
-    # ---------- LIGHT ----------
-    if device_type == "Light":
-        if action == "ON":
-            return f"Light turned ON because the room is occupied at {time_of_day}"
-        return "Light turned OFF because it is daytime or the room is empty"
-
-    return "Automation rule applied"
-
-
-def evaluate_automation(device, current_hour: int, predicted_energy: float | None = None):
-
-    # Respect manual / LLM override
-    if getattr(device, "manual_override", False):
-        return False
 
+def desired_power(device_type: str, sensors: dict, current_hour: int, predicted_energy: float | None = None):
+    """
+    Pure form of the automation policy: (desired power or None, ml_adjusted)
+    for a device type and sensor reading. None means no rule applies
+    and the current state should be kept. Shared by evaluate_automation
+    and the day-ahead planner.
+    """
     time_of_day = get_time_of_day_from_hour(current_hour)
 
     # ---------- AC ----------
-    if device.device_type == "AC":
-        temp = device.sensors.get("ambient_temperature")
-        occupied = device.sensors.get("occupancy")
+    if device_type == "AC":
+        temp = sensors.get("ambient_temperature")
+        occupied = sensors.get("occupancy")
 
         if temp is None or occupied is None:
-            return False
+            return None, False
 
         profile = automation_config["ac_thresholds"].get(time_of_day)
         if not profile:
-            return False
+            return None, False
 
         on_temp = profile["on_temp"]
         off_temp = profile["off_temp"]
@@ -94,100 +87,33 @@ def evaluate_automation(device, current_hour: int, predicted_energy: float | Non
                 on_temp += adjust["low_energy_delta"]
 
         if occupied and temp >= on_temp:
-            if device.state.get("power") != "ON":
-                device.apply_state({"power": "ON"})
-                _log_automation(device, current_hour)
-
-                emit_decision({
-                    "device_id": device.device_id,
-                    "device_type": device.device_type,
-                    "hour": current_hour,
-                    "time_of_day": time_of_day,
-                    "sensors": device.sensors,
-                    "new_state": device.state,
-                    "predicted_energy": predicted_energy,
-                    "action_taken": True,
-                    "explanation": build_explanation(
-                        "AC",
-                        "ON",
-                        time_of_day=time_of_day,
-                        occupied=occupied,
-                        predicted_energy=predicted_energy
-                    )
-                })
-
-                return True
+            return "ON", ml_adjusted
 
         if (not occupied) or temp <= off_temp:
-            if device.state.get("power") != "OFF":
-                device.apply_state({"power": "OFF"})
-                _log_automation(device, current_hour)
-
-                emit_decision({
-                    "device_id": device.device_id,
-                    "device_type": device.device_type,
-                    "hour": current_hour,
-                    "time_of_day": time_of_day,
-                    "sensors": device.sensors,
-                    "new_state": device.state,
-                    "predicted_energy": predicted_energy,
-                    "action_taken": True,
-                    "explanation": build_explanation(
-                        "AC",
-                        "OFF",
-                        time_of_day=time_of_day,
-                        occupied=occupied,
-                        predicted_energy=predicted_energy,
-                        ml_blocked=ml_adjusted
-                    )
-                })
-
-                return True
+            return "OFF", ml_adjusted
+
+        return None, ml_adjusted
 
        # ---------- FAN (TIME-AWARE) ----------
-    elif device.device_type == "Fan":
+    if device_type == "Fan":
         rules = automation_config.get("fan_rules", {}).get(time_of_day)
 
-        occupied = device.sensors.get("occupancy", False)
+        occupied = sensors.get("occupancy", False)
 
         # ✅ FAIL-SAFE DEFAULT:
         # If rules or use_occupancy not defined, fall back to occupancy-based control
         if rules is None:
-            desired = "ON" if occupied else "OFF"
-        else:
-            if rules.get("use_occupancy", True):
-                desired = "ON" if occupied else "OFF"
-            else:
-                desired = "OFF"
-
-        if device.state.get("power") != desired:
-            device.apply_state({"power": desired})
-            _log_automation(device, current_hour)
-
-            emit_decision({
-                "device_id": device.device_id,
-                "device_type": device.device_type,
-                "hour": current_hour,
-                "time_of_day": time_of_day,
-                "sensors": device.sensors,
-                "new_state": device.state,
-                "predicted_energy": predicted_energy,
-                "action_taken": True,
-                "explanation": build_explanation(
-                    "Fan",
-                    desired,
-                    time_of_day=time_of_day,
-                    occupied=occupied
-                )
-            })
-
-            return True
+            return ("ON" if occupied else "OFF"), False
+
+        if rules.get("use_occupancy", True):
+            return ("ON" if occupied else "OFF"), False
 
+        return "OFF", False
 
     # ---------- LIGHT (TIME + ML AWARE) ----------
-    elif device.device_type == "Light":
+    if device_type == "Light":
         rules = automation_config["light_rules"].get(time_of_day, {})
-        occupied = device.sensors.get("occupancy", False)
+        occupied = sensors.get("occupancy", False)
 
         allow_light = rules.get("allow", False)
 
@@ -199,30 +125,48 @@ def evaluate_automation(device, current_hour: int, predicted_energy: float | Non
         ):
             allow_light = False
 
-        desired = "ON" if (allow_light and occupied) else "OFF"
+        return ("ON" if (allow_light and occupied) else "OFF"), False
 
-        if device.state.get("power") != desired:
-            device.apply_state({"power": desired})
-            _log_automation(device, current_hour)
+    return None, False
 
-            emit_decision({
-                "device_id": device.device_id,
-                "device_type": device.device_type,
-                "hour": current_hour,
-                "time_of_day": time_of_day,
-                "sensors": device.sensors,
-                "new_state": device.state,
-                "predicted_energy": predicted_energy,
-                "action_taken": True,
-                "explanation": build_explanation(
-                    "Light",
-                    desired,
-                    time_of_day=time_of_day,
-                    occupied=occupied,
-                    predicted_energy=predicted_energy
-                )
-            })
-
-            return True
-
-    return False
+
+def evaluate_automation(device, current_hour: int, predicted_energy: float | None = None):
+
+    # Respect manual / LLM override
+    if getattr(device, "manual_override", False):
+        return False
+
+    desired, ml_adjusted = desired_power(
+        device.device_type,
+        device.sensors,
+        current_hour,
+        predicted_energy
+    )
+
+    if desired is None or device.state.get("power") == desired:
+        return False
+
+    time_of_day = get_time_of_day_from_hour(current_hour)
+
+    device.apply_state({"power": desired})
+    _log_automation(device, current_hour)
+
+    # Only the AC OFF explanation mentions the ML adjustment
+    emit_decision(DecisionRecord(
+        device_id=device.device_id,
+        device_type=device.device_type,
+        hour=current_hour,
+        time_of_day=time_of_day,
+        sensors=device.sensors,
+        new_state=device.state,
+        predicted_energy=predicted_energy,
+        action_taken=True,
+        template=explanation_id(
+            device.device_type,
+            desired,
+            ml_blocked=ml_adjusted and desired == "OFF"
+        ),
+        args=(("time_of_day", time_of_day),)
+    ))
+
+    return True
@@ -9,8 +9,38 @@ def aggregate_state(devices, current_hour: int):
         for device_id, device in devices.items()
     }
 
+    return features_from_snapshots(snapshots, current_hour, reference_ac(devices))
+
+
+def reference_ac(devices):
+    """
+    id of the home's first AC (from the registry's type index), or None.
+    """
+    first = getattr(devices, "first", None)
+    if first is not None:
+        return first("AC")
+    return next(
+        (device_id for device_id, d in devices.items() if d.device_type == "AC"),
+        None
+    )
+
+
+def features_from_snapshots(snapshots: dict, current_hour: int, ac_id=None):
+    """
+    Same feature row as aggregate_state(), built from plain snapshot
+    dicts (live or hypothetical). ac_id is the reference AC (see
+    reference_ac()); without one the snapshots are searched for it.
+    """
+    if ac_id is None:
+        ac_id = next(
+            (device_id for device_id, snap in snapshots.items()
+             if snap.get("device_type") == "AC"),
+            None
+        )
+    ac = snapshots.get(ac_id, {})
+
     # Prefer AC snapshot for environmental context
-    ref = snapshots.get("ac_1") or next(iter(snapshots.values()))
+    ref = ac or next(iter(snapshots.values()))
 
     return {
         # Time
@@ -21,8 +51,8 @@ def aggregate_state(devices, current_hour: int):
         "occupancy": ref.get("occupancy", 0),
 
         # AC state
-        "ac_power": snapshots.get("ac_1", {}).get("power") == "ON",
-        "set_temperature": snapshots.get("ac_1", {}).get("set_temperature", 0),
+        "ac_power": ac.get("power") == "ON",
+        "set_temperature": ac.get("set_temperature", 0),
 
         # Electrical load
         "total_current_load": sum(
@@ -33,3 +63,31 @@ def aggregate_state(devices, current_hour: int):
         # Energy tracking
         "cumulative_energy": ref.get("cumulative_energy", 0),
     }
+
+
+# ==============================
+# PER-ROOM FEATURES
+# ==============================
+def room_features(snapshots: dict, device_ids: list, current_hour: int):
+    """
+    Feature row for one room: the room's AC (else its first device
+    with a temperature sensor) is the environmental reference, and the
+    load is the room's own.
+    """
+    room = [snapshots[d] for d in device_ids if d in snapshots]
+
+    ac = next((snap for snap in room if snap.get("device_type") == "AC"), {})
+    ref = ac or next(
+        (snap for snap in room if "ambient_temperature" in snap),
+        room[0] if room else {}
+    )
+
+    return {
+        "hour_of_day": current_hour,
+        "ambient_temperature": ref.get("ambient_temperature", 25),
+        "occupancy": ref.get("occupancy", any(snap.get("occupancy") for snap in room)),
+        "ac_power": ac.get("power") == "ON",
+        "set_temperature": ac.get("set_temperature", 0),
+        "total_current_load": sum(snap.get("current_watts", 0) for snap in room),
+        "cumulative_energy": ref.get("cumulative_energy", 0),
+    }
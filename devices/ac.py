@@ -1,25 +1,34 @@
-print("LOADED AC FROM:", __file__)
-
-
-from devices.base import BaseDevice
+from devices.base import BaseDevice, device_rng
+from devices.capabilities import ActionSpec
 from devices.sensors import TemperatureSensor, MotionSensor
 
 
 class AC(BaseDevice):
-    def __init__(self, device_id, room):
-        super().__init__(device_id, "AC", room)
+    ACTIONS = (
+        ActionSpec("SET_TEMPERATURE", "set_temperature", int, minimum=16, maximum=30),
+    )
+
+    def __init__(self, device_id, room, seed=None):
+        super().__init__(device_id, "AC", room, seed=seed)
 
         self.state = {
             "power": "OFF",
             "set_temperature": 24
         }
 
-        self.temp_sensor = TemperatureSensor()
-        self.motion_sensor = MotionSensor()
+        self.temp_sensor = TemperatureSensor(
+            rng=device_rng(seed, device_id, "temperature")
+        )
+        self.motion_sensor = MotionSensor(
+            rng=device_rng(seed, device_id, "motion")
+        )
 
     def update_sensors(self):
-        self.sensors["ambient_temperature"] = self.temp_sensor.update()
-        self.sensors["occupancy"] = self.motion_sensor.update()
+        self.sensors = {
+            **self.sensors,
+            "ambient_temperature": self.temp_sensor.update(),
+            "occupancy": self.motion_sensor.update(),
+        }
 
     def update_state(self):
         """
@@ -28,20 +37,34 @@ class AC(BaseDevice):
         """
         pass
 
+    def estimate_watts(self, state=None, sensors=None):
+        state = self.state if state is None else state
+        sensors = self.sensors if sensors is None else sensors
+
+        if state["power"] != "ON":
+            return 0
+        delta = sensors["ambient_temperature"] - state["set_temperature"]
+        return 1200 + max(delta, 0) * 50
+
     def update_energy(self, tick_seconds=5):
-        if self.state["power"] == "ON":
-            delta = self.sensors["ambient_temperature"] - self.state["set_temperature"]
-            self.energy["current_watts"] = 1200 + max(delta, 0) * 50
-        else:
-            self.energy["current_watts"] = 0
+        super().update_energy(tick_seconds, current_watts=self.estimate_watts())
 
-        super().update_energy(tick_seconds)
-    def turn_on(self):
-        self.state["power"] = "ON"
+    def export_state(self):
+        data = super().export_state()
+        data["temp_sensor_value"] = self.temp_sensor.value
+        data["temp_sensor_rng"] = self.temp_sensor.rng.getstate()
+        data["motion_sensor_rng"] = self.motion_sensor.rng.getstate()
+        return data
 
-    def turn_off(self):
-        self.state["power"] = "OFF"
+    def restore_state(self, data: dict):
+        super().restore_state(data)
+        if "temp_sensor_value" in data:
+            self.temp_sensor.value = data["temp_sensor_value"]
+        if "temp_sensor_rng" in data:
+            self.temp_sensor.rng.setstate(data["temp_sensor_rng"])
+        if "motion_sensor_rng" in data:
+            self.motion_sensor.rng.setstate(data["motion_sensor_rng"])
 
     def set_temperature(self, value):
         if value is not None:
-            self.state["set_temperature"] = int(value)
+            self.apply_state({"set_temperature": int(value)})
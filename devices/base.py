@@ -1,13 +1,36 @@
 from datetime import datetime
 import random
 
+from devices.capabilities import ActionSpec
+
+
+def device_rng(seed, *stream):
+    """
+    Independent RNG stream for one device (and optionally one of its
+    sensors). The same seed always yields the same stream, and adding
+    or removing devices never shifts another device's stream.
+    seed=None keeps the old non-reproducible behaviour.
+    """
+    if seed is None:
+        return random.Random()
+    return random.Random(":".join(str(part) for part in (seed, *stream)))
+
 
 class BaseDevice:
-    def __init__(self, device_id, device_type, room):
+    # Actions every device supports (see devices.capabilities)
+    ACTIONS = (
+        ActionSpec("ON", "turn_on"),
+        ActionSpec("OFF", "turn_off"),
+    )
+
+    def __init__(self, device_id, device_type, room, seed=None):
         self.device_id = device_id
         self.device_type = device_type
         self.room = room
 
+        # Per-device sensor dynamics stream
+        self.rng = device_rng(seed, device_id)
+
         self.state = {}
         self.sensors = {}
         self.energy = {
@@ -18,28 +41,39 @@ class BaseDevice:
         # Manual / LLM override flag
         self.manual_override = False
 
+        # Optional callable(kwh) fed by update_energy()
+        # (storage.energy_rollups.EnergyRollups.attach)
+        self.energy_sink = None
+
+    # state / sensors / energy are copy-on-write: every update builds
+    # a new dict and swaps the reference, so a concurrent snapshot()
+    # sees either the old or the new values, never a partial update.
+
     def update_sensors(self):
         """
         Simulate realistic sensor dynamics.
         This enables Fan and Light automation to work correctly.
         """
+        sensors = dict(self.sensors)
 
         # -------- OCCUPANCY DYNAMICS --------
-        if "occupancy" in self.sensors:
+        if "occupancy" in sensors:
             # 15% chance per tick to flip occupancy
-            if random.random() < 0.15:
-                self.sensors["occupancy"] = not self.sensors["occupancy"]
+            if self.rng.random() < 0.15:
+                sensors["occupancy"] = not sensors["occupancy"]
 
         # -------- AMBIENT TEMPERATURE DRIFT --------
-        if "ambient_temperature" in self.sensors:
+        if "ambient_temperature" in sensors:
             # Small random walk
-            self.sensors["ambient_temperature"] += random.uniform(-0.3, 0.4)
+            sensors["ambient_temperature"] += self.rng.uniform(-0.3, 0.4)
 
             # Clamp to realistic bounds
-            self.sensors["ambient_temperature"] = max(
-                16.0, min(40.0, self.sensors["ambient_temperature"])
+            sensors["ambient_temperature"] = max(
+                16.0, min(40.0, sensors["ambient_temperature"])
             )
 
+        self.sensors = sensors
+
     def update_state(self):
         """
         Hook for child devices if they need side-effects
@@ -57,22 +91,64 @@ class BaseDevice:
         if manual:
             self.manual_override = True
 
-        for key, value in payload.items():
-            self.state[key] = value
+        self.state = {**self.state, **payload}
 
         self.update_state()
         return payload
 
+    def turn_on(self):
+        self.apply_state({"power": "ON"})
+
+    def turn_off(self):
+        self.apply_state({"power": "OFF"})
+
     def clear_manual_override(self):
         """
         Allows automation to resume control of this device.
         """
         self.manual_override = False
 
-    def update_energy(self, tick_seconds=5):
-        self.energy["total_kwh"] += (
-            self.energy["current_watts"] * tick_seconds
-        ) / (1000 * 3600)
+    def estimate_watts(self, state=None, sensors=None):
+        """
+        Power draw for a (possibly hypothetical) state and sensor
+        reading; used by the day-ahead planner. Subclasses override.
+        """
+        return self.energy["current_watts"]
+
+    def update_energy(self, tick_seconds=5, current_watts=None):
+        if current_watts is None:
+            current_watts = self.energy["current_watts"]
+
+        kwh = (current_watts * tick_seconds) / (1000 * 3600)
+
+        self.energy = {
+            "current_watts": current_watts,
+            "total_kwh": self.energy["total_kwh"] + kwh,
+        }
+
+        if self.energy_sink is not None:
+            self.energy_sink(kwh)
+
+    def export_state(self):
+        """
+        Plain-data copy of everything needed to resume this device
+        (used by storage.checkpoint).
+        """
+        return {
+            "state": dict(self.state),
+            "sensors": dict(self.sensors),
+            "energy": dict(self.energy),
+            "manual_override": self.manual_override,
+            "rng_state": self.rng.getstate(),
+        }
+
+    def restore_state(self, data: dict):
+        self.state = dict(data.get("state", self.state))
+        self.sensors = dict(data.get("sensors", self.sensors))
+        self.energy = dict(data.get("energy", self.energy))
+        self.manual_override = data.get("manual_override", False)
+        if "rng_state" in data:
+            self.rng.setstate(data["rng_state"])
 
     def snapshot(self):
         return {
@@ -0,0 +1,106 @@
+class ActionSpec:
+    """
+    One action a device class supports, with the schema of its value.
+
+    value_type=None means the action takes no value (ON / OFF).
+    """
+
+    __slots__ = ("name", "method", "value_type", "minimum", "maximum")
+
+    def __init__(self, name, method, value_type=None, minimum=None, maximum=None):
+        self.name = name.upper()
+        self.method = method
+        self.value_type = value_type
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def validate(self, value):
+        if self.value_type is None:
+            return None
+
+        if value is None:
+            raise ValueError(f"{self.name} requires a value")
+
+        # int(3.7) would silently truncate and bool is an int subclass:
+        # only exact integral values convert
+        mismatch = ValueError(
+            f"{self.name} expects {self.value_type.__name__}, got {value!r}"
+        )
+        if isinstance(value, bool) and self.value_type is not bool:
+            raise mismatch
+        if self.value_type is int and isinstance(value, float) and not value.is_integer():
+            raise mismatch
+
+        try:
+            value = self.value_type(value)
+        except (TypeError, ValueError, OverflowError):
+            raise mismatch
+        if value != value:      # NaN passes every range check
+            raise mismatch
+
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{self.name} must be >= {self.minimum}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{self.name} must be <= {self.maximum}")
+
+        return value
+
+    def describe(self):
+        return {
+            "action": self.name,
+            "value_type": self.value_type.__name__ if self.value_type else None,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+        }
+
+
+# ==============================
+# DISPATCH TABLES
+# ==============================
+# Device classes declare ACTIONS = (ActionSpec(...), ...). A class's
+# table merges its own ACTIONS over its bases', and is built once per
+# class: dispatch is then a dict lookup instead of an if/elif chain.
+_TABLES = {}
+
+
+def action_table(cls):
+    table = _TABLES.get(cls)
+    if table is not None:
+        return table
+
+    table = {}
+    for klass in reversed(cls.__mro__):
+        for spec in klass.__dict__.get("ACTIONS", ()):
+            table[spec.name] = (spec, getattr(cls, spec.method))
+
+    _TABLES[cls] = table
+    return table
+
+
+def supported_actions(device):
+    return [spec.describe() for spec, _ in action_table(type(device)).values()]
+
+
+def resolve(device, action: str, value=None):
+    """
+    Validate an action against the device's capabilities.
+    Returns (method, value) ready to call; raises ValueError.
+    """
+    entry = action_table(type(device)).get(action.upper())
+    if entry is None:
+        raise ValueError(f"Unsupported {device.device_type} action: {action}")
+
+    spec, method = entry
+    return method, spec.validate(value)
+
+
+def apply_resolved(device, method, value):
+    if value is None:
+        method(device)
+    else:
+        method(device, value)
+
+
+def dispatch(device, action: str, value=None):
+    method, value = resolve(device, action, value)
+    apply_resolved(device, method, value)
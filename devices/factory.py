@@ -0,0 +1,89 @@
+import csv
+import json
+
+from devices.light import Light
+from devices.fan import Fan
+from devices.ac import AC
+from devices.registry import DeviceRegistry
+
+
+# device_type (as reported by snapshot()) → class
+DEVICE_CLASSES = {
+    "Light": Light,
+    "Fan": Fan,
+    "AC": AC,
+}
+
+
+def build_device(device_type, device_id, room, seed=None):
+    cls = DEVICE_CLASSES.get(device_type)
+    if cls is None:
+        raise ValueError(f"Unknown device type: {device_type}")
+    return cls(device_id, room, seed=seed)
+
+
+# Default home layout, used when no DEVICE_INVENTORY file is given
+# (see main.py)
+DEFAULT_HOME = [
+    ("light_1", "Light", "living_room"),
+    ("fan_1", "Fan", "bedroom"),
+    ("ac_1", "AC", "living_room"),
+]
+
+
+INVENTORY_FIELDS = ("device_id", "device_type", "room")
+
+
+def build_home(layout=DEFAULT_HOME, seed=None) -> DeviceRegistry:
+    registry = DeviceRegistry()
+    for device_id, device_type, room in layout:
+        registry.add(build_device(device_type, device_id, room, seed=seed))
+    return registry
+
+
+# ==============================
+# INVENTORY FILES
+# ==============================
+def _inventory_rows(path):
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            # Line 1 is the header
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield line, row
+            return
+
+        data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("devices", [])
+        for index, row in enumerate(data):
+            yield index, row
+
+
+def load_inventory(path) -> list:
+    """
+    (device_id, device_type, room) triples from a JSON inventory (a list
+    of objects, or {"devices": [...]}) or a CSV file with a header row.
+    Raises ValueError naming the offending entry.
+    """
+    layout = []
+    seen = set()
+
+    for where, row in _inventory_rows(path):
+        if not isinstance(row, dict):
+            raise ValueError(f"{path} [{where}]: expected an object")
+
+        entry = tuple(str(row.get(field) or "").strip() for field in INVENTORY_FIELDS)
+        missing = [field for field, value in zip(INVENTORY_FIELDS, entry) if not value]
+        if missing:
+            raise ValueError(f"{path} [{where}]: missing {', '.join(missing)}")
+
+        device_id, device_type, _ = entry
+        if device_type not in DEVICE_CLASSES:
+            raise ValueError(f"{path} [{where}]: unknown device type {device_type}")
+        if device_id in seen:
+            raise ValueError(f"{path} [{where}]: duplicate device_id {device_id}")
+
+        seen.add(device_id)
+        layout.append(entry)
+
+    return layout
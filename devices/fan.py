@@ -1,9 +1,14 @@
 from devices.base import BaseDevice
+from devices.capabilities import ActionSpec
 
 
 class Fan(BaseDevice):
-    def __init__(self, device_id, room):
-        super().__init__(device_id, "Fan", room)
+    ACTIONS = (
+        ActionSpec("SET_SPEED", "set_speed", int, minimum=1, maximum=3),
+    )
+
+    def __init__(self, device_id, room, seed=None):
+        super().__init__(device_id, "Fan", room, seed=seed)
 
         # 🔑 REQUIRED FOR AUTOMATION
         self.sensors = {
@@ -15,10 +20,14 @@ class Fan(BaseDevice):
             "speed": 1
         }
 
+    def estimate_watts(self, state=None, sensors=None):
+        state = self.state if state is None else state
+        if state["power"] != "ON":
+            return 0
+        return 40 + state["speed"] * 20
+
     def update_energy(self, tick_seconds=5):
-        if self.state["power"] == "ON":
-            self.energy["current_watts"] = 40 + self.state["speed"] * 20
-        else:
-            self.energy["current_watts"] = 0
+        super().update_energy(tick_seconds, current_watts=self.estimate_watts())
 
-        super().update_energy(tick_seconds)
+    def set_speed(self, value):
+        self.apply_state({"speed": int(value)})
@@ -1,9 +1,14 @@
 from devices.base import BaseDevice
+from devices.capabilities import ActionSpec
 
 
 class Light(BaseDevice):
-    def __init__(self, device_id, room):
-        super().__init__(device_id, "Light", room)
+    ACTIONS = (
+        ActionSpec("SET_BRIGHTNESS", "set_brightness", int, minimum=0, maximum=100),
+    )
+
+    def __init__(self, device_id, room, seed=None):
+        super().__init__(device_id, "Light", room, seed=seed)
 
         # 🔑 REQUIRED FOR AUTOMATION
         self.sensors = {
@@ -11,9 +16,18 @@ class Light(BaseDevice):
         }
 
         self.state = {
-            "power": "OFF"
+            "power": "OFF",
+            "brightness": 100
         }
 
+    def estimate_watts(self, state=None, sensors=None):
+        state = self.state if state is None else state
+        if state["power"] != "ON":
+            return 0
+        return 10 * state.get("brightness", 100) / 100
+
     def update_energy(self, tick_seconds=5):
-        self.energy["current_watts"] = 10 if self.state["power"] == "ON" else 0
-        super().update_energy(tick_seconds)
+        super().update_energy(tick_seconds, current_watts=self.estimate_watts())
+
+    def set_brightness(self, value):
+        self.apply_state({"brightness": int(value)})
@@ -0,0 +1,129 @@
+class DeviceRegistry(dict):
+    """
+    device_id → device, plus indexes by room, by type and by
+    (room, type) kept up to date on every insert / removal.
+
+    Still a plain dict to every existing caller (items(), get(), [...]);
+    lookups by room or type read an index instead of scanning. Every
+    dict mutator goes through __setitem__ / __delitem__ (or resets the
+    indexes), so they can't drift from the contents.
+    Index lists are in insertion order.
+    """
+
+    def __init__(self, devices=()):
+        super().__init__()
+        self.by_room = {}
+        self.by_type = {}
+        self.by_room_type = {}
+
+        items = devices.values() if isinstance(devices, dict) else devices
+        for device in items:
+            self.add(device)
+
+    # ==============================
+    # MUTATION (INDEX MAINTENANCE)
+    # ==============================
+    def add(self, device):
+        if device.device_id in self:
+            raise ValueError(f"Duplicate device_id: {device.device_id}")
+        self[device.device_id] = device
+        return device
+
+    def __setitem__(self, device_id, device):
+        if device_id in self:
+            self._unindex(self[device_id])
+        super().__setitem__(device_id, device)
+        self._index(device)
+
+    def __delitem__(self, device_id):
+        self._unindex(self[device_id])
+        super().__delitem__(device_id)
+
+    def pop(self, device_id, *default):
+        if device_id not in self:
+            return super().pop(device_id, *default)
+        device = self[device_id]
+        del self[device_id]
+        return device
+
+    def update(self, *args, **kwargs):
+        for device_id, device in dict(*args, **kwargs).items():
+            self[device_id] = device
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def setdefault(self, device_id, device=None):
+        if device_id not in self:
+            self[device_id] = device
+        return self[device_id]
+
+    def popitem(self):
+        if not self:
+            raise KeyError("popitem(): registry is empty")
+        device_id = next(reversed(self))
+        return device_id, self.pop(device_id)
+
+    def clear(self):
+        super().clear()
+        self.by_room.clear()
+        self.by_type.clear()
+        self.by_room_type.clear()
+
+    def _index(self, device):
+        key = (device.room, device.device_type)
+        self.by_room.setdefault(device.room, []).append(device.device_id)
+        self.by_type.setdefault(device.device_type, []).append(device.device_id)
+        self.by_room_type.setdefault(key, []).append(device.device_id)
+
+    def _unindex(self, device):
+        key = (device.room, device.device_type)
+        for index, value in (
+            (self.by_room, device.room),
+            (self.by_type, device.device_type),
+            (self.by_room_type, key),
+        ):
+            ids = index[value]
+            ids.remove(device.device_id)
+            if not ids:
+                del index[value]
+
+    # ==============================
+    # LOOKUPS
+    # ==============================
+    def _ids(self, room=None, device_type=None):
+        # The index list itself: read-only use inside the registry
+        if room is not None and device_type is not None:
+            return self.by_room_type.get((room, device_type), ())
+        if room is not None:
+            return self.by_room.get(room, ())
+        if device_type is not None:
+            return self.by_type.get(device_type, ())
+        return self
+
+    def ids(self, room=None, device_type=None) -> list:
+        """
+        Device ids in a room, of a type, or both (all ids if neither).
+        A copy: changing it can't corrupt the indexes.
+        """
+        return list(self._ids(room, device_type))
+
+    def select(self, room=None, device_type=None) -> list:
+        return [self[device_id] for device_id in self._ids(room, device_type)]
+
+    def first(self, device_type, room=None):
+        """
+        id of the first device of a type (optionally in a room), or None.
+        """
+        ids = self._ids(room, device_type)
+        return ids[0] if ids else None
+
+    def rooms(self) -> dict:
+        """
+        room → {device_type: count}
+        """
+        summary = {room: {} for room in self.by_room}
+        for (room, device_type), ids in self.by_room_type.items():
+            summary[room][device_type] = len(ids)
+        return summary
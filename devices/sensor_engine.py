@@ -0,0 +1,321 @@
+import zlib
+
+import numpy as np
+
+
+# ==============================
+# SENSOR MODELS
+# ==============================
+# A model describes one sensor of one device. Models of the same class
+# are simulated together: their parameters are stacked into arrays and
+# each block of ticks is generated with whole-array NumPy operations.
+#
+# generate(models, draws, hours, state) → (values, state)
+#   draws  (B, N) random numbers for the block (kind = cls.draws)
+#   hours  (B,)   simulated hour of each tick in the block
+#   state  (N,)   model carry-over between blocks
+
+class DiurnalTemperature:
+    """
+    Daily temperature curve (warmest at peak_hour) plus AR(1) noise,
+    clamped to [low, high].
+    """
+
+    sensor = "ambient_temperature"
+    draws = "normal"
+
+    def __init__(self, mean=27.0, amplitude=3.0, peak_hour=15, noise=0.3,
+                 persistence=0.8, low=16.0, high=40.0):
+        self.mean = mean
+        self.amplitude = amplitude
+        self.peak_hour = peak_hour
+        self.noise = noise
+        self.persistence = persistence
+        self.low = low
+        self.high = high
+
+    def initial_state(self):
+        return 0.0
+
+    def expected(self, hour):
+        return self.mean + self.amplitude * np.cos(2 * np.pi * (hour - self.peak_hour) / 24)
+
+    @classmethod
+    def generate(cls, models, draws, hours, state):
+        mean = np.array([m.mean for m in models])
+        amplitude = np.array([m.amplitude for m in models])
+        peak = np.array([m.peak_hour for m in models])
+        noise = np.array([m.noise for m in models])
+        persistence = np.array([m.persistence for m in models])
+        low = np.array([m.low for m in models])
+        high = np.array([m.high for m in models])
+
+        residual = np.empty_like(draws)
+        carry = state
+        for t in range(len(draws)):
+            carry = persistence * carry + noise * draws[t]
+            residual[t] = carry
+
+        base = mean + amplitude * np.cos(2 * np.pi * (hours[:, None] - peak) / 24)
+        values = np.round(np.clip(base + residual, low, high), 2)
+        return values, carry
+
+
+class RandomWalkTemperature:
+    """
+    The original sensor behaviour (uniform step per tick), but
+    bounded to [low, high].
+    """
+
+    sensor = "ambient_temperature"
+    draws = "uniform"
+
+    def __init__(self, start=28.0, step_low=-0.3, step_high=0.4, low=16.0, high=40.0):
+        self.start = start
+        self.step_low = step_low
+        self.step_high = step_high
+        self.low = low
+        self.high = high
+
+    def initial_state(self):
+        return self.start
+
+    @classmethod
+    def generate(cls, models, draws, hours, state):
+        step_low = np.array([m.step_low for m in models])
+        step_span = np.array([m.step_high - m.step_low for m in models])
+        low = np.array([m.low for m in models])
+        high = np.array([m.high for m in models])
+
+        values = np.empty_like(draws)
+        value = state
+        for t in range(len(draws)):
+            value = np.clip(value + step_low + step_span * draws[t], low, high)
+            values[t] = value
+
+        return np.round(values, 2), value
+
+
+class OccupancyMarkov:
+    """
+    Two-state occupancy chain. p_arrive / p_leave are per-tick
+    transition probabilities: a scalar, or 24 values (one per hour)
+    for a daily routine.
+    """
+
+    sensor = "occupancy"
+    draws = "uniform"
+
+    def __init__(self, p_arrive=0.15, p_leave=0.15, initial=False):
+        self.p_arrive = np.broadcast_to(np.asarray(p_arrive, dtype=float), (24,))
+        self.p_leave = np.broadcast_to(np.asarray(p_leave, dtype=float), (24,))
+        self.initial = initial
+
+    def initial_state(self):
+        return bool(self.initial)
+
+    def expected(self, hour):
+        # Stationary occupancy probability at this hour's rates
+        arrive, leave = self.p_arrive[hour], self.p_leave[hour]
+        return arrive / (arrive + leave) if arrive + leave else float(self.initial)
+
+    @classmethod
+    def generate(cls, models, draws, hours, state):
+        p_arrive = np.stack([m.p_arrive for m in models], axis=1)   # (24, N)
+        p_leave = np.stack([m.p_leave for m in models], axis=1)
+
+        values = np.empty(draws.shape, dtype=bool)
+        occupied = state.astype(bool)
+        for t in range(len(draws)):
+            hour = hours[t]
+            flip = np.where(occupied, draws[t] < p_leave[hour], draws[t] < p_arrive[hour])
+            occupied = occupied ^ flip
+            values[t] = occupied
+
+        return values, occupied
+
+
+def default_models(device):
+    """
+    Sensor models matching each device type's built-in sensors.
+    """
+    if device.device_type == "AC":
+        return [
+            DiurnalTemperature(),
+            # At home mostly in the evening and at night
+            OccupancyMarkov(
+                p_arrive=[0.3] * 7 + [0.1] * 10 + [0.4] * 7,
+                p_leave=[0.1] * 7 + [0.4] * 10 + [0.1] * 7,
+            ),
+        ]
+    if "occupancy" in device.sensors:
+        return [OccupancyMarkov()]
+    return []
+
+
+# ==============================
+# SENSOR ENGINE
+# ==============================
+def _device_seed(seed, device_id):
+    if seed is None:
+        return None
+    return [zlib.crc32(str(seed).encode()), zlib.crc32(device_id.encode())]
+
+
+class SensorEngine:
+    """
+    Sensor source for SimulatorEngine.
+
+    Pre-generates `block_size` ticks of samples for every registered
+    sensor at once, then each tick only copies one row of the buffers
+    into the devices' sensors. Every device has its own NumPy
+    Generator, so streams are reproducible per device and independent
+    of which other devices exist.
+    """
+
+    def __init__(self, seed=None, block_size=256):
+        self.seed = seed
+        self.block_size = block_size
+
+        self._devices = {}      # device_id → [model, ...]
+        self._rngs = {}         # device_id → np.random.Generator
+        self._groups = None     # (model class, sensor) → group dict
+        self._state = {}        # (device_id, sensor) → model carry-over
+
+        self._block = None
+        self._position = 0
+        self._block_hour = None
+        self._block_rng_states = None
+        self._block_model_state = None
+
+    @classmethod
+    def for_devices(cls, devices, seed=None, block_size=256):
+        engine = cls(seed=seed, block_size=block_size)
+        for device_id, device in devices.items():
+            engine.add(device_id, default_models(device))
+        return engine
+
+    def add(self, device_id, models):
+        self._devices[device_id] = list(models)
+        self._rngs[device_id] = np.random.default_rng(_device_seed(self.seed, device_id))
+        for model in models:
+            self._state[(device_id, model.sensor)] = model.initial_state()
+
+        # Layout changed → regroup and regenerate from the current tick
+        self._groups = None
+        self._block = None
+
+    def models(self, device_id):
+        return self._devices.get(device_id, [])
+
+    def _build_groups(self):
+        groups = {}
+        for device_id, models in self._devices.items():
+            for model in models:
+                group = groups.setdefault(
+                    (type(model), model.sensor),
+                    {"devices": [], "models": []}
+                )
+                group["devices"].append(device_id)
+                group["models"].append(model)
+        self._groups = groups
+
+    def _generate(self, hour):
+        if self._groups is None:
+            self._build_groups()
+
+        size = self.block_size
+        hours = (hour + np.arange(size)) % 24
+
+        self._block_hour = hour
+        self._block_rng_states = {
+            device_id: rng.bit_generator.state
+            for device_id, rng in self._rngs.items()
+        }
+        self._block_model_state = dict(self._state)
+
+        # Per-device draws (one call per device per block), in a fixed
+        # per-device order so each stream only depends on its device
+        draws = {}
+        for device_id, models in self._devices.items():
+            rng = self._rngs[device_id]
+            for model in models:
+                if model.draws == "normal":
+                    draws[(device_id, model.sensor)] = rng.standard_normal(size)
+                else:
+                    draws[(device_id, model.sensor)] = rng.random(size)
+
+        block = {}
+        for (model_cls, sensor), group in self._groups.items():
+            keys = [(device_id, sensor) for device_id in group["devices"]]
+            stacked = np.stack([draws[key] for key in keys], axis=1)
+            state = np.array([self._state[key] for key in keys])
+
+            values, state = model_cls.generate(group["models"], stacked, hours, state)
+
+            for key, carry in zip(keys, state.tolist()):
+                self._state[key] = carry
+            block[(model_cls, sensor)] = (group["devices"], values.tolist())
+
+        self._block = block
+        self._position = 0
+
+    def apply(self, devices, hour=None):
+        hour = 0 if hour is None else hour
+
+        expected = (
+            None if self._block is None
+            else (self._block_hour + self._position) % 24
+        )
+        if self._block is None or self._position >= self.block_size or expected != hour:
+            self._generate(hour)
+
+        updates = {}
+        for (_, sensor), (device_ids, rows) in self._block.items():
+            row = rows[self._position]
+            for device_id, value in zip(device_ids, row):
+                updates.setdefault(device_id, {})[sensor] = value
+
+        for device_id, sensors in updates.items():
+            device = devices.get(device_id)
+            if device is not None:
+                device.sensors = {**device.sensors, **sensors}
+
+        self._position += 1
+
+    # ==============================
+    # CHECKPOINT SUPPORT
+    # ==============================
+    def export_state(self):
+        """
+        Generator and model state at the start of the current block
+        plus the position in it; restoring regenerates the same block.
+        """
+        if self._block is None:
+            return {
+                "rngs": {d: r.bit_generator.state for d, r in self._rngs.items()},
+                "models": dict(self._state),
+                "hour": None,
+                "position": 0,
+            }
+        return {
+            "rngs": self._block_rng_states,
+            "models": self._block_model_state,
+            "hour": self._block_hour,
+            "position": self._position,
+        }
+
+    def restore_state(self, data):
+        for device_id, rng_state in data["rngs"].items():
+            if device_id in self._rngs:
+                self._rngs[device_id].bit_generator.state = rng_state
+
+        self._state.update({
+            key: value for key, value in data["models"].items()
+            if key in self._state
+        })
+        self._block = None
+
+        if data["hour"] is not None:
+            self._generate(data["hour"])
+            self._position = data["position"]
@@ -1,13 +1,20 @@
 import random
 
 class TemperatureSensor:
-    def __init__(self, value=28.0):
+    def __init__(self, value=28.0, rng=None, low=16.0, high=40.0):
         self.value = value
+        self.rng = rng or random.Random()
+        self.low = low
+        self.high = high
 
     def update(self):
-        self.value += random.uniform(-0.3, 0.4)
+        self.value += self.rng.uniform(-0.3, 0.4)
+        self.value = max(self.low, min(self.high, self.value))
         return round(self.value, 2)
 
 class MotionSensor:
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+
     def update(self):
-        return random.choice([True, False])
+        return self.rng.choice([True, False])
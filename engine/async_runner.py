@@ -0,0 +1,179 @@
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from automation import decision_emitter
+from engine.simulator_loop import ControlMode, SimulatorEngine, fetch_llm_actions_async
+from engine.logging_setup import get_logger
+
+log = get_logger("simulator")
+events_log = get_logger("events")
+
+
+# ==============================
+# CONFIG (ENV)
+# ==============================
+# ENGINE_MODE=async runs the tick loop as an asyncio task in the app
+# lifespan instead of a daemon thread (see main.py)
+ENGINE_MODE = os.getenv("ENGINE_MODE", "thread")
+
+# Automation events waiting to be POSTed before new ones are dropped
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "1000"))
+
+# How long shutdown waits for queued events to go out
+EVENT_FLUSH_SECONDS = 2.0
+
+
+class AsyncEngineRunner:
+    """
+    Drives a SimulatorEngine from the event loop.
+
+    The tick itself (prediction, rule passes, device updates) and
+    command drains run in a one-thread executor, so the loop never
+    blocks on CPU work and devices keep a single writer. LLM fetches
+    and automation-event delivery use one shared httpx.AsyncClient.
+    """
+
+    def __init__(self, engine: SimulatorEngine, startup_delay: float = 1.0):
+        self.engine = engine
+        self.startup_delay = startup_delay
+
+        self._executor = None
+        self._client = None
+        self._wakeup = None
+        self._events = None
+        self._tasks = []
+        self.events_dropped = 0
+
+    # ==============================
+    # LIFECYCLE
+    # ==============================
+    def start(self):
+        """
+        Must be called from the running event loop (app lifespan).
+        """
+        with SimulatorEngine._start_lock:
+            if SimulatorEngine._started:
+                return
+            SimulatorEngine._started = True
+
+        loop = asyncio.get_running_loop()
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="simulator")
+        self._client = httpx.AsyncClient()
+        self._wakeup = asyncio.Event()
+        self._events = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+        # API threads submitting commands wake the loop between ticks
+        self.engine.commands.on_submit = lambda: loop.call_soon_threadsafe(self._wakeup.set)
+        decision_emitter.set_event_deliverer(
+            lambda payload: loop.call_soon_threadsafe(self._enqueue_event, payload)
+        )
+
+        self.engine.running = True
+        self._tasks = [
+            asyncio.create_task(self._run(), name="simulator-loop"),
+            asyncio.create_task(self._deliver_events(), name="event-delivery"),
+        ]
+
+    async def stop(self):
+        """
+        Finish the in-flight tick, flush queued events, close clients.
+        """
+        if not self._tasks:
+            return
+
+        self.engine.running = False
+        self._wakeup.set()
+
+        loop_task, delivery_task = self._tasks
+        await loop_task
+
+        decision_emitter.set_event_deliverer(None)
+        self.engine.commands.on_submit = None
+
+        try:
+            await asyncio.wait_for(self._events.join(), EVENT_FLUSH_SECONDS)
+        except asyncio.TimeoutError:
+            events_log.warning("dropping %s undelivered automation events", self._events.qsize())
+        delivery_task.cancel()
+        await asyncio.gather(delivery_task, return_exceptions=True)
+
+        await self._client.aclose()
+        self._executor.shutdown(wait=True)
+        self._tasks = []
+
+        with SimulatorEngine._start_lock:
+            SimulatorEngine._started = False
+
+    # ==============================
+    # MAIN LOOP
+    # ==============================
+    async def _offload(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+
+    async def _run(self):
+        engine = self.engine
+        await asyncio.sleep(self.startup_delay)  # allow app + ML to initialize
+
+        while engine.running:
+            started = time.monotonic()
+
+            llm_payload = None
+            if engine.mode == ControlMode.MANUAL:
+                llm_payload = await fetch_llm_actions_async(self._client)
+
+            try:
+                await self._offload(engine.tick, llm_payload=llm_payload)
+            except Exception:
+                log.exception("tick failed")
+            engine.tick_timings.append((started, time.monotonic() - started))
+
+            # Between ticks, wake up for queued commands instead of
+            # sleeping through them
+            deadline = time.monotonic() + engine.tick_seconds
+            while engine.running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wakeup.clear()
+                if not len(engine.commands):
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                await self._offload(engine.drain_commands)
+
+        # Commands accepted before shutdown still get applied
+        await self._offload(engine.drain_commands)
+
+    # ==============================
+    # EVENT DELIVERY
+    # ==============================
+    def _enqueue_event(self, payload):
+        try:
+            self._events.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.events_dropped += 1
+            events_log.warning(
+                "automation event queue full, dropping event",
+                extra={"rate_key": "delivery"}
+            )
+
+    async def _deliver_events(self):
+        url = f"{decision_emitter.BASE_URL}/automation-events"
+        while True:
+            payload = await self._events.get()
+            try:
+                await self._client.post(url, json=payload, timeout=2)
+            except Exception as e:
+                events_log.warning(
+                    "automation event not delivered: %s", e,
+                    extra={"rate_key": "delivery"}
+                )
+            finally:
+                self._events.task_done()
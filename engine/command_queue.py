@@ -0,0 +1,81 @@
+import threading
+from collections import deque
+
+from automation.log_store import add_log
+
+
+class CommandQueue:
+    """
+    Mutations submitted by API threads, applied by the single writer.
+
+    Producers only append a (seq, label, fn) tuple and return; the
+    engine drains the queue at fixed points of its loop, so device
+    objects are only ever mutated from one thread at a time.
+    """
+
+    def __init__(self):
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._drain_lock = threading.Lock()
+        self._seq_lock = threading.Lock()
+
+        self.submitted = 0
+        self.applied = 0
+
+        # Optional extra wakeup for an asyncio-driven engine
+        # (engine.async_runner); called from the submitting thread
+        self.on_submit = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def submit(self, label: str, fn) -> int:
+        with self._seq_lock:
+            self.submitted += 1
+            seq = self.submitted
+
+        self._pending.append((seq, label, fn))
+        self._wakeup.set()
+        if self.on_submit is not None:
+            self.on_submit()
+        return seq
+
+    def wake(self):
+        """
+        End a pending wait() early (shutdown).
+        """
+        self._wakeup.set()
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Block until something is submitted or the timeout expires.
+        """
+        woke = self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        return woke
+
+    def drain(self) -> int:
+        """
+        Apply every queued mutation in submission order.
+        Returns how many were applied.
+        """
+        count = 0
+
+        with self._drain_lock:
+            while self._pending:
+                seq, label, fn = self._pending.popleft()
+
+                try:
+                    fn()
+                except Exception as e:
+                    add_log({
+                        "type": "command_error",
+                        "seq": seq,
+                        "command": label,
+                        "error": str(e)
+                    })
+
+                self.applied = seq
+                count += 1
+
+        return count
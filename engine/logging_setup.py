@@ -0,0 +1,230 @@
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+
+# ==============================
+# CONFIG (ENV)
+# ==============================
+# LOG_LEVEL       default level for every subsystem (or OFF)
+# LOG_LEVELS      per-subsystem overrides, e.g. "automation=WARNING,ml=OFF"
+# LOG_FORMAT      json (default) or text
+# LOG_RATE_LIMIT  "<lines>/<seconds>" per rate key, e.g. "5/60"; 0 disables
+# LOG_QUEUE_SIZE  records buffered for the writer thread before dropping
+
+ROOT_LOGGER = "smart_home"
+
+SUBSYSTEMS = ("simulator", "automation", "ml", "devices", "events")
+
+# Above CRITICAL: isEnabledFor() is False for every call, so nothing
+# is built, formatted or queued
+OFF = logging.CRITICAL + 10
+logging.addLevelName(OFF, "OFF")
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{subsystem}")
+
+
+def _level(name):
+    name = name.strip().upper()
+    if name == "OFF":
+        return OFF
+    level = logging.getLevelName(name)
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level: {name}")
+    return level
+
+
+def _parse_levels(value):
+    levels = {}
+    for part in (value or "").split(","):
+        if "=" in part:
+            subsystem, _, level = part.partition("=")
+            levels[subsystem.strip()] = _level(level)
+    return levels
+
+
+def _parse_rate(value):
+    if not value or value.strip() == "0":
+        return None
+    lines, _, seconds = value.partition("/")
+    return int(lines), float(seconds or 60)
+
+
+# ==============================
+# FORMATTING (WRITER THREAD)
+# ==============================
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: ts, level, subsystem, msg plus any
+    fields passed as extra={"fields": {...}}.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "subsystem": record.name.rpartition(".")[2],
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+
+    def format(self, record):
+        line = f"[{record.name.rpartition('.')[2].upper()}] {record.getMessage()}"
+
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " | " + " | ".join(f"{k}={v}" for k, v in fields.items())
+
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            line += f" (+{suppressed} suppressed)"
+
+        return line
+
+
+# ==============================
+# RATE LIMITING (TICK THREAD)
+# ==============================
+class RateLimitFilter(logging.Filter):
+    """
+    At most `lines` records per `seconds` for each rate key
+    (extra={"rate_key": ...}); records without a key pass. The next
+    record let through carries how many were dropped in between.
+    """
+
+    def __init__(self, lines: int, seconds: float):
+        super().__init__()
+        self.lines = lines
+        self.seconds = seconds
+        self._windows = {}      # key → [window start, count, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, "rate_key", None)
+        if key is None:
+            return True
+
+        key = (record.name, record.msg, key)
+        now = time.monotonic()
+
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.seconds:
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                record.suppressed = suppressed
+                return True
+
+            if window[1] < self.lines:
+                window[1] += 1
+                record.suppressed, window[2] = window[2], 0
+                return True
+
+            window[2] += 1
+            return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to the writer thread without formatting them and
+    without ever blocking the caller: when the queue is full the
+    record is dropped and counted.
+    """
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens in the listener thread. Callers pass
+        # scalar args, so the record is safe to hand over as-is.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# ==============================
+# SETUP
+# ==============================
+_listener = None
+_handler = None
+
+
+def configure_logging(stream=None):
+    """
+    Route every subsystem logger through a bounded queue to a
+    background writer. Safe to call more than once.
+    """
+    global _listener, _handler
+
+    if _listener is not None:
+        return _handler
+
+    default = _level(os.getenv("LOG_LEVEL", "INFO"))
+    overrides = _parse_levels(os.getenv("LOG_LEVELS"))
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(default)
+    root.propagate = False
+
+    for subsystem in set(SUBSYSTEMS) | set(overrides):
+        get_logger(subsystem).setLevel(overrides.get(subsystem, default))
+
+    formatter = (
+        TextFormatter() if os.getenv("LOG_FORMAT", "json") == "text"
+        else JsonFormatter()
+    )
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(formatter)
+
+    _handler = DroppingQueueHandler(
+        queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    )
+
+    rate = _parse_rate(os.getenv("LOG_RATE_LIMIT", "5/60"))
+    if rate:
+        _handler.addFilter(RateLimitFilter(*rate))
+
+    root.addHandler(_handler)
+
+    _listener = QueueListener(_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _handler
+
+
+def shutdown_logging():
+    """
+    Flush queued records and stop the writer thread.
+    """
+    global _listener, _handler
+
+    if _listener is None:
+        return
+
+    _listener.stop()
+    logging.getLogger(ROOT_LOGGER).removeHandler(_handler)
+    _listener = None
+    _handler = None
@@ -0,0 +1,286 @@
+from automation.rules import desired_power
+from automation.state_utils import features_from_snapshots, reference_ac
+
+
+# Per-hour plan variants, cheapest last; the budget pass steps hours
+# down this list until the projected total fits
+COMFORT, ECO, AC_OFF = 0, 1, 2
+LEVELS = ("comfort", "eco", "ac_off")
+
+
+class Plan:
+    """
+    Hourly device payloads for the next `horizon` simulated hours,
+    with the sensor values they were planned against.
+    """
+
+    def __init__(self, start_day, start_hour, steps, energy_budget):
+        self.start_day = start_day
+        self.start_hour = start_hour
+        self.steps = steps
+        self.energy_budget = energy_budget
+
+    @property
+    def predicted_total(self):
+        return sum(step["predicted_energy"] for step in self.steps)
+
+    def step(self, day, hour):
+        """
+        The step for (day, hour), or None once the plan has run out.
+        """
+        offset = (day - self.start_day) * 24 + hour - self.start_hour
+        if 0 <= offset < len(self.steps):
+            return self.steps[offset]
+        return None
+
+    def to_dict(self):
+        return {
+            "start_day": self.start_day,
+            "start_hour": self.start_hour,
+            "energy_budget": self.energy_budget,
+            "predicted_total": round(self.predicted_total, 3),
+            "steps": [
+                {
+                    "day": step["day"],
+                    "hour": step["hour"],
+                    "level": LEVELS[step["level"]],
+                    "predicted_energy": round(step["predicted_energy"], 3),
+                    "actions": step["actions"],
+                }
+                for step in self.steps
+            ],
+        }
+
+
+class DayAheadPlanner:
+    """
+    Projects sensor readings for the next `horizon` hours (the sensor
+    source's expected() curves, else the current reading), derives each
+    device's power from the automation policy, and scores every hour's
+    comfort / eco / AC-off variant in ONE predict_many call. Hours are
+    then stepped down greedily, biggest saving first, until the
+    projected total fits `energy_budget`.
+    """
+
+    def __init__(self, predictor, sensor_source=None, horizon=24,
+                 energy_budget=None, temp_tolerance=1.5, eco_delta=2):
+        self.predictor = predictor
+        self.sensor_source = sensor_source
+        self.horizon = horizon
+        self.energy_budget = energy_budget
+        self.temp_tolerance = temp_tolerance
+        self.eco_delta = eco_delta
+
+        # Planned setpoints are written to the live state, so comfort /
+        # eco are derived from a remembered baseline, never from the
+        # (possibly already raised) live value
+        self.comfort_setpoints = {}     # device_id → comfort setpoint
+        self._handed_out = {}           # device_id → setpoint resolve() last returned
+
+    # ==============================
+    # COMFORT BASELINE
+    # ==============================
+    def comfort_setpoint(self, device):
+        """
+        The setpoint comfort plans return to. Re-taken from the live
+        state unless that still holds what the plan last handed out,
+        so a command (or another mode) changing it moves the baseline.
+        """
+        device_id = device.device_id
+        live = device.state.get("set_temperature")
+
+        handed_out = self._handed_out.get(device_id)
+        if handed_out is None or live != handed_out:
+            self.comfort_setpoints[device_id] = live
+            self._handed_out.pop(device_id, None)
+
+        return self.comfort_setpoints[device_id]
+
+    def export_state(self):
+        return {
+            "comfort_setpoints": dict(self.comfort_setpoints),
+            "handed_out": dict(self._handed_out),
+        }
+
+    def restore_state(self, data: dict):
+        self.comfort_setpoints = dict(data.get("comfort_setpoints", {}))
+        self._handed_out = dict(data.get("handed_out", {}))
+
+    # ==============================
+    # PROJECTION
+    # ==============================
+    def _expected_sensors(self, device, hour, offset):
+        sensors = dict(device.sensors)
+        if offset == 0 or self.sensor_source is None:
+            return sensors
+
+        models = getattr(self.sensor_source, "models", lambda _: [])(device.device_id)
+        for model in models:
+            expected = getattr(model, "expected", None)
+            if expected is None or model.sensor not in sensors:
+                continue
+            value = expected(hour)
+            if model.sensor == "occupancy":
+                sensors["occupancy"] = bool(value >= 0.5)
+            else:
+                sensors[model.sensor] = round(float(value), 2)
+
+        return sensors
+
+    def _variant_state(self, device, power, level, setpoint):
+        state = {**device.state, "power": power}
+        if setpoint is not None:
+            state["set_temperature"] = setpoint
+        if device.device_type != "AC" or power != "ON":
+            return state
+        if level == AC_OFF:
+            return {**state, "power": "OFF"}
+        if level == ECO:
+            return {**state, "set_temperature": min(setpoint + self.eco_delta, 30)}
+        return state
+
+    # ==============================
+    # PLANNING
+    # ==============================
+    def plan(self, devices, day, hour) -> Plan:
+        snapshots = {
+            device_id: device.snapshot()
+            for device_id, device in devices.items()
+        }
+        power = {
+            device_id: device.state.get("power")
+            for device_id, device in devices.items()
+        }
+        ac_id = reference_ac(devices)
+        setpoints = {
+            device_id: self.comfort_setpoint(device)
+            for device_id, device in devices.items()
+            if "set_temperature" in device.state
+        }
+
+        hours = []
+        rows = []
+        for offset in range(self.horizon):
+            h = (hour + offset) % 24
+            d = day + (hour + offset) // 24
+
+            sensors = {}
+            for device_id, device in devices.items():
+                sensors[device_id] = self._expected_sensors(device, h, offset)
+                desired, _ = desired_power(device.device_type, sensors[device_id], h)
+                if desired is not None:
+                    power[device_id] = desired
+
+            variants = []
+            for level in (COMFORT, ECO, AC_OFF):
+                states = {
+                    device_id: self._variant_state(
+                        device, power[device_id], level, setpoints.get(device_id)
+                    )
+                    for device_id, device in devices.items()
+                }
+                projected = {
+                    device_id: {
+                        **snapshots[device_id],
+                        **sensors[device_id],
+                        **states[device_id],
+                        "current_watts": device.estimate_watts(states[device_id], sensors[device_id]),
+                    }
+                    for device_id, device in devices.items()
+                }
+                rows.append(features_from_snapshots(projected, h, ac_id))
+                variants.append(states)
+
+            hours.append((d, h, sensors, variants))
+
+        # One vectorized model call for the whole horizon
+        scores = self.predictor.predict_many(rows)
+        predicted = [scores[i * 3:(i + 1) * 3] for i in range(self.horizon)]
+
+        levels = self._fit_budget(predicted)
+
+        steps = []
+        for (d, h, sensors, variants), level, scored in zip(hours, levels, predicted):
+            states = variants[level]
+            steps.append({
+                "day": d,
+                "hour": h,
+                "level": level,
+                "predicted_energy": scored[level],
+                "expected": sensors,
+                "actions": {
+                    device_id: {
+                        key: state[key]
+                        for key in ("power", "set_temperature")
+                        if key in state
+                    }
+                    for device_id, state in states.items()
+                },
+            })
+
+        return Plan(day, hour, steps, self.energy_budget)
+
+    def _fit_budget(self, predicted):
+        levels = [COMFORT] * len(predicted)
+        if self.energy_budget is None:
+            return levels
+
+        total = sum(scored[COMFORT] for scored in predicted)
+        while total > self.energy_budget:
+            best, saving = None, 0.0
+            for i, scored in enumerate(predicted):
+                if levels[i] < AC_OFF:
+                    gain = scored[levels[i]] - scored[levels[i] + 1]
+                    if gain > saving:
+                        best, saving = i, gain
+            if best is None:
+                break   # nothing left that saves energy
+            levels[best] += 1
+            total -= saving
+
+        return levels
+
+    # ==============================
+    # EXECUTION (EVERY TICK)
+    # ==============================
+    def deviates(self, step, devices) -> bool:
+        """
+        True when live temperatures have drifted more than the
+        tolerance from what the step was planned against (or the
+        device set changed). Occupancy flips don't need a replan:
+        they are resolved per tick by resolve().
+        """
+        for device_id, device in devices.items():
+            expected = step["expected"].get(device_id)
+            if expected is None:
+                return True
+
+            actual = device.sensors.get("ambient_temperature")
+            planned = expected.get("ambient_temperature")
+            if actual is not None and planned is not None:
+                if abs(actual - planned) > self.temp_tolerance:
+                    return True
+
+        return False
+
+    def resolve(self, step, device):
+        """
+        Payload to apply to `device` this hour: the planned setpoint and
+        budget level, with on/off re-derived from the live sensors by
+        the automation policy (no model call).
+        """
+        planned = step["actions"].get(device.device_id)
+        if planned is None:
+            return None
+
+        desired, _ = desired_power(device.device_type, device.sensors, step["hour"])
+        power = planned["power"] if desired is None else desired
+
+        # Budget steps keep the AC off regardless of comfort
+        if device.device_type == "AC" and step["level"] == AC_OFF:
+            power = "OFF"
+
+        if "set_temperature" in planned:
+            self._handed_out[device.device_id] = planned["set_temperature"]
+
+        return {**planned, "power": power}
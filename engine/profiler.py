@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+
+# Off unless explicitly enabled; nothing is installed or running
+# until a profile is requested.
+PROFILER_ENABLED = os.getenv("ENABLE_PROFILER", "0") == "1"
+
+MAX_PROFILE_SECONDS = 60
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(ROOT):
+        filename = os.path.relpath(filename, ROOT)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def _thread_group(name):
+    # Sync routes run in AnyIO's worker pool, async ones on the loop
+    # (the asyncio engine ticks in a "simulator_0" executor thread)
+    if name == "simulator" or name.startswith("simulator_"):
+        return "simulator"
+    if name.startswith("AnyIO worker") or name == "MainThread":
+        return "api"
+    return "other"
+
+
+class SamplingProfiler:
+    """
+    Time-boxed wall-clock sampler over sys._current_frames().
+
+    A short-lived thread snapshots every thread's stack at a fixed
+    interval; profiled threads are never paused or instrumented, so
+    the tick keeps running at full speed while it is observed.
+    """
+
+    def __init__(self):
+        self._busy = threading.Lock()
+
+    @property
+    def active(self):
+        return self._busy.locked()
+
+    def profile(self, seconds=5.0, interval=0.005, threads="all", top=25):
+        """
+        Sample for `seconds`, then return a top-N function table and
+        flamegraph-compatible collapsed stacks. threads: "all",
+        "simulator" or "api". Raises RuntimeError if already running.
+        """
+        seconds = min(max(float(seconds), 0.1), MAX_PROFILE_SECONDS)
+
+        if not self._busy.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+
+        try:
+            stacks, samples = self._sample(seconds, interval, threads)
+        finally:
+            self._busy.release()
+
+        return self._aggregate(stacks, samples, seconds, interval, top)
+
+    def _sample(self, seconds, interval, threads):
+        stacks = Counter()
+        samples = 0
+        me = threading.get_ident()
+        deadline = time.perf_counter() + seconds
+
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+
+                name = names.get(ident, str(ident))
+                if threads != "all" and _thread_group(name) != threads:
+                    continue
+
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(name)
+                stacks[tuple(reversed(labels))] += 1
+
+            samples += 1
+            time.sleep(interval)
+
+        return stacks, samples
+
+    def _aggregate(self, stacks, samples, seconds, interval, top):
+        own = Counter()
+        cumulative = Counter()
+
+        for stack, count in stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack[1:]):
+                cumulative[label] += count
+
+        total = sum(stacks.values()) or 1
+
+        table = [
+            {
+                "function": label,
+                "self_samples": own[label],
+                "total_samples": cumulative[label],
+                "self_pct": round(100 * own[label] / total, 2),
+                "total_pct": round(100 * cumulative[label] / total, 2),
+            }
+            for label, _ in own.most_common(top)
+        ]
+
+        collapsed = "\n".join(
+            f"{';'.join(stack)} {count}"
+            for stack, count in stacks.most_common()
+        )
+
+        return {
+            "seconds": seconds,
+            "interval_ms": round(interval * 1000, 3),
+            "sweeps": samples,
+            "stack_samples": sum(stacks.values()),
+            "top": table,
+            "collapsed": collapsed,
+        }
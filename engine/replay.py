@@ -0,0 +1,149 @@
+import argparse
+import json
+import time
+
+from automation import decision_emitter
+from devices.factory import build_home
+from engine.simulator_loop import SimulatorEngine
+from engine.trace import Trace, TracePlayer
+from rules.loader import build_rules
+from rules.engine import RuleEngine
+
+
+DEFAULT_RULES = "rules/rules.json"
+
+# Occupied room hotter than this with its device OFF counts as discomfort
+COMFORT_MAX_TEMP = 26.0
+
+
+def set_existing_path(node: dict, path: str, value):
+    """
+    node[a][b]... = value for path "a.b...". Every key must already
+    exist, so a typo fails instead of adding a key nothing reads.
+    """
+    *parents, leaf = path.split(".")
+    for part in parents:
+        node = node.get(part) if isinstance(node, dict) else None
+    if not isinstance(node, dict) or leaf not in node:
+        raise ValueError(f"Unknown override path: {path}")
+    node[leaf] = value
+
+
+def apply_rule_overrides(raw_rules, rule_overrides):
+    """
+    Edit rule definitions (as loaded from rules.json) in place;
+    rule_overrides is {rule_id: {path: value}}.
+    """
+    by_id = {r["rule_id"]: r for r in raw_rules}
+    unknown = sorted(set(rule_overrides) - set(by_id))
+    if unknown:
+        raise ValueError(f"Unknown rule ids: {', '.join(unknown)}")
+
+    for rule_id, overrides in rule_overrides.items():
+        for path, value in overrides.items():
+            if path == "rule_id":
+                raise ValueError(f"Cannot override rule_id of {rule_id}")
+            set_existing_path(by_id[rule_id], path, value)
+
+
+def replay(
+    trace: Trace,
+    rules_path=DEFAULT_RULES,
+    predictor=None,
+    tick_seconds=15,
+    comfort_max_temp=COMFORT_MAX_TEMP,
+    rule_overrides=None
+):
+    """
+    Feed a recorded trace through the rule engine and predictor with
+    no sleeping between ticks. Every run starts from fresh devices,
+    so two rule sets replayed on the same trace see identical inputs.
+
+    rule_overrides: {rule_id: {path: value}}, e.g.
+    {"night_ac_off": {"enabled": False, "when.value": 22}}, applied
+    to the rule definitions before they are built, so conditions and
+    actions see the new values. Unknown rule ids or paths raise.
+    """
+    devices = build_home(trace.layout())
+    with open(rules_path) as f:
+        raw_rules = json.load(f)
+    apply_rule_overrides(raw_rules, rule_overrides or {})
+
+    rule_engine = RuleEngine(build_rules(raw_rules, devices))
+
+    engine = SimulatorEngine(
+        devices=devices,
+        rule_engine=rule_engine,
+        tick_seconds=tick_seconds,
+        predictor=predictor,
+        sensor_source=TracePlayer(trace)
+    )
+    if len(trace):
+        engine.current_day = int(trace.day[0])
+        engine.current_hour = int(trace.hour[0])
+
+    decisions = 0
+    discomfort_ticks = 0
+    predicted_total = 0.0
+
+    delivery = decision_emitter.DELIVER_EVENTS
+    decision_emitter.set_event_delivery(False)
+    started = time.perf_counter()
+    try:
+        for _ in range(len(trace)):
+            summary = engine.tick()
+            decisions += summary["decisions"]
+            predicted_total += summary["predicted_energy"]
+
+            for device in devices.values():
+                temp = device.sensors.get("ambient_temperature")
+                if (
+                    temp is not None
+                    and device.sensors.get("occupancy")
+                    and temp > comfort_max_temp
+                    and device.state.get("power") != "ON"
+                ):
+                    discomfort_ticks += 1
+    finally:
+        decision_emitter.set_event_delivery(delivery)
+
+    elapsed = time.perf_counter() - started
+
+    return {
+        "rules": rules_path,
+        "ticks": len(trace),
+        "total_kwh": sum(d.energy["total_kwh"] for d in devices.values()),
+        "device_kwh": {
+            device_id: d.energy["total_kwh"]
+            for device_id, d in devices.items()
+        },
+        "decisions": decisions,
+        "discomfort_ticks": discomfort_ticks,
+        "mean_predicted_energy": predicted_total / len(trace) if len(trace) else 0.0,
+        "elapsed_seconds": round(elapsed, 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Replay a sensor trace against one or more rule sets (A/B)"
+    )
+    parser.add_argument("trace", help="trace .npz recorded by engine.trace")
+    parser.add_argument(
+        "--rules",
+        action="append",
+        help="rules JSON (repeat to compare several rule sets)"
+    )
+    args = parser.parse_args(argv)
+
+    from ml.predictor import EnergyPredictor
+
+    trace = Trace.load(args.trace)
+    predictor = EnergyPredictor()
+
+    for rules_path in args.rules or [DEFAULT_RULES]:
+        print(json.dumps(replay(trace, rules_path, predictor=predictor)))
+
+
+if __name__ == "__main__":
+    main()
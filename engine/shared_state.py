@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import fcntl
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+from engine.state_publisher import StateView
+
+
+# ==============================
+# CONFIG (ENV)
+# ==============================
+# SHARED_STATE=1 turns on multi-worker serving (uvicorn --workers N):
+# one worker owns the simulator and publishes into shared memory, the
+# others serve read routes from it.
+SHARED_STATE = os.getenv("SHARED_STATE", "0") == "1"
+SHARED_STATE_NAME = os.getenv("SHARED_STATE_NAME", "smart_home_state")
+SHARED_STATE_SIZE = int(os.getenv("SHARED_STATE_SIZE", str(8 * 1024 * 1024)))
+SHARED_STATE_LOCK = os.getenv("SHARED_STATE_LOCK", "/tmp/smart_home_state.lock")
+
+# Readers try to take over this often if the owner goes away
+OWNER_POLL_SECONDS = 2.0
+
+
+# ==============================
+# SEGMENT LAYOUT
+# ==============================
+# [seq u64][body_len u32][gzip_len u32][meta_len u32][pad u32]
+# [body][gzip][meta]
+#
+# Seqlock: the writer makes seq odd, writes lengths and payload, then
+# stores the even seq on its own. A reader reads seq, then lengths and
+# payload, then seq again, and retries if the two differ or are odd,
+# so it never blocks the writer and never trusts lengths from a write
+# it did not fully see.
+SEQ = struct.Struct("<Q")
+LENGTHS = struct.Struct("<IIII")
+HEADER_SIZE = SEQ.size + LENGTHS.size
+
+# Stamped into a segment a new owner replaces (the old owner died), so
+# readers still mapped to it re-attach to the new one
+RETIRED = 2 ** 64 - 1
+
+
+class SharedStateWriter:
+    """
+    Owner side: publishes each StateView (pre-encoded body, gzip body)
+    plus a small JSON meta document (mode, prediction, health).
+    """
+
+    def __init__(self, name=SHARED_STATE_NAME, size=SHARED_STATE_SIZE):
+        try:
+            stale = shared_memory.SharedMemory(name=name)
+            SEQ.pack_into(stale.buf, 0, RETIRED)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.size = size
+        self.seq = 0
+        self.skipped = 0
+        SEQ.pack_into(self.shm.buf, 0, 0)
+        LENGTHS.pack_into(self.shm.buf, SEQ.size, 0, 0, 0, 0)
+
+    def write(self, view: StateView, meta: dict):
+        body, gzip_body, etag = view.render()
+        gzip_body = gzip_body or b""
+        meta = json.dumps({
+            **meta,
+            "epoch": view.epoch,
+            "version": view.version,
+            "etag": etag,
+            "published_at": time.time(),
+        }, default=str).encode()
+
+        end = HEADER_SIZE + len(body) + len(gzip_body) + len(meta)
+        if end > self.size:
+            # Readers keep serving the previous version
+            self.skipped += 1
+            return False
+
+        buf = self.shm.buf
+        self.seq += 1
+        SEQ.pack_into(buf, 0, self.seq)             # odd: writing
+        LENGTHS.pack_into(buf, SEQ.size, len(body), len(gzip_body), len(meta), 0)
+
+        offset = HEADER_SIZE
+        buf[offset:offset + len(body)] = body
+        offset += len(body)
+        buf[offset:offset + len(gzip_body)] = gzip_body
+        offset += len(gzip_body)
+        buf[offset:offset + len(meta)] = meta
+
+        self.seq += 1
+        SEQ.pack_into(buf, 0, self.seq)             # even: published
+        return True
+
+    def close(self):
+        self.shm.close()
+        # Workers forked from one parent share a resource tracker, and a
+        # reader's unregister may have dropped our entry: re-register so
+        # unlink's own unregister has something to remove
+        resource_tracker.register(self.shm._name, "shared_memory")
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedSnapshot:
+    """
+    One consistent copy of the segment. Projections (?devices=,
+    ?fields=) decode the body once, on first use.
+    """
+
+    def __init__(self, seq, body, gzip_body, meta):
+        self.seq = seq
+        self.body = body
+        self.gzip = gzip_body or None
+        self.meta = meta
+        self._view = None
+        self._lock = threading.Lock()
+
+    @property
+    def etag(self):
+        return self.meta["etag"]
+
+    def snapshots(self):
+        return self.view().snapshots
+
+    def view(self, max_projections=64):
+        with self._lock:
+            if self._view is None:
+                self._view = StateView(
+                    self.meta["epoch"],
+                    self.meta["version"],
+                    json.loads(self.body),
+                    self.gzip is not None,
+                    max_projections
+                )
+            return self._view
+
+
+class SharedStateReader:
+    """
+    Worker side: attaches to the owner's segment (lazily, it may not
+    exist yet) and returns the latest SharedSnapshot, re-reading only
+    when the sequence number moved.
+    """
+
+    def __init__(self, name=SHARED_STATE_NAME, retries=100):
+        self.name = name
+        self.retries = retries
+        self.shm = None
+        self._latest = None
+
+    def _attach(self):
+        if self.shm is None:
+            try:
+                self.shm = shared_memory.SharedMemory(name=self.name)
+            except FileNotFoundError:
+                return False
+            # Attaching registers the segment with this process's
+            # resource tracker, which would unlink it when we exit
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        return True
+
+    def read(self):
+        if not self._attach():
+            return None
+
+        buf = self.shm.buf
+        for _ in range(self.retries):
+            seq = SEQ.unpack_from(buf, 0)[0]
+            if seq == RETIRED:
+                self.close()
+                return self.read()
+            if seq == 0:
+                return None
+            if seq & 1:
+                continue
+
+            latest = self._latest
+            if latest is not None and latest.seq == seq:
+                return latest
+
+            body_len, gzip_len, meta_len, _ = LENGTHS.unpack_from(buf, SEQ.size)
+            start = HEADER_SIZE
+            body = bytes(buf[start:start + body_len])
+            gzip_body = bytes(buf[start + body_len:start + body_len + gzip_len])
+            meta = bytes(buf[start + body_len + gzip_len:start + body_len + gzip_len + meta_len])
+
+            if SEQ.unpack_from(buf, 0)[0] != seq:
+                continue    # overwritten while copying
+
+            self._latest = SharedSnapshot(seq, body, gzip_body, json.loads(meta))
+            return self._latest
+
+        return self._latest
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+            self._latest = None
+
+
+# ==============================
+# OWNER ELECTION
+# ==============================
+class WorkerRole:
+    """
+    Which worker runs the simulator: whoever holds an exclusive flock on
+    the lock file. The kernel drops the lock when that process dies, so
+    a reader polling for it takes over (on_promote is then called).
+    """
+
+    def __init__(self, lock_path=SHARED_STATE_LOCK):
+        self.lock_path = lock_path
+        self.is_owner = False
+        self.reader = SharedStateReader()
+        self._fd = None
+        self._watcher = None
+
+    def try_acquire(self):
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        self.is_owner = True
+        return True
+
+    def watch(self, on_promote):
+        """
+        Reader workers: poll for the lock in the background.
+        """
+        def poll():
+            while not self.is_owner:
+                time.sleep(OWNER_POLL_SECONDS)
+                if self.try_acquire():
+                    on_promote()
+
+        self._watcher = threading.Thread(target=poll, name="owner-election", daemon=True)
+        self._watcher.start()
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self.is_owner = False
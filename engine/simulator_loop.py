@@ -1,12 +1,24 @@
+import os
 import time
 import threading
+from collections import deque
 from enum import Enum
 import requests
 
 from ml.predictor import EnergyPredictor
 from automation.rules import evaluate_automation
-from automation.state_utils import aggregate_state
+from automation.state_utils import features_from_snapshots, room_features
 from automation.log_store import add_log
+from automation.action_mapper import ActionMapper
+from engine.command_queue import CommandQueue
+from engine.planner import DayAheadPlanner
+from storage.energy_rollups import EnergyRollups
+from devices.capabilities import apply_resolved
+from devices.registry import DeviceRegistry
+from engine.logging_setup import get_logger
+
+log = get_logger("simulator")
+ml_log = get_logger("ml")
 
 
 # ==============================
@@ -15,12 +27,16 @@ from automation.log_store import add_log
 class ControlMode(Enum):
     AUTO = "AUTO"
     MANUAL = "MANUAL"
+    SCHEDULE = "SCHEDULE"
 
 
 # ==============================
 # LLM ACTION FETCHER
 # ==============================
-LLM_ACTIONS_URL = "https://backendllm-uoeo.onrender.com/actions"
+LLM_ACTIONS_URL = os.getenv(
+    "LLM_ACTIONS_URL",
+    "https://backendllm-uoeo.onrender.com/actions"
+)
 
 
 def fetch_llm_actions(timeout=3):
@@ -51,46 +67,21 @@ def fetch_llm_actions(timeout=3):
         return {"actions": []}
 
 
-# ==============================
-# ACTION MAPPER (LLM → DEVICE)
-# ==============================
-class ActionMapper:
-    @staticmethod
-    def apply(device, action: str, value):
-        action = action.upper()
-
-        if device.__class__.__name__ == "AC":
-            if action == "ON":
-                device.turn_on()
-            elif action == "OFF":
-                device.turn_off()
-            elif action == "SET_TEMPERATURE":
-                device.set_temperature(value)
-            else:
-                raise ValueError("Unsupported AC action")
-
-        elif device.__class__.__name__ == "Light":
-            if action == "ON":
-                device.turn_on()
-            elif action == "OFF":
-                device.turn_off()
-            elif action == "SET_BRIGHTNESS":
-                device.set_brightness(value)
-            else:
-                raise ValueError("Unsupported Light action")
-
-        elif device.__class__.__name__ == "Fan":
-            if action == "ON":
-                device.turn_on()
-            elif action == "OFF":
-                device.turn_off()
-            elif action == "SET_SPEED":
-                device.set_speed(value)
-            else:
-                raise ValueError("Unsupported Fan action")
-
-        else:
-            raise ValueError("Unknown device type")
+async def fetch_llm_actions_async(client, timeout=3):
+    """
+    fetch_llm_actions() over a shared httpx.AsyncClient
+    (used by engine.async_runner).
+    """
+    try:
+        response = await client.get(LLM_ACTIONS_URL, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        add_log({
+            "type": "llm_error",
+            "error": str(e)
+        })
+        return {"actions": []}
 
 
 # ==============================
@@ -105,44 +96,269 @@ class SimulatorEngine:
     _start_lock = threading.Lock()
     _started = False
 
-    def __init__(self, devices, rule_engine=None, tick_seconds=15):
-        self.devices = devices
+    def __init__(
+        self,
+        devices,
+        rule_engine=None,
+        tick_seconds=15,
+        energy_store=None,
+        checkpoint=None,
+        publisher=None,
+        predictor=None,
+        sensor_source=None,
+        recorder=None,
+        planner=None,
+        training_log=None
+    ):
+        # Indexed by room / type (devices.registry); plain dicts are wrapped
+        self.devices = (
+            devices if isinstance(devices, DeviceRegistry)
+            else DeviceRegistry(devices)
+        )
         self.rule_engine = rule_engine
         self.tick_seconds = tick_seconds
         self.running = False
-
-        # ML predictor
-        self.predictor = EnergyPredictor()
+        self._thread = None
+
+        # Optional per-tick energy time-series (storage.energy_store)
+        self.energy_store = energy_store
+
+        # Optional background checkpointing (storage.checkpoint)
+        self.checkpoint = checkpoint
+        self.ticks = 0
+
+        # ML predictor (shared instance allowed for headless runs)
+        self.predictor = predictor or EnergyPredictor()
+
+        # Optional sensor feed replacing the devices' own sensor
+        # dynamics (devices.sensor_engine.SensorEngine, or a recorded
+        # engine.trace.TracePlayer), and an optional recorder
+        # capturing what the sensors produced each tick.
+        self.sensor_source = sensor_source
+        self.recorder = recorder
+
+        # room → device ids; every tick scores one feature row per room
+        self.rooms = self.devices.by_room
+        self.room_predictions = {}
+        self.last_prediction = None
+
+        # 🎓 Optional ml.training.TrainingLog: the home feature row
+        # scored this tick, labelled with the kWh then used
+        self.training_log = training_log
+        self.last_features = None
+
+        # Optional ml.training.Retrainer, polled once per tick
+        self.retrainer = None
+
+        # 📅 SCHEDULE mode: day-ahead plan, rebuilt when it runs out or
+        # live sensors drift from what it assumed
+        self.planner = planner or DayAheadPlanner(
+            self.predictor,
+            sensor_source=sensor_source
+        )
+        self.plan = None
+        self.replans = 0
 
         # Deterministic simulated clock
         self.current_hour = 0
         self.current_day = 1
 
+        # 🔋 kWh per room / type for the current day, fed by each
+        # device's update_energy(); finished days are frozen
+        self.energy_rollups = EnergyRollups(day=self.current_day)
+        self.energy_rollups.attach(self.devices)
+
         # 🔀 MODE CONTROL
         self.mode = ControlMode.AUTO
         self.manual_payload = None  # preserved (API compatibility)
 
+        # 🔒 Single-writer queue: API threads submit, the tick applies
+        self.commands = CommandQueue()
+
+        # Bumped once per tick and once per drained command batch;
+        # each bump re-publishes the encoded /state body
+        self.state_version = 0
+        self.publisher = publisher
+        self.publish_state()
+
+        # (monotonic start, duration) of recent live ticks
+        self.tick_timings = deque(maxlen=2048)
+
+    # ==============================
+    # COMMAND QUEUE
+    # ==============================
+    def submit(self, label: str, fn) -> int:
+        """
+        Queue a device/engine mutation and return its sequence number.
+        Without a running loop (tests, headless tools) the caller is
+        the only writer, so the queue is drained right away.
+        """
+        seq = self.commands.submit(label, fn)
+        if not self.running:
+            self.drain_commands()
+        return seq
+
+    def drain_commands(self) -> int:
+        applied = self.commands.drain()
+        if applied:
+            self.bump_state_version()
+        return applied
+
+    # ==============================
+    # STATE PUBLISHING
+    # ==============================
+    def bump_state_version(self):
+        self.state_version += 1
+        self.publish_state()
+
+    def publish_state(self):
+        if self.publisher:
+            self.publisher.publish(self.devices, self.state_version, self.status())
+
+    def status(self) -> dict:
+        """
+        Mode, latest prediction and health counters; published with the
+        state so read-only workers can answer /health and /decision.
+        """
+        return {
+            "mode": self.mode.value,
+            "running": self.running,
+            "day": self.current_day,
+            "hour": self.current_hour,
+            "predicted_energy": self.last_prediction,
+            "room_predictions": self.room_predictions,
+            "commands_submitted": self.commands.submitted,
+            "commands_applied": self.commands.applied,
+            "pid": os.getpid(),
+        }
+
     # ==============================
     # MODE TOGGLES
     # ==============================
-    def set_manual_mode(self, payload: dict = None):
-        self.mode = ControlMode.MANUAL
+    def set_manual_mode(self, payload: dict = None) -> int:
+        return self.submit(
+            "mode:MANUAL",
+            lambda: self._set_mode(ControlMode.MANUAL, payload)
+        )
+
+    def set_auto_mode(self) -> int:
+        return self.submit(
+            "mode:AUTO",
+            lambda: self._set_mode(ControlMode.AUTO, None)
+        )
+
+    def set_schedule_mode(self, energy_budget: float = None) -> int:
+        def activate():
+            self.planner.energy_budget = energy_budget
+            self.plan = None    # plan on the next tick
+            self._set_mode(ControlMode.SCHEDULE, None)
+
+        return self.submit("mode:SCHEDULE", activate)
+
+    def _set_mode(self, mode: ControlMode, payload):
+        self.mode = mode
         self.manual_payload = payload  # optional, preserved
 
         add_log({
             "type": "mode_change",
-            "mode": "MANUAL"
+            "mode": mode.value
         })
 
-    def set_auto_mode(self):
-        self.mode = ControlMode.AUTO
-        self.manual_payload = None
+    # ==============================
+    # BULK COMMANDS
+    # ==============================
+    def apply_commands(self, resolved) -> int:
+        """
+        Queue pre-validated commands to be applied as one batch.
+        resolved: list of (device, method, value) from
+        devices.capabilities.resolve().
+        """
+        return self.submit(
+            "command_batch",
+            lambda: self._apply_commands(resolved)
+        )
+
+    def _apply_commands(self, resolved):
+        for device, method, value in resolved:
+            apply_resolved(device, method, value)
 
         add_log({
-            "type": "mode_change",
-            "mode": "AUTO"
+            "type": "command_batch",
+            "applied": len(resolved)
+        })
+
+    # ==============================
+    # CHECKPOINT / RESTORE
+    # ==============================
+    def export_state(self):
+        """
+        Capture the full engine state as plain data.
+        Runs on the tick thread; only copies small dicts.
+        """
+        return {
+            "current_day": self.current_day,
+            "current_hour": self.current_hour,
+            "mode": self.mode.value,
+            "manual_payload": self.manual_payload,
+            "energy_budget": self.planner.energy_budget,
+            "planner": self.planner.export_state(),
+            "energy_rollups": self.energy_rollups.export_state(),
+            "devices": {
+                device_id: device.export_state()
+                for device_id, device in self.devices.items()
+            },
+            "sensor_source": (
+                self.sensor_source.export_state()
+                if hasattr(self.sensor_source, "export_state") else None
+            ),
+        }
+
+    def restore_state(self, data: dict):
+        self.current_day = data["current_day"]
+        self.current_hour = data["current_hour"]
+        self.mode = ControlMode(data["mode"])
+        self.manual_payload = data.get("manual_payload")
+        self.planner.energy_budget = data.get("energy_budget")
+        self.planner.restore_state(data.get("planner") or {})
+        self.plan = None
+
+        for device_id, device_data in data.get("devices", {}).items():
+            device = self.devices.get(device_id)
+            if device:
+                device.restore_state(device_data)
+
+        if data.get("sensor_source") and hasattr(self.sensor_source, "restore_state"):
+            self.sensor_source.restore_state(data["sensor_source"])
+
+        if data.get("energy_rollups"):
+            self.energy_rollups.restore_state(data["energy_rollups"])
+        else:
+            self.energy_rollups.day = self.current_day
+
+        self.bump_state_version()
+
+        add_log({
+            "type": "checkpoint_restored",
+            "day": self.current_day,
+            "hour": self.current_hour,
+            "mode": self.mode.value
         })
 
+    def restore_from_checkpoint(self):
+        """
+        Resume from the latest checkpoint, if any. Returns True when
+        state was restored.
+        """
+        if not self.checkpoint:
+            return False
+
+        data = self.checkpoint.load()
+        if data is None:
+            return False
+
+        self.restore_state(data)
+        return True
+
     # ==============================
     # ENGINE START
     # ==============================
@@ -152,11 +368,30 @@ class SimulatorEngine:
                 return
 
             self.running = True
-            thread = threading.Thread(target=self.loop, daemon=True)
-            thread.start()
+            self._thread = threading.Thread(target=self.loop, name="simulator", daemon=True)
+            self._thread.start()
 
             SimulatorEngine._started = True
 
+    def stop(self, timeout=None):
+        """
+        Let the in-flight tick finish and stop the simulator thread
+        (shutdown), so a final checkpoint captures settled state.
+        Returns False if the thread was still running after timeout.
+        """
+        self.running = False
+        self.commands.wake()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+            self._thread = None
+
+        with SimulatorEngine._start_lock:
+            SimulatorEngine._started = False
+        return True
+
     # ==============================
     # MAIN LOOP
     # ==============================
@@ -165,117 +400,272 @@ class SimulatorEngine:
         time.sleep(1)  # allow app + ML to initialize
 
         while self.running:
+            started = time.monotonic()
+            self.tick()
+            self.tick_timings.append((started, time.monotonic() - started))
+
+            # Between ticks, wake up for queued commands instead of
+            # sleeping through them
+            deadline = time.monotonic() + self.tick_seconds
+            while self.running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.commands.wait(remaining)
+                self.drain_commands()
 
-            print(
-                f"\n========== DAY {self.current_day} | "
-                f"HOUR {self.current_hour} | "
-                f"MODE {self.mode.value} =========="
-            )
+    # ==============================
+    # ML PREDICTION
+    # ==============================
+    def predict_energy(self):
+        """
+        Home-level prediction; the home row plus one row per room are
+        scored in a single batched model call.
+        """
+        snapshots = {
+            device_id: device.snapshot()
+            for device_id, device in self.devices.items()
+        }
+        rows = [features_from_snapshots(snapshots, self.current_hour, self.devices.first("AC"))]
+        rows.extend(
+            room_features(snapshots, device_ids, self.current_hour)
+            for device_ids in self.rooms.values()
+        )
 
-            # ⏱️ Log time
-            add_log({
-                "type": "time",
-                "day": self.current_day,
-                "hour": self.current_hour
-            })
+        self.last_features = rows[0]
+        predicted_energy, *room_values = self.predictor.predict_many(rows)
+        self.room_predictions = dict(zip(self.rooms, room_values))
 
-            # 1️⃣ Update sensors
-            for device in self.devices.values():
-                device.update_sensors()
+        ml_log.info(
+            "predicted energy usage %.3f", predicted_energy,
+            extra={"fields": {"rooms": self.room_predictions}}
+        )
 
-            # 2️⃣ ML snapshot
-            ml_snapshot = aggregate_state(
-                self.devices,
-                current_hour=self.current_hour
-            )
+        add_log({
+            "type": "ml",
+            "day": self.current_day,
+            "hour": self.current_hour,
+            "predicted_energy": round(predicted_energy, 3),
+            "rooms": {
+                room: round(value, 3)
+                for room, value in self.room_predictions.items()
+            }
+        })
 
-            predicted_energy = self.predictor.predict(ml_snapshot)
-            print(f"[ML] Predicted energy usage: {predicted_energy:.3f}")
+        return predicted_energy
+
+    # ==============================
+    # SCHEDULE MODE
+    # ==============================
+    def run_schedule(self):
+        """
+        Execute the cached plan's step for the current hour, replanning
+        first if there is none or the sensors deviate from it.
+        Returns (predicted_energy, decisions).
+        """
+        step = self.plan.step(self.current_day, self.current_hour) if self.plan else None
+
+        if step is None or self.planner.deviates(step, self.devices):
+            self.plan = self.planner.plan(self.devices, self.current_day, self.current_hour)
+            self.replans += 1
 
             add_log({
-                "type": "ml",
+                "type": "schedule_replan",
                 "day": self.current_day,
                 "hour": self.current_hour,
-                "predicted_energy": round(predicted_energy, 3)
+                "reason": "expired" if step is None else "deviation",
+                "predicted_total": round(self.plan.predicted_total, 3)
             })
+            step = self.plan.step(self.current_day, self.current_hour)
 
-            # ==================================================
-            # 🔁 AUTO MODE → RULE ENGINE + ML
-            # ==================================================
-            if self.mode == ControlMode.AUTO:
+        decisions = 0
+        for device_id, device in self.devices.items():
+            if device.manual_override:
+                continue
 
-                for device in self.devices.values():
-                    evaluate_automation(
-                        device,
-                        current_hour=self.current_hour,
-                        predicted_energy=predicted_energy
-                    )
+            payload = self.planner.resolve(step, device) or {}
 
-                actions = {}
-                if self.rule_engine:
-                    actions, _ = self.rule_engine.evaluate(
-                        self.devices,
-                        ml_prediction=predicted_energy
-                    )
+            changes = {
+                key: value for key, value in payload.items()
+                if device.state.get(key) != value
+            }
+            if changes:
+                device.apply_state(changes)
+                decisions += 1
 
-                for device_id, payload in actions.items():
-                    device = self.devices.get(device_id)
-                    if device:
-                        device.apply_state(payload)
+                add_log({
+                    "type": "schedule_action",
+                    "device_id": device_id,
+                    "day": self.current_day,
+                    "hour": self.current_hour,
+                    "payload": changes
+                })
 
-            # ==================================================
-            # 🧠 MANUAL MODE → LLM ACTIONS (REMOTE)
-            # ==================================================
-            elif self.mode == ControlMode.MANUAL:
+        return step["predicted_energy"], decisions
 
-                llm_payload = fetch_llm_actions()
-                actions = llm_payload.get("actions", [])
-
-                for act in actions:
-                    device_id = act["device_id"]
-                    action = act["action"]
-                    value = act.get("value")
-
-                    device = self.devices.get(device_id)
-                    if not device:
-                        add_log({
-                            "type": "manual_action",
-                            "device_id": device_id,
-                            "status": "FAILED",
-                            "reason": "Device not found",
-                            "source": "LLM"
-                        })
-                        continue
-
-                    try:
-                        ActionMapper.apply(device, action, value)
-                        add_log({
-                            "type": "manual_action",
-                            "device_id": device_id,
-                            "action": action,
-                            "status": "SUCCESS",
-                            "source": "LLM"
-                        })
-                    except Exception as e:
-                        add_log({
-                            "type": "manual_action",
-                            "device_id": device_id,
-                            "action": action,
-                            "status": "FAILED",
-                            "reason": str(e),
-                            "source": "LLM"
-                        })
-
-            # ==================================================
-            # 🔋 ENERGY UPDATE
-            # ==================================================
+    # ==============================
+    # SINGLE TICK
+    # ==============================
+    def tick(self, llm_payload=None):
+        """
+        Advance the simulation by one simulated hour.
+        Returns a small summary used by headless drivers (replay, sweeps).
+        llm_payload: MANUAL-mode actions already fetched by the caller
+        (the asyncio engine fetches them without blocking).
+        """
+        log.info(
+            "tick day=%s hour=%s mode=%s",
+            self.current_day, self.current_hour, self.mode.value
+        )
+
+        # ⏱️ Log time
+        add_log({
+            "type": "time",
+            "day": self.current_day,
+            "hour": self.current_hour
+        })
+
+        # 0️⃣ Apply queued API mutations before reading any state
+        self.drain_commands()
+
+        # 1️⃣ Update sensors
+        if self.sensor_source:
+            self.sensor_source.apply(self.devices, hour=self.current_hour)
+        else:
             for device in self.devices.values():
-                device.update_energy(self.tick_seconds)
+                device.update_sensors()
+
+        if self.recorder:
+            self.recorder.capture(
+                self.devices,
+                day=self.current_day,
+                hour=self.current_hour
+            )
+
+        # 2️⃣ ML snapshot (a schedule carries its own hourly predictions)
+        predicted_energy = None
+        if self.mode != ControlMode.SCHEDULE:
+            predicted_energy = self.predict_energy()
 
-            # ⏭️ Advance deterministic time
-            self.current_hour += 1
-            if self.current_hour == 24:
-                self.current_hour = 0
-                self.current_day += 1
+        # ==================================================
+        # 🔁 AUTO MODE → RULE ENGINE + ML
+        # ==================================================
+        decisions = 0
 
-            time.sleep(self.tick_seconds)
+        if self.mode == ControlMode.AUTO:
+
+            for device in self.devices.values():
+                decisions += bool(evaluate_automation(
+                    device,
+                    current_hour=self.current_hour,
+                    predicted_energy=self.room_predictions.get(
+                        device.room, predicted_energy
+                    )
+                ))
+
+            actions = {}
+            if self.rule_engine:
+                actions, _ = self.rule_engine.evaluate(
+                    self.devices,
+                    ml_prediction=predicted_energy,
+                    room_predictions=self.room_predictions
+                )
+
+            for device_id, payload in actions.items():
+                device = self.devices.get(device_id)
+                if device:
+                    device.apply_state(payload)
+                    decisions += 1
+
+        # ==================================================
+        # 🧠 MANUAL MODE → LLM ACTIONS (REMOTE)
+        # ==================================================
+        elif self.mode == ControlMode.MANUAL:
+
+            if llm_payload is None:
+                llm_payload = fetch_llm_actions()
+            actions = llm_payload.get("actions", [])
+
+            for act in actions:
+                device_id = act["device_id"]
+                action = act["action"]
+                value = act.get("value")
+
+                device = self.devices.get(device_id)
+                if not device:
+                    add_log({
+                        "type": "manual_action",
+                        "device_id": device_id,
+                        "status": "FAILED",
+                        "reason": "Device not found",
+                        "source": "LLM"
+                    })
+                    continue
+
+                try:
+                    ActionMapper.apply(device, action, value)
+                    decisions += 1
+                    add_log({
+                        "type": "manual_action",
+                        "device_id": device_id,
+                        "action": action,
+                        "status": "SUCCESS",
+                        "source": "LLM"
+                    })
+                except Exception as e:
+                    add_log({
+                        "type": "manual_action",
+                        "device_id": device_id,
+                        "action": action,
+                        "status": "FAILED",
+                        "reason": str(e),
+                        "source": "LLM"
+                    })
+
+        # ==================================================
+        # 📅 SCHEDULE MODE → PRECOMPUTED DAY-AHEAD PLAN
+        # ==================================================
+        elif self.mode == ControlMode.SCHEDULE:
+            predicted_energy, decisions = self.run_schedule()
+
+        # ==================================================
+        # 🔋 ENERGY UPDATE
+        # ==================================================
+        for device in self.devices.values():
+            device.update_energy(self.tick_seconds)
+
+        if self.energy_store:
+            self.energy_store.record_tick(
+                self.devices,
+                day=self.current_day,
+                hour=self.current_hour
+            )
+
+        if self.training_log is not None:
+            self.training_log.record(self.last_features, self.devices, self.tick_seconds)
+        self.last_features = None
+
+        self.last_prediction = predicted_energy
+        self.bump_state_version()
+
+        # ⏭️ Advance deterministic time
+        self.current_hour += 1
+        if self.current_hour == 24:
+            self.current_hour = 0
+            self.current_day += 1
+            self.energy_rollups.roll(self.current_day)
+
+        # 💾 Checkpoint (written off the tick thread)
+        self.ticks += 1
+        if self.checkpoint and self.ticks % self.checkpoint.every_ticks == 0:
+            self.checkpoint.submit(self.export_state())
+
+        # 🎓 Retraining runs in a child process; this only schedules it
+        if self.retrainer:
+            self.retrainer.on_tick(self.ticks)
+
+        return {
+            "predicted_energy": predicted_energy,
+            "room_predictions": self.room_predictions,
+            "decisions": decisions
+        }
@@ -0,0 +1,111 @@
+import os
+import gzip
+import json
+import zlib
+import threading
+
+
+class StateView:
+    """
+    Immutable, already-encoded device state for one state version.
+
+    The full body (and its gzip form) is built once at publish time;
+    ?devices= / ?fields= projections are encoded on first request and
+    cached on the view, so they die with the version they belong to.
+    """
+
+    def __init__(self, epoch: str, version: int, snapshots: dict, compress: bool, max_projections: int):
+        self.epoch = epoch
+        self.version = version
+        self.snapshots = snapshots
+        self.compress = compress
+        self.max_projections = max_projections
+
+        self._lock = threading.Lock()
+        self._projections = {}
+
+        body = _encode(snapshots)
+        self._projections[(None, None)] = self._entry(None, None, body)
+
+    def _entry(self, device_ids, fields, body):
+        key = zlib.crc32(repr((device_ids, fields)).encode())
+        return {
+            "body": body,
+            "gzip": gzip.compress(body, compresslevel=5) if self.compress else None,
+            "etag": f'W/"{self.epoch}-{self.version}-{key:08x}"',
+        }
+
+    def render(self, device_ids=None, fields=None):
+        """
+        (body, gzip_body_or_None, etag) for a projection.
+        device_ids / fields: tuples (or None for "all").
+        """
+        key = (device_ids, fields)
+        entry = self._projections.get(key)
+        if entry is not None:
+            return entry["body"], entry["gzip"], entry["etag"]
+
+        selected = self.snapshots
+        if device_ids is not None:
+            selected = {
+                device_id: selected[device_id]
+                for device_id in device_ids
+                if device_id in selected
+            }
+        if fields is not None:
+            selected = {
+                device_id: {f: snap[f] for f in fields if f in snap}
+                for device_id, snap in selected.items()
+            }
+
+        entry = self._entry(device_ids, fields, _encode(selected))
+
+        with self._lock:
+            if len(self._projections) < self.max_projections:
+                self._projections[key] = entry
+
+        return entry["body"], entry["gzip"], entry["etag"]
+
+
+def _encode(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+class StatePublisher:
+    """
+    Holds the latest StateView. The simulator thread publishes a new
+    view whenever the state version changes; API threads just read
+    `current` (a single reference, swapped atomically).
+    """
+
+    def __init__(self, compress: bool = True, max_projections: int = 64, shared=None):
+        self.compress = compress
+        self.max_projections = max_projections
+        self.current = None
+
+        # Optional engine.shared_state.SharedStateWriter: every view is
+        # also copied into shared memory for other worker processes
+        self.shared = shared
+
+        # Versions restart at 0 with the process; the epoch keeps
+        # ETags from a previous process from matching new content
+        self.epoch = os.urandom(4).hex()
+
+    def publish(self, devices, version: int, meta: dict = None) -> StateView:
+        snapshots = {
+            device_id: device.snapshot()
+            for device_id, device in devices.items()
+        }
+        view = StateView(
+            self.epoch,
+            version,
+            snapshots,
+            self.compress,
+            self.max_projections
+        )
+        self.current = view
+
+        if self.shared is not None:
+            self.shared.write(view, meta or {})
+
+        return view
@@ -0,0 +1,187 @@
+import os
+import copy
+import json
+import argparse
+import itertools
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from automation.config import automation_config
+from devices.factory import build_home
+from devices.sensor_engine import SensorEngine
+from engine.replay import (
+    replay, apply_rule_overrides, set_existing_path, DEFAULT_RULES
+)
+from engine.trace import Trace, record_trace
+
+
+# ==============================
+# PARAMETER GRID
+# ==============================
+# Grid keys are dotted paths:
+#   config.<path>               → automation_config, e.g.
+#                                 config.ml_policy.energy_limits.high
+#   rules.<rule_id>.<path>      → rule definition, e.g.
+#                                 rules.night_ac_off.enabled
+#                                 rules.night_ac_off.when.value
+#
+# Paths must already exist: unknown config keys or rule ids raise.
+
+def expand_grid(grid: dict):
+    """
+    {"a": [1, 2], "b": [x]} → [{"a": 1, "b": x}, {"a": 2, "b": x}]
+    """
+    keys = list(grid)
+    return [
+        dict(zip(keys, values))
+        for values in itertools.product(*(grid[k] for k in keys))
+    ]
+
+
+def _split_overrides(scenario: dict):
+    config_overrides = {}
+    rule_overrides = {}
+
+    for key, value in scenario.items():
+        scope, _, path = key.partition(".")
+
+        if scope == "config":
+            config_overrides[path] = value
+        elif scope == "rules":
+            rule_id, _, attribute = path.partition(".")
+            if not rule_id or not attribute:
+                raise ValueError(f"Expected rules.<rule_id>.<path>, got {key}")
+            rule_overrides.setdefault(rule_id, {})[attribute] = value
+        else:
+            raise ValueError(f"Unknown sweep parameter scope: {key}")
+
+    return config_overrides, rule_overrides
+
+
+def check_scenario(scenario: dict, rules_path=DEFAULT_RULES):
+    """
+    Apply a scenario to throwaway copies of the config and the rule
+    definitions, so bad keys fail before any worker starts.
+    """
+    config_overrides, rule_overrides = _split_overrides(scenario)
+
+    config = copy.deepcopy(automation_config)
+    for path, value in config_overrides.items():
+        set_existing_path(config, path, value)
+
+    with open(rules_path) as f:
+        apply_rule_overrides(json.load(f), rule_overrides)
+
+
+# ==============================
+# WORKER PROCESS
+# ==============================
+# Loaded once per worker by the pool initializer and treated as
+# read-only afterwards; only automation_config is reset per scenario.
+_worker = {}
+
+
+def _init_worker(trace_path, rules_path):
+    from ml.predictor import EnergyPredictor
+    from automation import decision_emitter
+
+    decision_emitter.set_event_delivery(False)
+
+    _worker["trace"] = Trace.load(trace_path)
+    _worker["rules_path"] = rules_path
+    _worker["predictor"] = EnergyPredictor()
+    # Parallelism comes from the pool; keep each model single-threaded
+    _worker["predictor"].model.set_params(n_jobs=1)
+    _worker["base_config"] = copy.deepcopy(automation_config)
+
+
+def _run_scenario(indexed_scenario):
+    index, scenario = indexed_scenario
+    config_overrides, rule_overrides = _split_overrides(scenario)
+
+    # automation.rules reads this dict by reference → reset in place
+    automation_config.clear()
+    automation_config.update(copy.deepcopy(_worker["base_config"]))
+    for path, value in config_overrides.items():
+        set_existing_path(automation_config, path, value)
+
+    result = replay(
+        _worker["trace"],
+        rules_path=_worker["rules_path"],
+        predictor=_worker["predictor"],
+        rule_overrides=rule_overrides
+    )
+
+    return {
+        "scenario": index,
+        **scenario,
+        "total_kwh": result["total_kwh"],
+        "discomfort_ticks": result["discomfort_ticks"],
+        "decisions": result["decisions"],
+        "mean_predicted_energy": result["mean_predicted_energy"],
+        "elapsed_seconds": result["elapsed_seconds"],
+    }
+
+
+# ==============================
+# SWEEP RUNNER
+# ==============================
+def run_sweep(grid: dict, trace_path: str, rules_path=DEFAULT_RULES, workers=None):
+    """
+    Run every grid scenario against the same recorded trace in a
+    process pool and return one results table (a DataFrame).
+    """
+    scenarios = list(enumerate(expand_grid(grid)))
+    for _, scenario in scenarios:
+        check_scenario(scenario, rules_path)   # fail fast on bad keys
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(len(scenarios) // (workers * 4), 1)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(trace_path, rules_path)
+    ) as pool:
+        rows = list(pool.map(_run_scenario, scenarios, chunksize=chunksize))
+
+    return pd.DataFrame(rows).sort_values("scenario").reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="What-if parameter sweep")
+    parser.add_argument("grid", help="JSON file: {parameter: [values, ...]}")
+    parser.add_argument("--trace", help="recorded trace .npz (recorded on the fly if omitted)")
+    parser.add_argument("--ticks", type=int, default=24 * 7)
+    parser.add_argument("--seed", default="0")
+    parser.add_argument("--rules", default=DEFAULT_RULES)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", help="write the results table as CSV")
+    args = parser.parse_args(argv)
+
+    with open(args.grid) as f:
+        grid = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trace_path = args.trace
+        if trace_path is None:
+            trace_path = os.path.join(tmp, "trace.npz")
+            devices = build_home(seed=args.seed)
+            record_trace(
+                devices,
+                args.ticks,
+                seed=args.seed,
+                sensor_source=SensorEngine.for_devices(devices, seed=args.seed)
+            ).save(trace_path)
+
+        results = run_sweep(grid, trace_path, args.rules, args.workers)
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+    print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import argparse
+import math
+
+import numpy as np
+
+from devices.factory import build_home
+from devices.sensor_engine import SensorEngine
+
+
+# ==============================
+# TRACE FORMAT
+# ==============================
+# A trace is a compressed .npz holding, for T ticks and D devices:
+#   device_id / device_type / room   (D,)
+#   day / hour                       (T,)
+#   ambient_temperature              (T, D) float64, NaN = no sensor
+#   occupancy                        (T, D) int8, -1 = no sensor
+#   seed                             scalar string ("" when unseeded)
+
+
+class Trace:
+    def __init__(
+        self,
+        device_ids,
+        device_types,
+        rooms,
+        day,
+        hour,
+        ambient_temperature,
+        occupancy,
+        seed=None
+    ):
+        self.device_ids = list(device_ids)
+        self.device_types = list(device_types)
+        self.rooms = list(rooms)
+        self.day = np.asarray(day, dtype=np.int32)
+        self.hour = np.asarray(hour, dtype=np.int8)
+        self.ambient_temperature = np.asarray(ambient_temperature, dtype=np.float64)
+        self.occupancy = np.asarray(occupancy, dtype=np.int8)
+        self.seed = seed
+
+    def __len__(self):
+        return len(self.day)
+
+    def layout(self):
+        """
+        (device_id, device_type, room) triples, as used by build_home().
+        """
+        return list(zip(self.device_ids, self.device_types, self.rooms))
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            device_id=np.asarray(self.device_ids),
+            device_type=np.asarray(self.device_types),
+            room=np.asarray(self.rooms),
+            day=self.day,
+            hour=self.hour,
+            ambient_temperature=self.ambient_temperature,
+            occupancy=self.occupancy,
+            seed=np.asarray("" if self.seed is None else str(self.seed)),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            seed = str(data["seed"])
+            return cls(
+                device_ids=data["device_id"].tolist(),
+                device_types=data["device_type"].tolist(),
+                rooms=data["room"].tolist(),
+                day=data["day"],
+                hour=data["hour"],
+                ambient_temperature=data["ambient_temperature"],
+                occupancy=data["occupancy"],
+                seed=seed or None,
+            )
+
+
+# ==============================
+# RECORDER
+# ==============================
+class TraceRecorder:
+    """
+    Captures per-tick sensor readings. The device set is fixed on
+    the first capture; devices added later are not recorded.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.device_ids = None
+        self.device_types = None
+        self.rooms = None
+        self.day = []
+        self.hour = []
+        self.temperature = []
+        self.occupancy = []
+
+    def capture(self, devices, day: int, hour: int):
+        if self.device_ids is None:
+            self.device_ids = list(devices)
+            self.device_types = [devices[d].device_type for d in self.device_ids]
+            self.rooms = [devices[d].room for d in self.device_ids]
+
+        temps = []
+        occupancy = []
+        for device_id in self.device_ids:
+            sensors = devices[device_id].sensors
+            temp = sensors.get("ambient_temperature")
+            occupied = sensors.get("occupancy")
+            temps.append(math.nan if temp is None else temp)
+            occupancy.append(-1 if occupied is None else int(bool(occupied)))
+
+        self.day.append(day)
+        self.hour.append(hour)
+        self.temperature.append(temps)
+        self.occupancy.append(occupancy)
+
+    def to_trace(self):
+        width = len(self.device_ids or [])
+        return Trace(
+            device_ids=self.device_ids or [],
+            device_types=self.device_types or [],
+            rooms=self.rooms or [],
+            day=self.day,
+            hour=self.hour,
+            ambient_temperature=np.asarray(self.temperature, dtype=np.float64).reshape(-1, width),
+            occupancy=np.asarray(self.occupancy, dtype=np.int8).reshape(-1, width),
+            seed=self.seed,
+        )
+
+    def save(self, path):
+        self.to_trace().save(path)
+
+
+# ==============================
+# PLAYER
+# ==============================
+class TracePlayer:
+    """
+    Sensor source for SimulatorEngine: each apply() writes the next
+    recorded row into the devices' sensors instead of running their
+    own random dynamics.
+    """
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+        self.position = 0
+        self._columns = None
+
+    def apply(self, devices, hour=None):
+        if self.position >= len(self.trace):
+            raise IndexError("Trace exhausted")
+
+        if self._columns is None:
+            self._columns = [
+                (index, devices.get(device_id))
+                for index, device_id in enumerate(self.trace.device_ids)
+            ]
+
+        temps = self.trace.ambient_temperature[self.position].tolist()
+        occupancy = self.trace.occupancy[self.position].tolist()
+
+        for index, device in self._columns:
+            if device is None:
+                continue
+
+            sensors = dict(device.sensors)
+            if not math.isnan(temps[index]):
+                sensors["ambient_temperature"] = temps[index]
+            if occupancy[index] >= 0:
+                sensors["occupancy"] = bool(occupancy[index])
+            device.sensors = sensors
+
+        self.position += 1
+
+
+def record_trace(devices, ticks: int, start_day=1, start_hour=0, seed=None, sensor_source=None):
+    """
+    Headless recording: sensor dynamics do not depend on device
+    state, so no rules or model are needed to produce a trace.
+    """
+    recorder = TraceRecorder(seed=seed)
+    day, hour = start_day, start_hour
+
+    for _ in range(ticks):
+        if sensor_source:
+            sensor_source.apply(devices, hour=hour)
+        else:
+            for device in devices.values():
+                device.update_sensors()
+        recorder.capture(devices, day=day, hour=hour)
+
+        hour += 1
+        if hour == 24:
+            hour = 0
+            day += 1
+
+    return recorder.to_trace()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record a sensor trace headlessly")
+    parser.add_argument("out", help="output .npz path")
+    parser.add_argument("--ticks", type=int, default=24 * 7)
+    parser.add_argument("--seed", default="0")
+    parser.add_argument(
+        "--legacy-sensors",
+        action="store_true",
+        help="use the devices' own random-walk sensors instead of SensorEngine"
+    )
+    args = parser.parse_args(argv)
+
+    devices = build_home(seed=args.seed)
+    sensor_source = None if args.legacy_sensors else SensorEngine.for_devices(devices, seed=args.seed)
+    trace = record_trace(devices, args.ticks, seed=args.seed, sensor_source=sensor_source)
+    trace.save(args.out)
+    print(f"Recorded {len(trace)} ticks for {len(trace.device_ids)} devices → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
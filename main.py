@@ -1,29 +1,114 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, APIRouter
 
-from devices.light import Light
-from devices.fan import Fan
-from devices.ac import AC
+from devices.factory import DEFAULT_HOME, build_home, load_inventory
 
 from engine.simulator_loop import SimulatorEngine
 from rules.loader import load_rules
 from rules.engine import RuleEngine
 from api.routes import attach_routes
+from storage.energy_store import EnergyStore
+from storage.checkpoint import CheckpointWriter
+from engine.trace import TraceRecorder
+from engine.state_publisher import StatePublisher
+from devices.sensor_engine import SensorEngine
+from engine.logging_setup import configure_logging, get_logger, shutdown_logging
+from engine.shared_state import SHARED_STATE, SharedStateWriter, WorkerRole
+from engine.async_runner import ENGINE_MODE, AsyncEngineRunner
+from ml.training import RETRAIN_EVERY_TICKS, Retrainer, TrainingLog
+from automation.log_store import close_spill, configure_spill
+
+
+# ==============================
+# LOGGING
+# ==============================
+# Structured JSON on stdout via a background writer; LOG_LEVEL=OFF
+# silences every subsystem (see engine/logging_setup.py)
+configure_logging()
+log = get_logger("simulator")
 
 
 # ==============================
 # FASTAPI APP
 # ==============================
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Start the simulator exactly once when the app boots, and stop /
+    checkpoint it on shutdown. REQUIRED for Render / production.
+    """
+    start_simulator(asyncio.get_running_loop())
+    yield
+    if runner is not None:
+        await runner.stop()
+    checkpoint_simulator()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+# ==============================
+# WORKER ROLE (uvicorn --workers N)
+# ==============================
+# With SHARED_STATE=1 exactly one worker (the flock holder) runs the
+# simulator and publishes into shared memory; the others serve reads
+# from it. Without it every process is its own owner, as before.
+role = WorkerRole() if SHARED_STATE else None
+IS_OWNER = role is None or role.try_acquire()
 
 
 # ==============================
 # DEVICE REGISTRY
 # ==============================
-devices = {
-    "light_1": Light("light_1", "living_room"),
-    "fan_1": Fan("fan_1", "bedroom"),
-    "ac_1": AC("ac_1", "living_room"),
-}
+# SIM_SEED makes sensor dynamics reproducible (per-device streams)
+SIM_SEED = os.getenv("SIM_SEED")
+
+# DEVICE_INVENTORY: JSON or CSV file of device_id / device_type / room
+# (see devices/factory.py); defaults to the built-in three-device home
+DEVICE_INVENTORY = os.getenv("DEVICE_INVENTORY")
+
+devices = build_home(
+    load_inventory(DEVICE_INVENTORY) if DEVICE_INVENTORY else DEFAULT_HOME,
+    seed=SIM_SEED
+)
+
+# Vectorized, seeded sensor models (diurnal temperature, occupancy
+# chains); SENSOR_ENGINE=legacy keeps each device's own random walk
+sensor_engine = (
+    None if os.getenv("SENSOR_ENGINE") == "legacy"
+    else SensorEngine.for_devices(devices, seed=SIM_SEED)
+)
+
+# TRACE_PATH records live sensor readings for later replay (engine.replay)
+TRACE_PATH = os.getenv("TRACE_PATH")
+
+
+# ==============================
+# AUTOMATION LOG SPILL
+# ==============================
+# Entries past the in-memory window go to rotating segment files
+# instead of being dropped. AUTOMATION_LOG_DIR="" keeps memory only.
+AUTOMATION_LOG_DIR = os.getenv("AUTOMATION_LOG_DIR", "data/automation_logs")
+
+
+def spill_automation_logs():
+    # Only the simulator owner writes segments
+    if not AUTOMATION_LOG_DIR:
+        return
+    max_age_hours = os.getenv("AUTOMATION_LOG_MAX_AGE_HOURS", "72")
+    configure_spill(
+        AUTOMATION_LOG_DIR,
+        segment_bytes=int(os.getenv("AUTOMATION_LOG_SEGMENT_MB", "16")) * 1024 * 1024,
+        max_bytes=int(os.getenv("AUTOMATION_LOG_MAX_MB", "512")) * 1024 * 1024,
+        max_age=float(max_age_hours) * 3600 if max_age_hours else None
+    )
+
+
+if IS_OWNER:
+    spill_automation_logs()
 
 
 # ==============================
@@ -33,14 +118,50 @@ rules = load_rules("rules/rules.json", devices)
 rule_engine = RuleEngine(rules)
 
 
+# ==============================
+# ENERGY TIME-SERIES STORE
+# ==============================
+energy_store = EnergyStore(
+    os.getenv("ENERGY_STORE_DIR", "data/energy"),
+    read_only=not IS_OWNER
+)
+
+
 # ==============================
 # SIMULATOR ENGINE
 # ==============================
 simulator = SimulatorEngine(
     devices=devices,
     rule_engine=rule_engine,
+    tick_seconds=float(os.getenv("TICK_SECONDS", "15")),
+    energy_store=energy_store,
+    checkpoint=CheckpointWriter(
+        os.getenv("CHECKPOINT_PATH", "data/simulator.ckpt"),
+        every_ticks=int(os.getenv("CHECKPOINT_EVERY", "1"))
+    ),
+    sensor_source=sensor_engine,
+    recorder=TraceRecorder(seed=SIM_SEED) if TRACE_PATH else None,
+    publisher=StatePublisher(
+        compress=os.getenv("STATE_GZIP", "1") != "0",
+        shared=SharedStateWriter() if role and IS_OWNER else None
+    ),
+    training_log=TrainingLog() if IS_OWNER else None,
 )
 
+# Periodic background retraining from the recorded history
+# (RETRAIN_EVERY_TICKS=0 turns it off; see ml/training.py)
+if IS_OWNER and RETRAIN_EVERY_TICKS:
+    simulator.retrainer = Retrainer(simulator.predictor, simulator.training_log)
+
+# Resume day/hour, devices, energy counters and mode after a redeploy
+if IS_OWNER:
+    simulator.restore_from_checkpoint()
+
+# ENGINE_MODE=async: the tick loop is an asyncio task on the app's
+# event loop (CPU phases in an executor, async HTTP); default is the
+# simulator daemon thread
+runner = AsyncEngineRunner(simulator) if ENGINE_MODE == "async" else None
+
 
 # ==============================
 # API ROUTES
@@ -52,19 +173,78 @@ attach_routes(
     devices=devices,
     rule_engine=rule_engine,
     predictor=simulator.predictor,  # ✅ single source of truth
-    engine=simulator                # ✅ REQUIRED for mode toggle
+    engine=simulator,               # ✅ REQUIRED for mode toggle
+    role=role
 )
 
 app.include_router(router)
 
 
 # ==============================
-# STARTUP HOOK (RENDER SAFE)
+# STARTUP / SHUTDOWN (RENDER SAFE)
 # ==============================
-@app.on_event("startup")
-def start_simulator():
+def start_engine():
+    if runner is not None:
+        runner.start()
+    else:
+        simulator.start()
+
+
+def start_simulator(loop):
+    if role is None or role.is_owner:
+        start_engine()
+    else:
+        role.watch(lambda: promote_to_owner(loop))
+
+
+def promote_to_owner(loop):
     """
-    Start the simulator exactly once when the app boots.
-    REQUIRED for Render / production deployment.
+    The previous owner exited: resume from its checkpoint and take over
+    the simulator and the shared segment.
     """
-    simulator.start()
+    simulator.energy_store = EnergyStore(os.getenv("ENERGY_STORE_DIR", "data/energy"))
+    simulator.training_log = TrainingLog()
+    spill_automation_logs()
+    if RETRAIN_EVERY_TICKS:
+        simulator.retrainer = Retrainer(simulator.predictor, simulator.training_log)
+    simulator.restore_from_checkpoint()
+    simulator.publisher.shared = SharedStateWriter()
+    simulator.publish_state()
+    # Called from the election thread; the async runner needs the loop
+    loop.call_soon_threadsafe(start_engine)
+
+
+# Shutdown waits this long for the in-flight tick before checkpointing
+SHUTDOWN_TICK_TIMEOUT = float(os.getenv("SHUTDOWN_TICK_TIMEOUT", "30"))
+
+
+def checkpoint_simulator():
+    """
+    Persist the latest state before the process exits (redeploys).
+    """
+    if role is not None and not role.is_owner:
+        shutdown_logging()
+        return
+
+    # Thread mode: nothing may tick while the final state is captured
+    # (the async runner was already stopped by the lifespan)
+    if runner is None and not simulator.stop(timeout=SHUTDOWN_TICK_TIMEOUT):
+        log.warning("simulator tick still running after %ss; checkpointing anyway", SHUTDOWN_TICK_TIMEOUT)
+
+    if simulator.checkpoint:
+        simulator.checkpoint.submit(simulator.export_state())
+        simulator.checkpoint.close()
+
+    if simulator.recorder:
+        simulator.recorder.save(TRACE_PATH)
+
+    if simulator.training_log:
+        simulator.training_log.flush()
+
+    close_spill()
+
+    if role is not None:
+        simulator.publisher.shared.close()
+        role.release()
+
+    shutdown_logging()
@@ -13,9 +13,29 @@ class EnergyPredictor:
     def __init__(self):
         self.model = joblib.load(MODEL_PATH)
 
+        # 0 = the shipped model; retrained versions come from ml.training
+        self.version = 0
+
+    def swap(self, model, version: int):
+        """
+        Replace the live model. A single reference assignment, so a
+        prediction in flight finishes on the model it started with.
+        """
+        self.model, self.version = model, version
+
     def predict(self, state: dict) -> float:
         """
         state: aggregated simulator state
         """
         df = pd.DataFrame([state])
         return float(self.model.predict(df)[0])
+
+    def predict_many(self, states: list) -> list:
+        """
+        Score many aggregated states with a single model call.
+        """
+        if not states:
+            return []
+        # Mixed bool/int columns across rows would become object dtype
+        df = pd.DataFrame(states).astype(float)
+        return [float(v) for v in self.model.predict(df)]
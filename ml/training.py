@@ -0,0 +1,406 @@
+import os
+import csv
+import json
+import math
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+
+from automation.log_store import add_log
+from engine.logging_setup import get_logger
+from ml.predictor import MODEL_PATH
+
+log = get_logger("ml")
+
+
+# ==============================
+# CONFIG (ENV)
+# ==============================
+# TRAINING_DATA          CSV of (features, observed kWh) rows, one per tick
+# RETRAIN_EVERY_TICKS    retrain this often (0 disables retraining)
+# RETRAIN_MIN_ROWS       don't train on less history than this
+# RETRAIN_MAX_ROWS       train on at most the latest N rows
+# RETRAIN_MIN_IMPROVEMENT  candidate must beat the live model's holdout
+#                        MAE by this fraction to be swapped in
+# RETRAIN_MAX_SCALE_DRIFT  refuse to swap when the labels' mean is off the
+#                        live model's mean prediction by more than this
+#                        fraction (the ml_policy thresholds would move)
+# MODEL_VERSIONS_DIR     versioned model files + manifest.json
+TRAINING_DATA = os.getenv("TRAINING_DATA", "data/training/rows.csv")
+RETRAIN_EVERY_TICKS = int(os.getenv("RETRAIN_EVERY_TICKS", "168"))
+RETRAIN_MIN_ROWS = int(os.getenv("RETRAIN_MIN_ROWS", "200"))
+RETRAIN_MAX_ROWS = int(os.getenv("RETRAIN_MAX_ROWS", "50000"))
+RETRAIN_MIN_IMPROVEMENT = float(os.getenv("RETRAIN_MIN_IMPROVEMENT", "0.02"))
+RETRAIN_MAX_SCALE_DRIFT = float(os.getenv("RETRAIN_MAX_SCALE_DRIFT", "0.25"))
+MODEL_VERSIONS_DIR = os.getenv("MODEL_VERSIONS_DIR", "data/models")
+
+# Same columns, same order as the shipped model was trained on
+FEATURES = (
+    "hour_of_day",
+    "ambient_temperature",
+    "occupancy",
+    "ac_power",
+    "set_temperature",
+    "total_current_load",
+    "cumulative_energy",
+)
+LABEL = "observed_kwh"
+
+# Latest rows held out (in time order) to compare candidate vs live
+VALIDATION_FRACTION = 0.2
+
+
+# ==============================
+# DATASET (TICK THREAD)
+# ==============================
+class TrainingLog:
+    """
+    Appends one labelled row per tick: the home feature row the model
+    scored, and the kWh the home then used over that simulated hour.
+
+    The label comes from the engine's own energy accounting (the tick's
+    growth in total_kwh, which update_energy() integrates over
+    tick_seconds), scaled to the simulated hour the tick stands for.
+
+    Rows are buffered and appended in small batches. Once the file
+    holds max_rows it is rotated to <path>.1 (replacing the older one),
+    so a training run never reads more than 2 × max_rows.
+    """
+
+    def __init__(self, path=TRAINING_DATA, flush_every=24, max_rows=RETRAIN_MAX_ROWS):
+        self.path = path
+        self.flush_every = flush_every
+        self.max_rows = max_rows
+        self.rows = 0
+        self._pending = []
+        self._last_total = None
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._file_rows = 0
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                self._file_rows = max(sum(1 for _ in f) - 1, 0)
+
+    def record(self, features, devices, tick_seconds: float):
+        """
+        Called once per tick, after update_energy(); features is None
+        on ticks nothing was scored (the energy baseline still moves).
+        """
+        total = sum(d.energy["total_kwh"] for d in devices.values())
+        previous, self._last_total = self._last_total, total
+        if features is None or previous is None or total < previous:
+            return
+
+        row = [float(features[name]) for name in FEATURES]
+        row.append((total - previous) * 3600 / tick_seconds)
+
+        with self._lock:
+            self._pending.append(row)
+            self.rows += 1
+            if len(self._pending) >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        new_file = not os.path.exists(self.path)
+        with open(self.path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(FEATURES + (LABEL,))
+            writer.writerows(self._pending)
+
+        self._file_rows += len(self._pending)
+        self._pending = []
+
+        if self._file_rows >= self.max_rows:
+            os.replace(self.path, self.path + ".1")
+            self._file_rows = 0
+
+    def paths(self):
+        """
+        Files holding the recorded rows, oldest first.
+        """
+        return [p for p in (self.path + ".1", self.path) if os.path.exists(p)]
+
+
+# ==============================
+# TRAINING (SEPARATE PROCESS)
+# ==============================
+def train_candidate(dataset_paths, live_model_path, out_path,
+                    min_rows=RETRAIN_MIN_ROWS, max_rows=RETRAIN_MAX_ROWS,
+                    max_scale_drift=RETRAIN_MAX_SCALE_DRIFT):
+    """
+    Runs in a child process: fit a candidate with the live model's
+    hyper-parameters on the older rows, score both on the newest
+    VALIDATION_FRACTION, and save the candidate to out_path.
+    Returns plain metrics (the caller decides whether to swap); an
+    "error" when the labels aren't on the live model's scale.
+    """
+    try:
+        os.nice(10)     # leave the CPU to the tick and the API
+    except OSError:
+        pass
+
+    import numpy as np
+    import pandas as pd
+
+    if not dataset_paths:
+        return {"rows": 0, "error": "no history recorded yet"}
+
+    frame = pd.concat([pd.read_csv(path) for path in dataset_paths]).tail(max_rows)
+    if len(frame) < min_rows:
+        return {"rows": len(frame), "error": f"need at least {min_rows} rows"}
+
+    split = int(len(frame) * (1 - VALIDATION_FRACTION))
+    train, holdout = frame.iloc[:split], frame.iloc[split:]
+    if len(train) == 0 or len(holdout) == 0:
+        return {"rows": len(frame), "error": "not enough rows to split"}
+
+    live = joblib.load(live_model_path)
+    truth = holdout[LABEL].to_numpy()
+    live_predictions = live.predict(holdout[list(FEATURES)])
+
+    # A candidate fitted to labels on another scale "wins" on MAE and
+    # silently changes what the ml_policy thresholds mean
+    scale = float(np.mean(truth) / np.mean(live_predictions)) if np.mean(live_predictions) else math.inf
+    if abs(scale - 1) > max_scale_drift:
+        return {
+            "rows": len(frame),
+            "label_scale": round(scale, 3),
+            "error": (
+                f"labels average {scale:.2f}x the live model's predictions; "
+                "not retraining onto a different target scale"
+            ),
+        }
+
+    candidate = live.__class__(**live.get_params())
+
+    started = time.perf_counter()
+    candidate.fit(train[list(FEATURES)], train[LABEL])
+    train_seconds = time.perf_counter() - started
+
+    live_mae = float(np.mean(np.abs(live_predictions - truth)))
+    candidate_mae = float(np.mean(np.abs(candidate.predict(holdout[list(FEATURES)]) - truth)))
+
+    tmp = out_path + ".tmp"
+    joblib.dump(candidate, tmp)
+    os.replace(tmp, out_path)
+
+    return {
+        "rows": len(frame),
+        "train_rows": len(train),
+        "holdout_rows": len(holdout),
+        "label_scale": round(scale, 3),
+        "live_mae": round(live_mae, 6),
+        "candidate_mae": round(candidate_mae, 6),
+        "train_seconds": round(train_seconds, 3),
+    }
+
+
+# ==============================
+# VERSIONS
+# ==============================
+class ModelVersions:
+    """
+    manifest.json under `root`: every accepted model version with its
+    metrics, and the activation history (last entry = active).
+    Version 0 is the shipped models/energy_predictor.pkl.
+    """
+
+    def __init__(self, root=MODEL_VERSIONS_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        os.makedirs(root, exist_ok=True)
+
+        self.manifest = {"versions": {"0": {"path": MODEL_PATH}}, "history": [0]}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    @property
+    def active(self) -> int:
+        return self.manifest["history"][-1]
+
+    def next_version(self) -> int:
+        return max(int(v) for v in self.manifest["versions"]) + 1
+
+    def path(self, version: int) -> str:
+        return os.path.join(self.root, f"energy_predictor-v{version}.pkl")
+
+    def model_path(self, version: int) -> str:
+        return self.manifest["versions"][str(version)]["path"]
+
+    def add(self, version: int, metrics: dict):
+        self.manifest["versions"][str(version)] = {
+            "path": self.path(version),
+            "created": time.time(),
+            **metrics,
+        }
+        self.activate(version)
+
+    def activate(self, version: int):
+        self.manifest["history"].append(version)
+        self._save()
+
+    def previous(self):
+        history = self.manifest["history"]
+        return history[-2] if len(history) > 1 else None
+
+    def pop(self):
+        self.manifest["history"].pop()
+        self._save()
+
+    def _save(self):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+
+# ==============================
+# SCHEDULING + HOT-SWAP
+# ==============================
+class Retrainer:
+    """
+    Every `every_ticks` ticks, trains a candidate in a child process
+    from the TrainingLog. A candidate that beats the live model on the
+    holdout is saved as a new version and swapped into the predictor;
+    rollback() re-activates the previous version.
+    """
+
+    def __init__(self, predictor, training_log, versions=None,
+                 every_ticks=RETRAIN_EVERY_TICKS, min_rows=RETRAIN_MIN_ROWS,
+                 min_improvement=RETRAIN_MIN_IMPROVEMENT,
+                 max_scale_drift=RETRAIN_MAX_SCALE_DRIFT):
+        self.predictor = predictor
+        self.training_log = training_log
+        self.versions = versions or ModelVersions()
+        self.every_ticks = every_ticks
+        self.min_rows = min_rows
+        self.min_improvement = min_improvement
+        self.max_scale_drift = max_scale_drift
+
+        self.running = False
+        self.last_result = None
+        self._lock = threading.Lock()
+
+        # Resume whichever version was active before a restart
+        if self.versions.active != 0:
+            self._load(self.versions.active)
+
+    def _load(self, version: int):
+        model = joblib.load(self.versions.model_path(version))
+        self.predictor.swap(model, version)
+
+    def on_tick(self, ticks: int):
+        if self.every_ticks and ticks % self.every_ticks == 0:
+            self.start()
+
+    def start(self) -> bool:
+        """
+        Kick off a training run; False if one is already running or
+        nothing has been recorded yet. Only claims the run: the CSV
+        flush and the process spawn happen on a launcher thread, so
+        this is cheap enough for the tick.
+        """
+        if not self.training_log.rows and not self.training_log.paths():
+            return False
+
+        with self._lock:
+            if self.running:
+                return False
+            self.running = True
+
+        threading.Thread(target=self._launch, name="retrain-launcher", daemon=True).start()
+        return True
+
+    def _launch(self):
+        version = self.versions.next_version()
+        try:
+            self.training_log.flush()
+            executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            future = executor.submit(
+                train_candidate,
+                self.training_log.paths(),
+                self.versions.model_path(self.predictor.version),
+                self.versions.path(version),
+                self.min_rows,
+                self.training_log.max_rows,
+                self.max_scale_drift
+            )
+        except Exception as e:
+            self._finish(None, version, None, error=str(e))
+            return
+        future.add_done_callback(lambda f: self._finish(f, version, executor))
+
+    def _finish(self, future, version, executor, error=None):
+        """
+        Runs on the executor's callback thread, never on the tick.
+        """
+        if executor is not None:
+            executor.shutdown(wait=False)
+        try:
+            metrics = future.result() if future is not None else {"error": error}
+        except Exception as e:
+            metrics = {"error": str(e)}
+
+        accepted = (
+            "error" not in metrics
+            and metrics["candidate_mae"] < metrics["live_mae"] * (1 - self.min_improvement)
+        )
+
+        with self._lock:
+            if accepted:
+                self.versions.add(version, metrics)
+                self._load(version)
+            elif os.path.exists(self.versions.path(version)):
+                os.remove(self.versions.path(version))
+
+            self.last_result = {"version": version, "accepted": accepted, **metrics}
+            self.running = False
+
+        log.info(
+            "retrain finished accepted=%s", accepted,
+            extra={"fields": self.last_result}
+        )
+        add_log({"type": "model_retrain", **self.last_result})
+
+    def rollback(self):
+        """
+        Re-activate the previously active version. Returns it, or None
+        when there is nothing to roll back to.
+        """
+        with self._lock:
+            previous = self.versions.previous()
+            if previous is None:
+                return None
+            self.versions.pop()
+            self._load(previous)
+
+        add_log({"type": "model_rollback", "version": previous})
+        return previous
+
+    def status(self) -> dict:
+        return {
+            "active_version": self.predictor.version,
+            "history": list(self.versions.manifest["history"]),
+            "versions": self.versions.manifest["versions"],
+            "training_rows": self.training_log.rows,
+            "running": self.running,
+            "last_result": self.last_result,
+        }
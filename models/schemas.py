@@ -1,6 +1,46 @@
-from pydantic import BaseModel
-from typing import Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Dict, Any, List, Optional
 
 class Command(BaseModel):
     action: str
     payload: Dict[str, Any]
+
+
+class DeviceCommand(Command):
+    # A Command aimed at one device; the action value, if it takes
+    # one, travels as payload["value"] (ON / OFF may omit the payload)
+    device_id: str
+    payload: Dict[str, Any] = Field(default_factory=dict)
+
+
+class CommandBatch(BaseModel):
+    commands: List[DeviceCommand]
+    # Apply nothing if any command fails validation
+    atomic: bool = False
+
+
+class WhatIfFeatures(BaseModel):
+    # The model's feature row (ml.training.FEATURES); anything else
+    # is a 422 instead of a failed predict
+    model_config = ConfigDict(extra="forbid")
+
+    hour_of_day: Optional[float] = None
+    ambient_temperature: Optional[float] = None
+    occupancy: Optional[float] = None
+    ac_power: Optional[float] = None
+    set_temperature: Optional[float] = None
+    total_current_load: Optional[float] = None
+    cumulative_energy: Optional[float] = None
+
+
+class WhatIfRow(BaseModel):
+    # Simulated hour; defaults to the current wall-clock hour
+    hour_of_day: Optional[int] = None
+    # device_id → snapshot fields overriding (or adding to) live state
+    devices: Optional[Dict[str, Dict[str, Any]]] = None
+    # ML feature overrides; missing features are derived from devices
+    features: Optional[WhatIfFeatures] = None
+
+
+class WhatIfRequest(BaseModel):
+    rows: List[WhatIfRow]
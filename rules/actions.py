@@ -10,8 +10,8 @@ def create_action(action_block, devices):
             return None
 
         if action_type == "SET_STATE":
-            device.apply_state(payload)
-            return payload  # ✅ RETURN WHAT WAS APPLIED
+            # Applied by the simulator (the single writer), not here
+            return dict(payload)
 
         return None
 
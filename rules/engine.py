@@ -1,3 +1,9 @@
+import os
+
+from automation.log_store import add_log
+from rules.optimizer import IntervalLookup, RuleSetAnalysis
+
+
 class DecisionContext:
     def __init__(self):
         self.actions = {}
@@ -14,31 +20,246 @@ class DecisionContext:
         })
 
 
+# RULES_VERIFY=1 re-runs a full evaluation every tick and compares
+RULES_VERIFY = os.getenv("RULES_VERIFY", "0") == "1"
+
+# Snapshot keys that override sensors/state (see BaseDevice.snapshot)
+_ENERGY_KEYS = {
+    "current_watts": "current_watts",
+    "cumulative_energy": "total_kwh",
+}
+
+
+def _input_value(device, key, prediction):
+    """
+    device.snapshot()[key] without building the snapshot.
+    """
+    if key == "predicted_energy":
+        return prediction
+    if key in _ENERGY_KEYS:
+        return device.energy[_ENERGY_KEYS[key]]
+    if key == "manual_override":
+        return device.manual_override
+    if key in device.state:
+        return device.state[key]
+    if key in device.sensors:
+        return device.sensors[key]
+    if key in ("device_id", "device_type", "room"):
+        return getattr(device, key)
+    return None
+
+
 class RuleEngine:
-    def __init__(self, rules):
+    def __init__(self, rules, incremental=True, verify=None):
         self.rules = sorted(
             rules,
             key=lambda r: r.priority,
             reverse=True
         )
 
-    def evaluate(self, devices, ml_prediction=None):
+        # Change-driven evaluation: a device is only re-run through the
+        # rules when one of the inputs its rules declare has changed
+        self.incremental = incremental
+        self.verify = RULES_VERIFY if verify is None else verify
+
+        self._cache = {}        # device_id → (input values, rule, payload)
+        self._watched = {}      # device_type → input keys (None = always)
+        self._signature = None  # enabled set the cache was built for
+        self._compiled = None   # (enabled set, RuleSetAnalysis)
+
+        self.stats = {"evaluated": 0, "skipped": 0, "mismatches": 0}
+
+        report = self.analysis_report()
+        if report["dead"] or report["duplicates"] or report["contradictions"]:
+            add_log({"type": "rule_analysis", **report})
+
+    def _enabled_signature(self):
+        return tuple((id(rule), rule.enabled) for rule in self.rules)
+
+    def _analysis(self, signature=None):
+        """
+        Analysis (and compiled plans) of the enabled rules, rebuilt when
+        rules are enabled / disabled. Swapped in as one pair, so API
+        threads can use it without touching the tick thread's cache.
+        """
+        signature = signature or self._enabled_signature()
+        compiled = self._compiled
+        if compiled is None or compiled[0] != signature:
+            compiled = self._compiled = (signature, RuleSetAnalysis(self.rules))
+        return compiled[1]
+
+    def analysis_report(self):
+        return self._analysis().report()
+
+    def _first_rule(self, snapshot, ml_prediction, analysis):
+        """
+        Highest-priority matching rule via the device type's compiled
+        plan (dead rules dropped, single-sensor numeric runs answered by
+        one bisect), or None.
+        """
+        for step in analysis.plan(snapshot.get("device_type")):
+            if isinstance(step, IntervalLookup):
+                rule = step.match(snapshot, ml_prediction)
+                if rule is not None:
+                    return rule
+            elif step.evaluate(snapshot, ml_prediction):
+                return step
+
+        return None
+
+    def _match(self, snapshot, ml_prediction, analysis):
+        """
+        (highest-priority matching rule, payload), or (None, None).
+        """
+        rule = self._first_rule(snapshot, ml_prediction, analysis)
+        if rule is None:
+            return None, None
+        return rule, rule.execute(snapshot)
+
+    def _match_linear(self, snapshot, ml_prediction, analysis=None):
+        """
+        Every enabled rule in priority order (the reference for _match).
+        """
+        for rule in self.rules:
+            if not rule.enabled:
+                continue
+
+            if rule.evaluate(snapshot, ml_prediction):
+                return rule, rule.execute(snapshot)
+
+        return None, None
+
+    def _inputs_for(self, device_type):
+        if device_type in self._watched:
+            return self._watched[device_type]
+
+        keys = set()
+        for rule in self.rules:
+            if not rule.enabled:
+                continue
+            if rule.device_type is not None and rule.device_type != device_type:
+                continue    # can never match this device
+            if rule.inputs is None:
+                keys = None
+                break
+            keys |= rule.inputs
+
+        keys = tuple(sorted(keys)) if keys is not None else None
+        self._watched[device_type] = keys
+        return keys
+
+    def evaluate(self, devices, ml_prediction=None, room_predictions=None):
+        """
+        room_predictions: optional room → prediction; each device's
+        rules see its own room's value (ml_prediction is the fallback).
+        """
+        if not self.incremental:
+            return self.evaluate_full(devices, ml_prediction, room_predictions)
+
+        # Enabling / disabling rules changes what every device watches
+        signature = self._enabled_signature()
+        if signature != self._signature:
+            self._cache.clear()
+            self._watched.clear()
+            self._signature = signature
+        analysis = self._analysis(signature)
+
         context = DecisionContext()
+        room_predictions = room_predictions or {}
+
+        for device in devices.values():
+            prediction = room_predictions.get(device.room, ml_prediction)
+
+            keys = self._inputs_for(device.device_type)
+            values = (
+                None if keys is None
+                else tuple(_input_value(device, key, prediction) for key in keys)
+            )
+
+            cached = self._cache.get(device.device_id)
+            if values is not None and cached is not None and cached[0] == values:
+                _, rule, payload = cached
+                self.stats["skipped"] += 1
+            else:
+                rule, payload = self._match(device.snapshot(), prediction, analysis)
+                self._cache[device.device_id] = (values, rule, payload)
+                self.stats["evaluated"] += 1
+
+            if rule is not None:
+                context.add(
+                    device.device_id,
+                    dict(payload) if payload is not None else None,
+                    rule
+                )
+
+        if len(self._cache) > len(devices):
+            for device_id in set(self._cache) - set(devices):
+                del self._cache[device_id]
+
+        if self.verify:
+            full = self.evaluate_full(devices, ml_prediction, room_predictions, linear=True)
+            if full != (context.actions, context.explanations):
+                self.stats["mismatches"] += 1
+                self._cache.clear()
+
+                add_log({
+                    "type": "rule_verify_mismatch",
+                    "incremental": context.actions,
+                    "full": full[0]
+                })
+                return full
+
+        return context.actions, context.explanations
+
+    def evaluate_full(self, devices, ml_prediction=None, room_predictions=None, linear=False):
+        """
+        Every device through the rules, no cache. linear=True skips the
+        compiled plans and walks every rule (the reference result).
+        """
+        analysis = self._analysis()
+        match = self._match_linear if linear else self._match
+
+        context = DecisionContext()
+        room_predictions = room_predictions or {}
 
         for device in devices.values():
             snapshot = device.snapshot()
+            prediction = room_predictions.get(device.room, ml_prediction)
+
+            rule, payload = match(snapshot, prediction, analysis)
+            if rule is not None:
+                context.add(
+                    snapshot["device_id"],
+                    payload,
+                    rule
+                )
 
-            for rule in self.rules:
-                if not rule.enabled:
-                    continue
+        return context.actions, context.explanations
 
-                if rule.evaluate(snapshot, ml_prediction):
-                    payload = rule.execute(snapshot)
+    def preview(self, batch):
+        """
+        Dry-run evaluation of many hypothetical states in one pass.
+
+        batch: iterable of (snapshots, ml_prediction) where snapshots
+        maps device_id → snapshot dict. Devices are never touched, and
+        neither are the incremental cache or stats (safe from API threads).
+        Returns a list of (actions, explanations), one per entry.
+        """
+        analysis = self._analysis()
+        results = []
+
+        for snapshots, ml_prediction in batch:
+            context = DecisionContext()
+
+            for snapshot in snapshots.values():
+                rule = self._first_rule(snapshot, ml_prediction, analysis)
+                if rule is not None:
                     context.add(
                         snapshot["device_id"],
-                        payload,
+                        rule.preview(),
                         rule
                     )
-                    break  # highest-priority rule per device
 
-        return context.actions, context.explanations
+            results.append((context.actions, context.explanations))
+
+        return results
@@ -8,6 +8,15 @@ def load_rules(path, devices):
     with open(path) as f:
         raw_rules = json.load(f)
 
+    return build_rules(raw_rules, devices)
+
+
+def build_rules(raw_rules, devices):
+    """
+    Rules from their JSON definitions. Conditions and actions are
+    closures over "when" / "then", so changing a rule means building
+    it again from its (edited) definition.
+    """
     rules = []
 
     for r in raw_rules:
@@ -65,7 +74,11 @@ def load_rules(path, devices):
                 priority=r["priority"],
                 enabled=r["enabled"],
                 condition=make_condition(when),
-                action=create_action(r["then"], devices)
+                action=create_action(r["then"], devices),
+                then=r["then"],
+                device_type=when["device_type"],
+                inputs={when["sensor"]},
+                when=when
             )
         )
 
@@ -0,0 +1,292 @@
+import math
+from bisect import bisect_left
+
+
+# ==============================
+# CONDITIONS AS INTERVALS
+# ==============================
+# A loaded rule's "when" block compares one sensor against a constant,
+# so ">", ">=", "<", "<=" and "==" on a number are each one interval:
+# (low, low_closed, high, high_closed). "!=" and non-numeric values
+# stay opaque (evaluated as-is, only checked for exact duplicates).
+INF = math.inf
+
+# Contradiction pairs reported per analysis (large sets can have many)
+MAX_REPORTED = 100
+
+
+def _numeric(value):
+    return isinstance(value, (int, float)) and not (isinstance(value, float) and math.isnan(value))
+
+
+def condition_interval(when):
+    if not when or not _numeric(when.get("value")):
+        return None
+
+    value = when["value"]
+    return {
+        ">": (value, False, INF, False),
+        ">=": (value, True, INF, False),
+        "<": (-INF, False, value, False),
+        "<=": (-INF, False, value, True),
+        "==": (value, True, value, True),
+    }.get(when.get("operator"))
+
+
+def _contains(interval, x):
+    low, low_closed, high, high_closed = interval
+    above = x > low or (low_closed and x == low)
+    below = x < high or (high_closed and x == high)
+    return above and below
+
+
+def _points(intervals):
+    return sorted({
+        bound
+        for low, _, high, _ in intervals
+        for bound in (low, high)
+        if bound not in (-INF, INF)
+    })
+
+
+def _pieces(points):
+    """
+    One representative value per elementary piece of the number line
+    cut at `points`: gap 0, point 0, gap 1, point 1, ..., gap n.
+    Every interval built from these bounds is uniform on each piece.
+    """
+    if not points:
+        yield "gap", 0, 0.0
+        return
+
+    yield "gap", 0, points[0] - 1
+    for i, point in enumerate(points):
+        yield "point", i, point
+        upper = points[i + 1] if i + 1 < len(points) else point + 2
+        yield "gap", i + 1, (point + upper) / 2
+
+
+def _covered(interval, others):
+    """
+    True when every value in `interval` lies in at least one of `others`.
+    """
+    if not others:
+        return False
+    for _, _, x in _pieces(_points([interval, *others])):
+        if _contains(interval, x) and not any(_contains(o, x) for o in others):
+            return False
+    return True
+
+
+def _overlap(a, b):
+    return any(
+        _contains(a, x) and _contains(b, x)
+        for _, _, x in _pieces(_points([a, b]))
+    )
+
+
+# ==============================
+# INTERVAL LOOKUP (HOT PATH)
+# ==============================
+class IntervalLookup:
+    """
+    A run of consecutive rules (in priority order) that all compare the
+    same sensor against a number, collapsed into one bisect: the sensor
+    value picks its elementary piece, which already knows the first
+    rule of the run that matches there.
+    """
+
+    def __init__(self, sensor, rules):
+        self.sensor = sensor
+        self.rules = rules
+
+        intervals = [condition_interval(rule.when) for rule in rules]
+        self.points = _points(intervals)
+        self.point_rules = [None] * len(self.points)
+        self.gap_rules = [None] * (len(self.points) + 1)
+
+        for kind, i, x in _pieces(self.points):
+            winner = next(
+                (rule for rule, interval in zip(rules, intervals) if _contains(interval, x)),
+                None
+            )
+            (self.point_rules if kind == "point" else self.gap_rules)[i] = winner
+
+    def match(self, snapshot, ml_prediction=None):
+        # Same inputs as the loader's condition closures
+        if self.sensor == "predicted_energy":
+            value = ml_prediction
+        else:
+            value = snapshot.get(self.sensor)
+        if value is None or value != value:     # missing / NaN: no match
+            return None
+
+        i = bisect_left(self.points, value)
+        if i < len(self.points) and self.points[i] == value:
+            return self.point_rules[i]
+        return self.gap_rules[i]
+
+
+# ==============================
+# ANALYSIS
+# ==============================
+def _same_condition(a, b):
+    return (
+        a.when is not None and b.when is not None
+        and a.device_type == b.device_type
+        and a.when.get("sensor") == b.when.get("sensor")
+        and a.when.get("operator") == b.when.get("operator")
+        and a.when.get("value") == b.when.get("value")
+    )
+
+
+def _conflicting_keys(a, b):
+    left = (a.then or {}).get("payload") or {}
+    right = (b.then or {}).get("payload") or {}
+    return sorted(key for key in left.keys() & right.keys() if left[key] != right[key])
+
+
+class RuleSetAnalysis:
+    """
+    Load-time pass over the enabled rules (already in priority order):
+
+    - dead: can never be the first match, because earlier rules on the
+      same device_type and sensor already cover its whole condition
+      (or an earlier rule has the identical condition)
+    - duplicates: identical condition and identical action
+    - contradictions: overlapping conditions on the same sensor that
+      set the same key to different values (resolved by priority, or
+      only by file order when priorities are equal)
+    - plans: per device_type, the live rules that can apply, with runs
+      on one numeric sensor merged into IntervalLookups
+    """
+
+    def __init__(self, rules):
+        self.rules = [rule for rule in rules if rule.enabled]
+        self.dead = {}              # rule_id → [shadowing rule_ids]
+        self.duplicates = []
+        self.contradictions = []
+        self.plans = {}
+
+        self._find_dead_and_duplicates()
+        self._find_contradictions()
+
+        self.live = [rule for rule in self.rules if rule.rule_id not in self.dead]
+        for device_type in {rule.device_type for rule in self.live if rule.device_type is not None}:
+            self.plans[device_type] = self._plan(device_type)
+        self._generic = self._plan(None)
+
+    def _find_dead_and_duplicates(self):
+        for i, rule in enumerate(self.rules):
+            if rule.device_type is None or rule.when is None:
+                continue
+            earlier = [
+                other for other in self.rules[:i]
+                if other.device_type == rule.device_type and other.when is not None
+            ]
+
+            identical = [other for other in earlier if _same_condition(other, rule)]
+            for other in identical:
+                if other.then == rule.then:
+                    self.duplicates.append([other.rule_id, rule.rule_id])
+            if identical:
+                self.dead[rule.rule_id] = [other.rule_id for other in identical]
+                continue
+
+            interval = condition_interval(rule.when)
+            if interval is None:
+                continue
+
+            sensor = rule.when.get("sensor")
+            shadows = [
+                (other, condition_interval(other.when))
+                for other in earlier
+                if other.when.get("sensor") == sensor and condition_interval(other.when)
+            ]
+            if _covered(interval, [iv for _, iv in shadows]):
+                self.dead[rule.rule_id] = [
+                    other.rule_id for other, iv in shadows if _overlap(interval, iv)
+                ]
+
+    def _find_contradictions(self):
+        for i, rule in enumerate(self.rules):
+            interval = condition_interval(rule.when)
+            if interval is None:
+                continue
+            for other in self.rules[i + 1:]:
+                if len(self.contradictions) >= MAX_REPORTED:
+                    return
+                if other.device_type != rule.device_type or other.when is None:
+                    continue
+                if other.when.get("sensor") != rule.when.get("sensor"):
+                    continue
+                other_interval = condition_interval(other.when)
+                if other_interval is None or not _overlap(interval, other_interval):
+                    continue
+
+                keys = _conflicting_keys(rule, other)
+                if keys:
+                    self.contradictions.append({
+                        "rules": [rule.rule_id, other.rule_id],
+                        "device_type": rule.device_type,
+                        "sensor": rule.when["sensor"],
+                        "keys": keys,
+                        "resolved_by": (
+                            "priority" if rule.priority != other.priority else "file order"
+                        ),
+                    })
+
+    def _plan(self, device_type):
+        """
+        Live rules that can match this device type, in priority order;
+        consecutive numeric rules on the same sensor become one lookup.
+        """
+        steps = []
+        run = []
+
+        def close_run():
+            if len(run) > 1:
+                steps.append(IntervalLookup(run[0].when["sensor"], list(run)))
+            else:
+                steps.extend(run)
+            run.clear()
+
+        for rule in self.live:
+            if rule.device_type is not None and rule.device_type != device_type:
+                continue
+            mergeable = rule.device_type is not None and condition_interval(rule.when) is not None
+            if run and not (mergeable and rule.when["sensor"] == run[0].when["sensor"]):
+                close_run()
+            if mergeable:
+                run.append(rule)
+            else:
+                steps.append(rule)
+        close_run()
+
+        return steps
+
+    def plan(self, device_type):
+        return self.plans.get(device_type, self._generic)
+
+    def report(self):
+        return {
+            "rules": len(self.rules),
+            "live": len(self.live),
+            "dead": [
+                {"rule_id": rule_id, "shadowed_by": shadowed_by}
+                for rule_id, shadowed_by in self.dead.items()
+            ],
+            "duplicates": self.duplicates,
+            "contradictions": self.contradictions,
+            "lookups": [
+                {
+                    "device_type": device_type,
+                    "sensor": step.sensor,
+                    "rules": [rule.rule_id for rule in step.rules],
+                    "breakpoints": len(step.points),
+                }
+                for device_type, steps in sorted(self.plans.items())
+                for step in steps
+                if isinstance(step, IntervalLookup)
+            ],
+        }
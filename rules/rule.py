@@ -6,7 +6,11 @@ class Rule:
         priority,
         enabled,
         condition,
-        action
+        action,
+        then=None,
+        device_type=None,
+        inputs=None,
+        when=None
     ):
         self.rule_id = rule_id
         self.description = description
@@ -15,9 +19,30 @@ class Rule:
         self.condition = condition
         self.action = action
 
+        # Declarative action block ({"action": ..., "payload": ...}),
+        # when the rule was loaded from JSON. Enables dry runs.
+        self.then = then
+
+        # What the condition reads: the device type it applies to and
+        # the snapshot keys / "predicted_energy" it looks at. None means
+        # unknown, so the engine can never skip it.
+        self.device_type = device_type
+        self.inputs = frozenset(inputs) if inputs is not None else None
+
+        # Declarative condition block ({"sensor", "operator", "value"}),
+        # when loaded from JSON. Lets the rule set be analyzed statically.
+        self.when = when
+
     def evaluate(self, snapshot, ml_prediction=None):
         return self.condition(snapshot, ml_prediction)
 
     def execute(self, snapshot):
         return self.action(snapshot)
 
+    def preview(self):
+        """
+        Payload this rule would apply, without touching any device.
+        """
+        if self.then and self.then.get("action") == "SET_STATE":
+            return dict(self.then.get("payload", {}))
+        return None
@@ -0,0 +1,156 @@
+import os
+import zlib
+import pickle
+import struct
+import threading
+
+from automation.log_store import add_log
+
+
+# ==============================
+# FILE FORMAT
+# ==============================
+# magic (4) | format version (u16) | crc32 of body (u32) | body length (u32)
+# body = zlib(pickle(engine state))
+
+MAGIC = b"SHCK"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHII")
+
+
+def encode_checkpoint(state: dict) -> bytes:
+    body = zlib.compress(
+        pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL),
+        level=1
+    )
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, zlib.crc32(body), len(body)) + body
+
+
+def decode_checkpoint(blob: bytes) -> dict:
+    if len(blob) < _HEADER.size:
+        raise ValueError("Checkpoint truncated")
+
+    magic, version, crc, length = _HEADER.unpack_from(blob)
+    body = blob[_HEADER.size:_HEADER.size + length]
+
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Not a simulator checkpoint")
+    if len(body) != length or zlib.crc32(body) != crc:
+        raise ValueError("Checkpoint corrupted")
+
+    return pickle.loads(zlib.decompress(body))
+
+
+def write_checkpoint(path: str, state: dict):
+    """
+    Atomically replace `path`: write a temp file in the same
+    directory, fsync it, then rename over the old checkpoint.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_checkpoint(state))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def load_checkpoint(path: str):
+    """
+    Returns the decoded engine state, or None when there is no
+    usable checkpoint (first boot, torn or foreign file).
+    """
+    try:
+        with open(path, "rb") as f:
+            return decode_checkpoint(f.read())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        add_log({
+            "type": "checkpoint_error",
+            "path": path,
+            "error": str(e)
+        })
+        return None
+
+
+# ==============================
+# BACKGROUND WRITER
+# ==============================
+class CheckpointWriter:
+    """
+    Writes checkpoints off the tick thread.
+
+    The tick only hands over an already-captured state dict; encoding,
+    compression and disk I/O happen on a dedicated thread. If the disk
+    falls behind, older pending states are dropped in favour of the
+    newest one.
+    """
+
+    def __init__(self, path: str, every_ticks: int = 1):
+        self.path = path
+        self.every_ticks = max(int(every_ticks), 1)
+        self.written = 0
+
+        self._pending = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def load(self):
+        return load_checkpoint(self.path)
+
+    def submit(self, state: dict):
+        with self._cond:
+            self._pending = state
+            self._cond.notify()
+
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run,
+                name="checkpoint-writer",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+
+                if self._pending is None:
+                    return
+
+                state, self._pending = self._pending, None
+
+            try:
+                write_checkpoint(self.path, state)
+                self.written += 1
+            except Exception as e:
+                add_log({
+                    "type": "checkpoint_error",
+                    "path": self.path,
+                    "error": str(e)
+                })
+
+    def close(self):
+        """
+        Flush the last pending state and stop the writer thread.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+        if self._thread is not None:
+            self._thread.join()
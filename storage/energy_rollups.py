@@ -0,0 +1,148 @@
+from array import array
+from functools import partial
+
+
+# Rollup dimensions; every device contributes to one key of each
+DIMENSIONS = ("room", "type")
+
+
+class EnergyRollups:
+    """
+    Running kWh per room and per device type for the current simulated
+    day, updated in O(1) from each device's update_energy() (via the
+    energy_sink installed by attach()).
+
+    Each (dimension, value) pair owns a fixed slot, so the open day is
+    a flat list of floats. When the day rolls over it is frozen into
+    an array('d') in `history`, one compact row per finished day.
+    """
+
+    def __init__(self, day: int = 1):
+        self.day = day
+        self.slots = {}         # (dimension, value) → slot
+        self.keys = []          # slot → (dimension, value)
+        self.today = []         # slot → kWh for self.day
+        self.today_total = 0.0
+        self.history = {}       # day → (array('d') per slot, total)
+
+    def _slot(self, key):
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = len(self.keys)
+            self.keys.append(key)
+            self.today.append(0.0)
+        return slot
+
+    def attach(self, devices):
+        """
+        Point every device's energy_sink at its room and type slots.
+        """
+        for device in devices.values():
+            device.energy_sink = partial(
+                self._add,
+                self._slot(("room", device.room)),
+                self._slot(("type", device.device_type))
+            )
+
+    def _add(self, room_slot, type_slot, kwh):
+        today = self.today
+        today[room_slot] += kwh
+        today[type_slot] += kwh
+        self.today_total += kwh
+
+    # ==============================
+    # DAY ROLLOVER
+    # ==============================
+    def roll(self, day: int):
+        """
+        Freeze the open day once the simulator has moved past it.
+        """
+        if day == self.day:
+            return
+        self.history[self.day] = (array("d", self.today), self.today_total)
+        self.today = [0.0] * len(self.keys)
+        self.today_total = 0.0
+        self.day = day
+
+    # ==============================
+    # QUERIES
+    # ==============================
+    def _row(self, day):
+        if day == self.day:
+            return self.today, self.today_total
+        return self.history.get(day)
+
+    def by(self, dimension: str, day: int = None):
+        """
+        {value: kWh} for one dimension on one day (default: the open
+        day), plus the day's total; None for a day never recorded.
+        """
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension must be one of {', '.join(DIMENSIONS)}")
+
+        day = self.day if day is None else day
+        row = self._row(day)
+        if row is None:
+            return None
+
+        values, total = row
+        return {
+            "day": day,
+            "frozen": day != self.day,
+            "total_kwh": total,
+            dimension: {
+                value: values[slot] if slot < len(values) else 0.0
+                for slot, (dim, value) in enumerate(self.keys)
+                if dim == dimension
+            },
+        }
+
+    def days(self, dimension: str, start_day: int = None, end_day: int = None):
+        """
+        by() for every recorded day in start_day..end_day (inclusive).
+        """
+        recorded = sorted(self.history)
+        recorded.append(self.day)
+        return [
+            self.by(dimension, day)
+            for day in recorded
+            if (start_day is None or day >= start_day)
+            and (end_day is None or day <= end_day)
+        ]
+
+    # ==============================
+    # CHECKPOINTING
+    # ==============================
+    def export_state(self):
+        return {
+            "day": self.day,
+            "keys": list(self.keys),
+            "today": list(self.today),
+            "today_total": self.today_total,
+            "history": {
+                day: (values.tobytes(), total)
+                for day, (values, total) in self.history.items()
+            },
+        }
+
+    def restore_state(self, data: dict):
+        """
+        Restore totals; slots of devices attached since the checkpoint
+        are kept (at zero), so attach() must have run first.
+        """
+        remap = [self._slot(tuple(key)) for key in data["keys"]]
+
+        self.day = data["day"]
+        self.today = [0.0] * len(self.keys)
+        for old, kwh in enumerate(data["today"]):
+            self.today[remap[old]] = kwh
+        self.today_total = data["today_total"]
+
+        self.history = {}
+        for day, (raw, total) in data["history"].items():
+            old_values = array("d")
+            old_values.frombytes(raw)
+            values = array("d", bytes(8 * len(self.keys)))
+            for old, kwh in enumerate(old_values):
+                values[remap[old]] = kwh
+            self.history[day] = (values, total)
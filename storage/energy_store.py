@@ -0,0 +1,491 @@
+import os
+import math
+import threading
+
+import numpy as np
+
+
+# ==============================
+# ON-DISK LAYOUT
+# ==============================
+# <root>/<device_id>/readings/<column>.bin   one row per tick
+# <root>/<device_id>/hourly/<column>.bin     closed hourly buckets
+# <root>/<device_id>/daily/<column>.bin      closed daily buckets
+#
+# Every column is a flat, fixed-width little-endian array, so a
+# column file can be memory-mapped and sliced without parsing.
+
+READING_COLUMNS = {
+    "hour": "<i8",                  # absolute simulated hour
+    "watts": "<f4",
+    "kwh": "<f8",                   # energy consumed during the tick
+    "total_kwh": "<f8",
+    "ambient_temperature": "<f4",   # NaN when the device has no sensor
+    "occupancy": "<i1",             # -1 unknown, 0 empty, 1 occupied
+    "power": "<i1",                 # 0 OFF, 1 ON
+}
+
+ROLLUP_COLUMNS = {
+    "bucket": "<i8",                # absolute hour (hourly) or day (daily)
+    "samples": "<i4",
+    "kwh": "<f8",
+    "watts_sum": "<f8",
+    "watts_max": "<f4",
+    "temp_sum": "<f8",
+    "temp_samples": "<i4",
+    "occupied": "<i4",
+    "on": "<i4",
+}
+
+GRANULARITIES = ("hourly", "daily")
+
+
+def absolute_hour(day: int, hour: int) -> int:
+    """
+    Simulated (day, hour) → monotonically increasing hour index.
+    Day numbering starts at 1, like SimulatorEngine.current_day.
+    """
+    return (day - 1) * 24 + hour
+
+
+def _bucket_for(granularity, abs_hour):
+    if granularity == "hourly":
+        return abs_hour
+    return abs_hour // 24 + 1
+
+
+def _valid_device_id(device_id) -> bool:
+    """
+    Device ids become directory names: only plain, single-level names.
+    """
+    return (
+        isinstance(device_id, str)
+        and device_id not in ("", ".", "..")
+        and "/" not in device_id
+        and "\\" not in device_id
+        and "\0" not in device_id
+    )
+
+
+def _column_path(base, column):
+    return os.path.join(base, f"{column}.bin")
+
+
+def _row_count(base, columns):
+    """
+    Number of fully written rows: the shortest column wins, so a
+    row is only visible once every column has been appended.
+    """
+    counts = []
+    for column, dtype in columns.items():
+        path = _column_path(base, column)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        counts.append(size // np.dtype(dtype).itemsize)
+    return min(counts) if counts else 0
+
+
+def _truncate_columns(base, columns, count):
+    """
+    Drop a torn trailing row left behind by an interrupted append,
+    so the next append stays aligned across columns.
+    """
+    for column, dtype in columns.items():
+        path = _column_path(base, column)
+        size = count * np.dtype(dtype).itemsize
+        if os.path.exists(path) and os.path.getsize(path) != size:
+            os.truncate(path, size)
+
+
+def _map_columns(base, columns, count):
+    """
+    Memory-map every column read-only (zero-copy views).
+    """
+    if count == 0:
+        return {
+            column: np.empty(0, dtype=dtype)
+            for column, dtype in columns.items()
+        }
+
+    return {
+        column: np.memmap(
+            _column_path(base, column),
+            dtype=dtype,
+            mode="r",
+            shape=(count,)
+        )
+        for column, dtype in columns.items()
+    }
+
+
+def _append_columns(base, columns, rows):
+    """
+    Append buffered rows column by column. The key column is
+    written last so readers never see it ahead of the payload.
+    """
+    names = list(columns)
+    key = names[0]
+
+    for column in names[1:] + [key]:
+        values = np.asarray(
+            [row[column] for row in rows],
+            dtype=columns[column]
+        )
+        with open(_column_path(base, column), "ab") as f:
+            f.write(values.tobytes())
+
+
+# ==============================
+# ROLLUP BUCKET
+# ==============================
+class _Bucket:
+    __slots__ = (
+        "bucket", "samples", "kwh", "watts_sum", "watts_max",
+        "temp_sum", "temp_samples", "occupied", "on"
+    )
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.samples = 0
+        self.kwh = 0.0
+        self.watts_sum = 0.0
+        self.watts_max = 0.0
+        self.temp_sum = 0.0
+        self.temp_samples = 0
+        self.occupied = 0
+        self.on = 0
+
+    def add(self, row):
+        self.samples += 1
+        self.kwh += row["kwh"]
+        self.watts_sum += row["watts"]
+        self.watts_max = max(self.watts_max, row["watts"])
+
+        if not math.isnan(row["ambient_temperature"]):
+            self.temp_sum += row["ambient_temperature"]
+            self.temp_samples += 1
+
+        self.occupied += row["occupancy"] == 1
+        self.on += row["power"] == 1
+
+    def as_row(self):
+        return {name: getattr(self, name) for name in ROLLUP_COLUMNS}
+
+
+def _summarize(columns):
+    """
+    Turn raw rollup columns into API-friendly averages.
+    """
+    samples = np.maximum(columns["samples"], 1)
+    temp_samples = columns["temp_samples"]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_temp = np.where(
+            temp_samples > 0,
+            columns["temp_sum"] / np.maximum(temp_samples, 1),
+            np.nan
+        )
+
+    return {
+        "bucket": columns["bucket"].tolist(),
+        "samples": columns["samples"].tolist(),
+        "kwh": columns["kwh"].tolist(),
+        "mean_watts": (columns["watts_sum"] / samples).tolist(),
+        "max_watts": columns["watts_max"].astype(float).tolist(),
+        "mean_ambient_temperature": [
+            None if math.isnan(v) else round(v, 2)
+            for v in mean_temp.tolist()
+        ],
+        "occupied_ratio": (columns["occupied"] / samples).tolist(),
+        "on_ratio": (columns["on"] / samples).tolist(),
+    }
+
+
+# ==============================
+# PER-DEVICE SERIES
+# ==============================
+class _DeviceSeries:
+    def __init__(self, root, device_id, read_only=False):
+        if not _valid_device_id(device_id):
+            raise ValueError(f"Invalid device id: {device_id!r}")
+
+        self.base = os.path.join(root, device_id)
+        self.paths = {
+            "readings": os.path.join(self.base, "readings"),
+            "hourly": os.path.join(self.base, "hourly"),
+            "daily": os.path.join(self.base, "daily"),
+        }
+        self.pending = []
+        self.pending_rollups = {g: [] for g in GRANULARITIES}
+        self.open_buckets = {g: None for g in GRANULARITIES}
+        self.last_total_kwh = None
+
+        # Someone else may be appending: never create or truncate,
+        # just rebuild the open buckets from what is on disk
+        if read_only:
+            self._recover()
+            return
+
+        for path in self.paths.values():
+            os.makedirs(path, exist_ok=True)
+
+        _truncate_columns(
+            self.paths["readings"],
+            READING_COLUMNS,
+            _row_count(self.paths["readings"], READING_COLUMNS)
+        )
+        for granularity in GRANULARITIES:
+            _truncate_columns(
+                self.paths[granularity],
+                ROLLUP_COLUMNS,
+                _row_count(self.paths[granularity], ROLLUP_COLUMNS)
+            )
+
+        self._recover()
+
+    def _recover(self):
+        """
+        Rebuild in-memory tails after a restart: the last cumulative
+        energy reading and the still-open rollup buckets.
+        """
+        readings = self.readings()
+        if len(readings["hour"]) == 0:
+            return
+
+        self.last_total_kwh = float(readings["total_kwh"][-1])
+
+        for granularity in GRANULARITIES:
+            closed = self.rollups(granularity, include_open=False)
+            last_closed = (
+                int(closed["bucket"][-1]) if len(closed["bucket"]) else None
+            )
+
+            buckets = (
+                readings["hour"] if granularity == "hourly"
+                else readings["hour"] // 24 + 1
+            )
+            start = 0
+            if last_closed is not None:
+                start = int(np.searchsorted(buckets, last_closed, side="right"))
+
+            for i in range(start, len(buckets)):
+                row = {column: readings[column][i].item() for column in READING_COLUMNS}
+                self._roll(granularity, row)
+
+    def _roll(self, granularity, row):
+        bucket_id = _bucket_for(granularity, row["hour"])
+        bucket = self.open_buckets[granularity]
+
+        if bucket is not None and bucket.bucket != bucket_id:
+            self.pending_rollups[granularity].append(bucket.as_row())
+            bucket = None
+
+        if bucket is None:
+            bucket = self.open_buckets[granularity] = _Bucket(bucket_id)
+
+        bucket.add(row)
+
+    def append(self, row):
+        if self.last_total_kwh is None:
+            # First reading ever: everything accumulated so far
+            row["kwh"] = row["total_kwh"]
+        else:
+            row["kwh"] = max(row["total_kwh"] - self.last_total_kwh, 0.0)
+        self.last_total_kwh = row["total_kwh"]
+
+        self.pending.append(row)
+        for granularity in GRANULARITIES:
+            self._roll(granularity, row)
+
+    def flush(self):
+        if self.pending:
+            _append_columns(self.paths["readings"], READING_COLUMNS, self.pending)
+            self.pending = []
+
+        for granularity in GRANULARITIES:
+            rows = self.pending_rollups[granularity]
+            if rows:
+                _append_columns(self.paths[granularity], ROLLUP_COLUMNS, rows)
+                self.pending_rollups[granularity] = []
+
+    def readings(self):
+        base = self.paths["readings"]
+        return _map_columns(base, READING_COLUMNS, _row_count(base, READING_COLUMNS))
+
+    def rollups(self, granularity, include_open=True):
+        base = self.paths[granularity]
+        columns = _map_columns(base, ROLLUP_COLUMNS, _row_count(base, ROLLUP_COLUMNS))
+
+        if not include_open:
+            return columns
+
+        tail = list(self.pending_rollups[granularity])
+        if self.open_buckets[granularity] is not None:
+            tail.append(self.open_buckets[granularity].as_row())
+
+        if not tail:
+            return columns
+
+        return {
+            column: np.concatenate([
+                columns[column],
+                np.asarray([row[column] for row in tail], dtype=dtype)
+            ])
+            for column, dtype in ROLLUP_COLUMNS.items()
+        }
+
+
+# ==============================
+# ENERGY STORE
+# ==============================
+class EnergyStore:
+    """
+    Append-only, memory-mapped per-device energy time-series.
+
+    One row per device per tick, plus hourly and daily rollups that
+    are maintained incrementally as rows arrive. Range queries use a
+    binary search on the (monotonic) hour column and only touch the
+    requested slice of the requested device.
+    """
+
+    def __init__(self, root, flush_every=1, read_only=False):
+        self.root = root
+        self.flush_every = max(int(flush_every), 1)
+        self.read_only = read_only
+        self._series = {}
+        self._ticks_since_flush = 0
+        self._lock = threading.Lock()
+
+        if not read_only:
+            os.makedirs(root, exist_ok=True)
+
+    def _get_series(self, device_id):
+        series = self._series.get(device_id)
+        if series is None:
+            series = self._series[device_id] = _DeviceSeries(
+                self.root, device_id, read_only=self.read_only
+            )
+        return series
+
+    def _reader(self, device_id):
+        """
+        Series for a read: this process's writer when it records the
+        device, else a fresh read-only view (never creates, truncates
+        or caches anything, so it can't go stale or touch the files).
+        """
+        series = self._series.get(device_id)
+        if series is None:
+            series = _DeviceSeries(self.root, device_id, read_only=True)
+        return series
+
+    def has_device(self, device_id):
+        """
+        Same membership as device_ids(), without listing the root.
+        """
+        if device_id in self._series:
+            return True
+        return _valid_device_id(device_id) and os.path.isdir(os.path.join(self.root, device_id))
+
+    # ==============================
+    # WRITE PATH (TICK THREAD)
+    # ==============================
+    def record_tick(self, devices, day: int, hour: int):
+        if self.read_only:
+            raise RuntimeError("EnergyStore opened read-only")
+
+        abs_hour = absolute_hour(day, hour)
+
+        with self._lock:
+            for device_id, device in devices.items():
+                sensors = device.sensors
+                temp = sensors.get("ambient_temperature")
+                occupancy = sensors.get("occupancy")
+
+                self._get_series(device_id).append({
+                    "hour": abs_hour,
+                    "watts": device.energy["current_watts"],
+                    "total_kwh": device.energy["total_kwh"],
+                    "ambient_temperature": float("nan") if temp is None else temp,
+                    "occupancy": -1 if occupancy is None else int(bool(occupancy)),
+                    "power": int(device.state.get("power") == "ON"),
+                })
+
+            self._ticks_since_flush += 1
+            if self._ticks_since_flush >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        for series in self._series.values():
+            series.flush()
+        self._ticks_since_flush = 0
+
+    # ==============================
+    # READ PATH (API THREADS)
+    # ==============================
+    def device_ids(self):
+        on_disk = set()
+        if os.path.isdir(self.root):
+            with os.scandir(self.root) as entries:
+                on_disk = {entry.name for entry in entries if entry.is_dir()}
+        return sorted(on_disk | set(self._series))
+
+    def read_range(self, device_id, start_hour=None, end_hour=None):
+        """
+        Readings with start_hour <= hour < end_hour, as memory-mapped
+        column slices. Returns None for unknown devices.
+        """
+        if not self.has_device(device_id):
+            return None
+
+        with self._lock:
+            columns = self._reader(device_id).readings()
+
+        lo, hi = _slice_bounds(columns["hour"], start_hour, end_hour)
+        return {column: values[lo:hi] for column, values in columns.items()}
+
+    def read_rollups(self, device_id, granularity="hourly", start=None, end=None):
+        """
+        Rollup buckets with start <= bucket < end (hours for hourly,
+        days for daily), including the still-open bucket.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        if not self.has_device(device_id):
+            return None
+
+        with self._lock:
+            columns = self._reader(device_id).rollups(granularity)
+
+        lo, hi = _slice_bounds(columns["bucket"], start, end)
+        return _summarize({column: values[lo:hi] for column, values in columns.items()})
+
+
+def _slice_bounds(keys, start, end):
+    lo = 0 if start is None else int(np.searchsorted(keys, start, side="left"))
+    hi = len(keys) if end is None else int(np.searchsorted(keys, end, side="left"))
+    return lo, max(lo, hi)
+
+
+def readings_to_dict(columns):
+    """
+    JSON-friendly view of a read_range() result.
+    """
+    return {
+        "hour": columns["hour"].tolist(),
+        "watts": columns["watts"].astype(float).tolist(),
+        "kwh": columns["kwh"].tolist(),
+        "total_kwh": columns["total_kwh"].tolist(),
+        "ambient_temperature": [
+            None if math.isnan(v) else round(v, 2)
+            for v in columns["ambient_temperature"].astype(float).tolist()
+        ],
+        "occupancy": [
+            None if v < 0 else bool(v)
+            for v in columns["occupancy"].tolist()
+        ],
+        "power": ["ON" if v else "OFF" for v in columns["power"].tolist()],
+    }
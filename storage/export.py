@@ -0,0 +1,304 @@
+# Columnar export of energy readings, logs, decisions and events.
+#
+#   python -m storage.export readings out.csv --start-day 1 --end-day 90
+#
+# Data is written chunk by chunk (one DataFrame of at most chunk_rows
+# at a time), so memory stays flat however long the history is.
+# Day ranges are inclusive (start_day..end_day), as on GET /energy.
+# CSV is the default; Parquet / Arrow IPC need the optional pyarrow
+# package, which requirements.txt does not install.
+import json
+import argparse
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from storage.energy_store import EnergyStore, absolute_hour
+
+
+FORMATS = ("csv", "parquet", "arrow")
+
+SUFFIXES = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrows"}
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "csv": "text/csv",
+}
+
+DEFAULT_CHUNK_ROWS = 65536
+
+# Typed columns per record dataset; any other keys of an entry go to
+# an "extra" JSON column, so heterogeneous entries share one schema
+RECORD_COLUMNS = {
+    "logs": {
+        "timestamp": "datetime64[ns]",
+        "type": "string",
+        "device_id": "string",
+        "day": "Int64",
+        "hour": "Int64",
+    },
+    "decisions": {
+        "timestamp": "datetime64[ns]",
+        "device_id": "string",
+        "device_type": "string",
+        "hour": "Int64",
+        "time_of_day": "string",
+        "predicted_energy": "Float64",
+        "action_taken": "boolean",
+        "explanation": "string",
+    },
+    "events": {
+        "timestamp": "datetime64[ns]",
+        "device_id": "string",
+        "device_type": "string",
+        "action_taken": "boolean",
+        "explanation": "string",
+    },
+}
+
+DATASETS = ("readings",) + tuple(RECORD_COLUMNS)
+
+
+class ExportUnavailable(RuntimeError):
+    """
+    The requested format needs an optional dependency that is missing.
+    """
+
+
+# ==============================
+# CHUNK WRITERS
+# ==============================
+def _pyarrow(fmt):
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportUnavailable(
+            f"{fmt} export requires pyarrow (pip install pyarrow); use csv instead"
+        )
+    return pyarrow
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._header = True
+
+    def write(self, frame):
+        frame.to_csv(self._file, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        self._file.close()
+
+
+class _ArrowWriter:
+    """
+    Parquet or Arrow IPC stream; the schema comes from the first chunk
+    (explicit dtypes keep it identical across chunks).
+    """
+
+    def __init__(self, path, fmt):
+        self._pa = _pyarrow(fmt)
+        self._path = path
+        self._fmt = fmt
+        self._writer = None
+
+    def write(self, frame):
+        table = self._pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            if self._fmt == "parquet":
+                self._writer = self._pa.parquet.ParquetWriter(self._path, table.schema)
+            else:
+                self._writer = self._pa.ipc.new_stream(self._path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def open_writer(path, fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    if fmt == "csv":
+        return _CsvWriter(path)
+    return _ArrowWriter(path, fmt)
+
+
+def _write_chunks(chunks, path, fmt):
+    writer = open_writer(path, fmt)
+    rows = 0
+    try:
+        for frame in chunks:
+            writer.write(frame)
+            rows += len(frame)
+    finally:
+        writer.close()
+    return rows
+
+
+# ==============================
+# ENERGY READINGS
+# ==============================
+def iter_reading_chunks(store, devices=None, start_hour=None, end_hour=None,
+                        chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    DataFrames of per-tick readings, device by device, sliced straight
+    from the memory-mapped columns.
+    """
+    for device_id in devices or store.device_ids():
+        columns = store.read_range(device_id, start_hour, end_hour)
+        if columns is None:
+            continue
+
+        count = len(columns["hour"])
+        for lo in range(0, count, chunk_rows):
+            hi = min(lo + chunk_rows, count)
+            hours = np.asarray(columns["hour"][lo:hi])
+
+            frame = pd.DataFrame({
+                "device_id": pd.Series([device_id] * (hi - lo), dtype="string"),
+                "day": hours // 24 + 1,
+                "hour_of_day": (hours % 24).astype("int8"),
+            })
+            for column, values in columns.items():
+                frame[column] = np.asarray(values[lo:hi])
+
+            yield frame
+
+
+def export_readings(store, path, fmt="csv", devices=None, start_hour=None,
+                    end_hour=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Write energy readings to `path`; returns the number of rows.
+    """
+    return _write_chunks(
+        iter_reading_chunks(store, devices, start_hour, end_hour, chunk_rows),
+        path,
+        fmt
+    )
+
+
+# ==============================
+# LOGS / DECISIONS / EVENTS
+# ==============================
+def _typed(values, dtype):
+    if dtype.startswith("datetime"):
+        return pd.to_datetime(pd.Series(values, dtype=object), errors="coerce")
+    try:
+        return pd.Series(values, dtype=object).astype(dtype)
+    except (TypeError, ValueError):
+        return pd.Series([None if v is None else str(v) for v in values], dtype="string")
+
+
+def _record_frame(entries, columns):
+    frame = pd.DataFrame({
+        column: _typed([entry.get(column) for entry in entries], dtype)
+        for column, dtype in columns.items()
+    })
+    frame["extra"] = pd.Series([
+        json.dumps({k: v for k, v in entry.items() if k not in columns}, default=str)
+        for entry in entries
+    ], dtype="string")
+    return frame
+
+
+def timestamp_epoch(stamp):
+    """
+    ISO timestamp (naive = UTC, like the logs' own) → epoch seconds;
+    None for a missing or unparsable one.
+    """
+    if not isinstance(stamp, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(stamp)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def iter_record_chunks(dataset, entries, devices=None, since=None, until=None,
+                       chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    DataFrames of at most chunk_rows entries. since / until are epoch
+    seconds compared against each entry's parsed "timestamp" (entries
+    without a readable one are kept).
+    """
+    columns = RECORD_COLUMNS[dataset]
+    devices = set(devices) if devices else None
+    bounded = since is not None or until is not None
+
+    chunk = []
+    for entry in entries:
+        if devices is not None and entry.get("device_id") not in devices:
+            continue
+        stamp = timestamp_epoch(entry.get("timestamp")) if bounded else None
+        if stamp is not None:
+            if since is not None and stamp < since:
+                continue
+            if until is not None and stamp >= until:
+                continue
+
+        chunk.append(entry)
+        if len(chunk) >= chunk_rows:
+            yield _record_frame(chunk, columns)
+            chunk = []
+
+    if chunk:
+        yield _record_frame(chunk, columns)
+
+
+def export_records(dataset, entries, path, fmt="csv", devices=None,
+                   since=None, until=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Write log-like entries (dicts, consumed lazily) to `path`; returns
+    the number of rows. since / until: epoch seconds.
+    """
+    if dataset not in RECORD_COLUMNS:
+        raise ValueError(f"Unknown dataset: {dataset}")
+    return _write_chunks(
+        iter_record_chunks(dataset, entries, devices, since, until, chunk_rows),
+        path,
+        fmt
+    )
+
+
+# ==============================
+# CLI
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export energy readings to a columnar file")
+    parser.add_argument("dataset", choices=["readings"], help="on-disk data only; use GET /export/<dataset> for the in-memory logs")
+    parser.add_argument("out")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file suffix, else csv")
+    parser.add_argument("--energy-dir", default="data/energy")
+    parser.add_argument("--devices", help="comma-separated device ids")
+    parser.add_argument("--start-day", type=int)
+    parser.add_argument("--end-day", type=int, help="inclusive")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or next(
+        (f for f, suffix in SUFFIXES.items() if args.out.endswith(suffix)),
+        "csv"
+    )
+
+    rows = export_readings(
+        EnergyStore(args.energy_dir, read_only=True),
+        args.out,
+        fmt=fmt,
+        devices=args.devices.split(",") if args.devices else None,
+        start_hour=absolute_hour(args.start_day, 0) if args.start_day else None,
+        end_hour=absolute_hour(args.end_day + 1, 0) if args.end_day else None,
+        chunk_rows=args.chunk_rows
+    )
+    print(f"{rows} rows → {args.out} ({fmt})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+
+from automation import decision_emitter
+from devices.factory import build_home
+from engine.async_runner import AsyncEngineRunner
+from engine.simulator_loop import SimulatorEngine
+from rules.engine import RuleEngine
+from rules.loader import load_rules
+
+
+async def _until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_commands_wake_the_loop_and_stop_drains_them():
+    devices = build_home(seed=6)
+    engine = SimulatorEngine(
+        devices,
+        rule_engine=RuleEngine(load_rules("rules/rules.json", devices)),
+        tick_seconds=60     # only a command can end the wait early
+    )
+    runner = AsyncEngineRunner(engine, startup_delay=0)
+    applied = []
+
+    async def scenario():
+        runner.start()
+        await _until(lambda: engine.ticks == 1)
+
+        # Submitted from an API thread between ticks
+        def command():
+            applied.append(threading.current_thread().name)
+
+        submitter = threading.Thread(target=engine.commands.submit, args=("first", command))
+        submitter.start()
+        submitter.join()
+        await _until(lambda: applied)
+
+        engine.commands.submit("last", lambda: applied.append("last"))
+        await runner.stop()
+
+    previous = decision_emitter.DELIVER_EVENTS
+    decision_emitter.set_event_delivery(False)
+    try:
+        asyncio.run(scenario())
+    finally:
+        decision_emitter.set_event_delivery(previous)
+
+    assert engine.ticks == 1
+    assert applied[0].startswith("simulator") and applied[-1] == "last"
+    assert not engine.running and not SimulatorEngine._started
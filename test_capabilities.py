@@ -0,0 +1,28 @@
+import pytest
+from pydantic import ValidationError
+
+from devices.ac import AC
+from devices.capabilities import resolve
+from models.schemas import Command, CommandBatch
+
+
+def test_integer_actions_reject_truncation_bools_and_nan():
+    ac = AC("ac_1", "living_room")
+
+    for value in (24, 24.0, "24"):
+        assert resolve(ac, "set_temperature", value)[1] == 24
+
+    for value in (23.7, True, float("nan"), float("inf"), "23.7", 31, None):
+        with pytest.raises(ValueError):
+            resolve(ac, "SET_TEMPERATURE", value)
+
+    assert resolve(ac, "on")[1] is None
+
+
+def test_batch_commands_need_a_device_id():
+    batch = CommandBatch(commands=[{"device_id": "ac_1", "action": "ON"}])
+    assert isinstance(batch.commands[0], Command)
+    assert batch.commands[0].payload == {}
+
+    with pytest.raises(ValidationError):
+        CommandBatch(commands=[{"action": "ON"}])
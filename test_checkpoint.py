@@ -0,0 +1,55 @@
+from automation import decision_emitter
+from devices.factory import build_home
+from devices.sensor_engine import SensorEngine
+from engine.simulator_loop import SimulatorEngine
+from rules.engine import RuleEngine
+from rules.loader import load_rules
+from storage.checkpoint import CheckpointWriter, load_checkpoint
+
+
+def _engine(path, seed=11):
+    devices = build_home(seed=seed)
+    return SimulatorEngine(
+        devices,
+        rule_engine=RuleEngine(load_rules("rules/rules.json", devices)),
+        sensor_source=SensorEngine.for_devices(devices, seed=seed),
+        checkpoint=CheckpointWriter(path)
+    )
+
+
+def test_checkpoint_round_trip_and_crc_rejection(tmp_path):
+    path = str(tmp_path / "engine.ckpt")
+    previous = decision_emitter.DELIVER_EVENTS
+    decision_emitter.set_event_delivery(False)
+    try:
+        engine = _engine(path)
+        for _ in range(30):
+            engine.tick()
+        engine.checkpoint.submit(engine.export_state())
+        engine.checkpoint.close()
+
+        restored = _engine(path)
+        assert restored.restore_from_checkpoint()
+    finally:
+        decision_emitter.set_event_delivery(previous)
+
+    assert (restored.current_day, restored.current_hour) == (engine.current_day, engine.current_hour)
+    for device_id, device in engine.devices.items():
+        assert restored.devices[device_id].state == device.state
+        assert restored.devices[device_id].energy["total_kwh"] == device.energy["total_kwh"]
+
+    # One flipped body byte: rejected, and the engine starts fresh
+    with open(path, "r+b") as f:
+        f.seek(-1, 2)
+        last = f.read(1)
+        f.seek(-1, 2)
+        f.write(bytes([last[0] ^ 0xFF]))
+    assert load_checkpoint(path) is None
+    assert not _engine(path).restore_from_checkpoint()
+
+
+def test_stop_joins_the_simulator_thread():
+    engine = SimulatorEngine(build_home(seed=1))
+    engine.start()
+    assert engine.stop(timeout=10)
+    assert engine._thread is None and not engine.running
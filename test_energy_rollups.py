@@ -0,0 +1,35 @@
+from automation import decision_emitter
+from devices.factory import build_home
+from devices.sensor_engine import SensorEngine
+from engine.simulator_loop import SimulatorEngine
+from storage.energy_rollups import EnergyRollups
+
+
+def test_rollups_add_up_to_the_devices_totals():
+    previous = decision_emitter.DELIVER_EVENTS
+    decision_emitter.set_event_delivery(False)
+    try:
+        devices = build_home(seed=4)
+        engine = SimulatorEngine(devices, sensor_source=SensorEngine.for_devices(devices, seed=4))
+        for _ in range(60):
+            engine.tick()
+    finally:
+        decision_emitter.set_event_delivery(previous)
+
+    rollups = engine.energy_rollups
+    rooms, types = rollups.days("room"), rollups.days("type")
+    assert [day["day"] for day in rooms] == [1, 2, 3]
+    assert [day["frozen"] for day in rooms] == [True, True, False]
+    for by_room, by_type in zip(rooms, types):
+        assert abs(sum(by_room["room"].values()) - by_room["total_kwh"]) < 1e-9
+        assert abs(sum(by_type["type"].values()) - by_room["total_kwh"]) < 1e-9
+
+    recorded = sum(day["total_kwh"] for day in rooms)
+    assert recorded > 0
+    assert abs(recorded - sum(d.energy["total_kwh"] for d in devices.values())) < 1e-9
+
+    restored = EnergyRollups()
+    restored.attach(build_home(seed=4))
+    restored.restore_state(rollups.export_state())
+    assert restored.days("room") == rooms
+    assert restored.days("type", start_day=2, end_day=2) == types[1:2]
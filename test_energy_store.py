@@ -0,0 +1,36 @@
+from devices.ac import AC
+from storage.energy_store import EnergyStore
+
+
+def test_range_query_and_rollups_survive_reopen(tmp_path):
+    ac = AC("ac_1", "living_room")
+    ac.turn_on()
+    devices = {"ac_1": ac}
+
+    store = EnergyStore(str(tmp_path))
+    for tick in range(48):
+        ac.update_sensors()
+        ac.update_energy(3600)
+        store.record_tick(devices, day=tick // 24 + 1, hour=tick % 24)
+
+    day_two = store.read_range("ac_1", start_hour=24, end_hour=48)
+    assert day_two["hour"].tolist() == list(range(24, 48))
+
+    reopened = EnergyStore(str(tmp_path))
+    daily = reopened.read_rollups("ac_1", "daily")
+    assert daily["bucket"] == [1, 2]
+    assert abs(sum(daily["kwh"]) - ac.energy["total_kwh"]) < 1e-6
+    assert reopened.read_range("missing", 0, 24) is None
+
+
+def test_path_like_device_ids_are_rejected_without_touching_disk(tmp_path):
+    root = tmp_path / "energy"
+    store = EnergyStore(str(root))
+    before = sorted(p.name for p in tmp_path.iterdir())
+
+    for device_id in ("..", ".", "../energy", "ac_1/readings", ""):
+        assert store.read_range(device_id) is None
+        assert store.read_rollups(device_id, "daily") is None
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == before
+    assert list(root.iterdir()) == []
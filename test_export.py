@@ -0,0 +1,61 @@
+import csv
+import os
+
+from devices.ac import AC
+from storage.energy_store import EnergyStore, absolute_hour
+from storage.export import export_records, iter_reading_chunks, main, timestamp_epoch
+
+
+def _store(root, days=3):
+    devices = {f"ac_{i}": AC(f"ac_{i}", "living_room") for i in (1, 2)}
+    store = EnergyStore(root)
+    for tick in range(days * 24):
+        for device in devices.values():
+            device.update_energy(60)
+        store.record_tick(devices, day=tick // 24 + 1, hour=tick % 24)
+    store.flush()
+    return store
+
+
+def test_reading_chunks_are_bounded_and_the_end_day_is_inclusive(tmp_path):
+    store = _store(str(tmp_path / "energy"))
+
+    chunks = list(iter_reading_chunks(
+        store, start_hour=absolute_hour(2, 0), end_hour=absolute_hour(3 + 1, 0), chunk_rows=10
+    ))
+    assert max(len(chunk) for chunk in chunks) == 10
+    assert sum(len(chunk) for chunk in chunks) == 2 * 48
+    assert {int(day) for chunk in chunks for day in chunk["day"]} == {2, 3}
+
+    out = str(tmp_path / "day_two.csv")
+    main([
+        "readings", out, "--energy-dir", str(tmp_path / "energy"),
+        "--devices", "ac_1", "--start-day", "2", "--end-day", "2", "--chunk-rows", "7"
+    ])
+    rows = list(csv.DictReader(open(out)))
+    assert [int(row["hour_of_day"]) for row in rows] == list(range(24))
+    assert {row["day"] for row in rows} == {"2"}
+
+    # The CLI opens the store read-only: nothing created for a bad path
+    main(["readings", str(tmp_path / "none.csv"), "--energy-dir", str(tmp_path / "missing")])
+    assert not os.path.exists(tmp_path / "missing")
+
+
+def test_record_chunks_filter_by_device_and_time(tmp_path):
+    entries = [
+        {"timestamp": f"2026-01-0{day}T00:00:00", "device_id": device_id, "type": "device", "note": day}
+        for day in range(1, 6)
+        for device_id in ("ac_1", "light_1")
+    ]
+    out = str(tmp_path / "logs.csv")
+    rows = export_records(
+        "logs", iter(entries), out, devices=["ac_1"],
+        # 2026-01-02T00:00Z .. 2026-01-05T00:00Z, bounds given with an offset
+        since=timestamp_epoch("2026-01-02T01:00:00+01:00"),
+        until=timestamp_epoch("2026-01-04T19:00:00-05:00"),
+        chunk_rows=2
+    )
+    assert rows == 3
+    exported = list(csv.DictReader(open(out)))
+    assert [row["timestamp"][:10] for row in exported] == ["2026-01-02", "2026-01-03", "2026-01-04"]
+    assert exported[0]["extra"] == '{"note": 2}'
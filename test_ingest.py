@@ -0,0 +1,57 @@
+import gzip
+import json
+import asyncio
+
+import pytest
+
+from api import ingest as ingest_module
+from api.ingest import IngestError, IngestQueue, TokenBucket, ingest
+
+
+async def _stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def _ndjson(count, bad_every=None):
+    lines = []
+    for i in range(count):
+        if bad_every and i % bad_every == 0:
+            lines.append(b"not json")
+        else:
+            lines.append(json.dumps({"device_id": f"dev_{i}"}).encode())
+    return b"\n".join(lines) + b"\n"
+
+
+def _run(body, store, bucket, queue, gzipped=False):
+    return asyncio.run(ingest(_stream(body), gzipped, store, bucket, queue))
+
+
+def test_rate_and_queue_limits_stop_with_a_resume_line():
+    store = []
+    result = _run(_ndjson(1000, bad_every=100), store, TokenBucket(0.001, 600), IngestQueue())
+    assert result["status"] == "saturated"
+    assert result["accepted"] == len(store) == 600
+    assert all(error["line"] < result["resume_line"] for error in result["errors"])
+
+    queue = IngestQueue(limit=1000)
+    queue.reserve(1000)     # another request's batches still parsing
+    store = []
+    result = _run(_ndjson(10), store, TokenBucket(1000, 1000), queue)
+    assert result["status"] == "busy"
+    assert (result["accepted"], result["resume_line"], store) == (0, 1, [])
+
+
+def test_gzip_bomb_is_rejected_before_it_inflates(monkeypatch):
+    monkeypatch.setattr(ingest_module, "MAX_BODY_BYTES", 1024 * 1024)
+    monkeypatch.setattr(ingest_module, "INFLATE_SLICE", 64 * 1024)
+
+    bomb = gzip.compress(b"\n" * (8 * 1024 * 1024))
+    with pytest.raises(IngestError) as e:
+        _run(bomb, [], TokenBucket(1000, 1000), IngestQueue(), gzipped=True)
+    assert e.value.status_code == 413
+
+    body = gzip.compress(_ndjson(50))
+    store = []
+    result = _run(body, store, TokenBucket(1000, 1000), IngestQueue(), gzipped=True)
+    assert (result["status"], result["accepted"], len(store)) == (None, 50, 50)
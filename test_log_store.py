@@ -0,0 +1,79 @@
+import threading
+import time
+
+from automation import log_store
+from automation.log_segments import SegmentStore
+
+
+def test_spill_runs_off_the_caller_and_reads_back_in_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_store, "MEMORY_ENTRIES", 20)
+    monkeypatch.setattr(log_store, "SPILL_BATCH", 8)
+    log_store.AUTOMATION_LOGS.clear()
+
+    # Hold the first disk write: add_log must not wait for it
+    release = threading.Event()
+    append = SegmentStore.append
+
+    def slow_append(self, batch):
+        release.wait(10)
+        append(self, batch)
+
+    monkeypatch.setattr(SegmentStore, "append", slow_append)
+    log_store.configure_spill(str(tmp_path), segment_bytes=2048)
+    first = log_store.log_stats()["last_seq"] + 1
+
+    started = time.monotonic()
+    for i in range(100):
+        log_store.add_log({"type": "test", "i": i})
+    assert time.monotonic() - started < 1
+    assert len(log_store.AUTOMATION_LOGS) == 100
+
+    release.set()
+    deadline = time.monotonic() + 10
+    while len(log_store.AUTOMATION_LOGS) > 20 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(log_store.AUTOMATION_LOGS) == 20
+
+    def read_back():
+        return [e for e in log_store.iter_logs(after_seq=first - 1) if e.get("type") == "test"]
+
+    entries = read_back()
+    assert [e["i"] for e in entries] == list(range(100))
+    assert [e["seq"] for e in entries] == list(range(first, first + 100))
+    assert all("_ts" not in e for e in entries)
+
+    # Shutdown spills the rest; a restart reads everything from disk,
+    # and get_logs() only the newest entries
+    log_store.close_spill()
+    assert not log_store.AUTOMATION_LOGS
+    log_store.configure_spill(str(tmp_path), segment_bytes=2048)
+    try:
+        assert [e["i"] for e in read_back()] == list(range(100))
+        assert [e["i"] for e in log_store.get_logs(limit=5)] == list(range(95, 100))
+    finally:
+        log_store.close_spill()
+
+
+def test_entries_logged_before_spill_is_configured_follow_the_disk(tmp_path):
+    log_store.AUTOMATION_LOGS.clear()
+    log_store.configure_spill(str(tmp_path))
+    for i in range(5):
+        log_store.add_log({"type": "before_restart", "i": i})
+    log_store.close_spill()
+    on_disk = log_store.log_stats()["last_seq"]
+
+    # A fresh process: the counter restarts and startup logs come first
+    log_store.AUTOMATION_LOGS.clear()
+    log_store._seq = 0
+    for i in range(3):
+        log_store.add_log({"type": "startup", "i": i})
+
+    log_store.configure_spill(str(tmp_path))
+    try:
+        seqs = [e["seq"] for e in log_store.iter_logs()]
+        assert seqs == sorted(set(seqs))
+        assert seqs[-3:] == [on_disk + 1, on_disk + 2, on_disk + 3]
+        log_store.add_log({"type": "after"})
+        assert log_store.log_stats()["last_seq"] == on_disk + 4
+    finally:
+        log_store.close_spill()
@@ -0,0 +1,39 @@
+import json
+import logging
+import queue
+
+from engine import logging_setup
+from engine.logging_setup import DroppingQueueHandler, JsonFormatter, RateLimitFilter
+
+
+def _record(msg="delivery failed", rate_key="delivery"):
+    record = logging.LogRecord("smart_home.events", logging.WARNING, __file__, 1, msg, (), None)
+    if rate_key is not None:
+        record.rate_key = rate_key
+    return record
+
+
+def test_rate_limit_drops_past_the_limit_and_reports_the_count(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(logging_setup.time, "monotonic", lambda: now[0])
+    limiter = RateLimitFilter(lines=2, seconds=60)
+
+    passed = [limiter.filter(_record()) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert limiter.filter(_record(rate_key=None))       # unkeyed: never limited
+    assert limiter.filter(_record(rate_key="other"))    # separate window
+
+    now[0] += 60
+    record = _record()
+    assert limiter.filter(record) and record.suppressed == 3
+    assert json.loads(JsonFormatter().format(record))["suppressed"] == 3
+
+    follow_up = _record()
+    assert limiter.filter(follow_up) and follow_up.suppressed == 0
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(_record(rate_key=None))
+    assert (handler.queue.qsize(), handler.dropped) == (2, 3)
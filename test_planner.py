@@ -0,0 +1,32 @@
+from devices.ac import AC
+from engine.planner import COMFORT, ECO, DayAheadPlanner
+from ml.predictor import EnergyPredictor
+
+
+class _FixedLevelPlanner(DayAheadPlanner):
+    level = COMFORT
+
+    def _fit_budget(self, predicted):
+        return [self.level] * len(predicted)
+
+
+def test_replanning_returns_to_the_comfort_setpoint():
+    ac = AC("ac_1", "living_room")
+    ac.apply_state({"power": "ON", "set_temperature": 23})
+    ac.sensors = {"ambient_temperature": 32.0, "occupancy": True}
+    devices = {"ac_1": ac}
+
+    planner = _FixedLevelPlanner(EnergyPredictor(), horizon=2, eco_delta=2)
+
+    for _ in range(5):
+        for level, expected in ((ECO, 25), (COMFORT, 23)):
+            planner.level = level
+            step = planner.plan(devices, day=1, hour=14).step(1, 14)
+            ac.apply_state(planner.resolve(step, ac))
+            assert ac.state["set_temperature"] == expected
+
+    # A setpoint changed outside the plan becomes the new baseline
+    ac.apply_state({"set_temperature": 21})
+    planner.level = ECO
+    step = planner.plan(devices, day=1, hour=14).step(1, 14)
+    assert planner.resolve(step, ac)["set_temperature"] == 23
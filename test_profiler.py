@@ -0,0 +1,47 @@
+import threading
+import time
+
+import pytest
+
+from engine.profiler import SamplingProfiler
+
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_samples_the_simulator_thread_only_and_one_profile_at_a_time():
+    stop = threading.Event()
+    busy = threading.Thread(target=_spin, args=(stop,), name="simulator")
+    idle = threading.Thread(target=stop.wait, name="bystander")
+    busy.start()
+    idle.start()
+
+    profiler = SamplingProfiler()
+    results = []
+
+    def profile():
+        results.append(profiler.profile(seconds=0.5, interval=0.005, threads="simulator"))
+
+    runner = threading.Thread(target=profile)
+    try:
+        runner.start()
+        deadline = time.monotonic() + 5
+        while not profiler.active:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+        with pytest.raises(RuntimeError):
+            profiler.profile(seconds=0.1)
+        runner.join()
+    finally:
+        stop.set()
+        busy.join()
+        idle.join()
+
+    [report] = results
+    stacks = [line.rsplit(" ", 1)[0].split(";") for line in report["collapsed"].splitlines()]
+    assert report["stack_samples"] > 10
+    assert {stack[0] for stack in stacks} == {"simulator"}
+    assert any("_spin (test_profiler.py" in label for label in stacks[0])
+    assert not profiler.active
@@ -0,0 +1,41 @@
+from devices.ac import AC
+from devices.fan import Fan
+from devices.light import Light
+from devices.registry import DeviceRegistry
+
+
+def _indexes(registry):
+    rebuilt = DeviceRegistry(list(registry.values()))
+    return (registry.by_room, registry.by_type, registry.by_room_type) == (
+        rebuilt.by_room, rebuilt.by_type, rebuilt.by_room_type
+    )
+
+
+def test_indexes_follow_every_dict_mutation():
+    registry = DeviceRegistry([
+        AC("ac_1", "living_room"),
+        Fan("fan_1", "living_room"),
+        Light("light_1", "bedroom"),
+    ])
+    assert registry.ids(room="living_room") == ["ac_1", "fan_1"]
+    assert registry.first("AC", room="bedroom") is None
+    assert registry.rooms() == {"living_room": {"AC": 1, "Fan": 1}, "bedroom": {"Light": 1}}
+
+    registry["ac_1"] = AC("ac_1", "bedroom")            # moved rooms
+    registry.setdefault("ac_2", AC("ac_2", "office"))
+    registry.setdefault("ac_2", AC("ac_2", "garage"))   # already present
+    registry |= {"light_2": Light("light_2", "office")}
+    assert registry.popitem()[0] == "light_2"
+    registry.pop("fan_1")
+    del registry["light_1"]
+
+    assert _indexes(registry)
+    assert registry.ids(device_type="AC") == ["ac_1", "ac_2"]
+    assert registry.ids(room="office", device_type="AC") == ["ac_2"]
+
+    registry.ids(device_type="AC").append("ghost")
+    registry.ids(room="office").clear()
+    assert _indexes(registry) and registry.ids(room="office") == ["ac_2"]
+
+    registry.clear()
+    assert (registry.by_room, registry.by_type, registry.by_room_type) == ({}, {}, {})
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from devices.factory import build_home
+from engine.replay import replay
+from engine.sweep import check_scenario
+from engine.trace import Trace, record_trace
+from ml.predictor import EnergyPredictor
+
+
+def test_seeded_trace_replays_identically(tmp_path):
+    first = record_trace(build_home(seed=42), ticks=48, seed=42)
+    second = record_trace(build_home(seed=42), ticks=48, seed=42)
+    assert np.array_equal(first.ambient_temperature, second.ambient_temperature, equal_nan=True)
+    assert np.array_equal(first.occupancy, second.occupancy)
+
+    path = str(tmp_path / "trace.npz")
+    first.save(path)
+    trace = Trace.load(path)
+
+    predictor = EnergyPredictor()
+    a = replay(trace, predictor=predictor)
+    b = replay(trace, predictor=predictor)
+    assert a["ticks"] == 48
+    assert a["total_kwh"] == b["total_kwh"]
+    assert a["decisions"] == b["decisions"]
+
+
+def test_rule_condition_overrides_take_effect_and_typos_raise(tmp_path):
+    trace = record_trace(build_home(seed=7), ticks=24, seed=7)
+    predictor = EnergyPredictor()
+
+    # Above anything the model predicts: the rule can no longer fire
+    base = replay(trace, predictor=predictor)
+    raised = replay(
+        trace, predictor=predictor,
+        rule_overrides={"ml_high_energy_ac_off": {"when.value": 1000}}
+    )
+    assert raised["decisions"] != base["decisions"]
+
+    for scenario in (
+        {"config.ml_policy.energy_limit.high": 3.0},
+        {"rules.no_such_rule.enabled": False},
+        {"rules.night_ac_off.when.valeu": 22},
+    ):
+        with pytest.raises(ValueError):
+            check_scenario(scenario)
+    check_scenario({"config.ml_policy.energy_limits.high": 3.0, "rules.night_ac_off.when.value": 22})
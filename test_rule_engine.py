@@ -0,0 +1,79 @@
+from automation import decision_emitter
+from devices.factory import build_home
+from devices.sensor_engine import SensorEngine
+from engine.simulator_loop import SimulatorEngine
+from rules.engine import RuleEngine
+from rules.loader import build_rules, load_rules
+
+
+def test_incremental_evaluation_matches_full_evaluation():
+    previous = decision_emitter.DELIVER_EVENTS
+    decision_emitter.set_event_delivery(False)
+    try:
+        devices = build_home(seed=7)
+        rule_engine = RuleEngine(load_rules("rules/rules.json", devices), verify=True)
+        engine = SimulatorEngine(
+            devices,
+            rule_engine=rule_engine,
+            sensor_source=SensorEngine.for_devices(devices, seed=7)
+        )
+
+        for tick in range(96):
+            if tick == 48:
+                rule_engine.rules[0].enabled = False
+            engine.tick()
+    finally:
+        decision_emitter.set_event_delivery(previous)
+
+    assert rule_engine.stats["mismatches"] == 0
+    assert rule_engine.stats["skipped"] > 0
+
+
+def test_preview_leaves_the_incremental_state_alone():
+    devices = build_home(seed=3)
+    for device in devices.values():
+        device.update_sensors()
+    rule_engine = RuleEngine(load_rules("rules/rules.json", devices))
+    rule_engine.evaluate(devices, ml_prediction=0.05)
+
+    stats, cache = dict(rule_engine.stats), dict(rule_engine._cache)
+    snapshots = {device_id: d.snapshot() for device_id, d in devices.items()}
+    [(actions, _)] = rule_engine.preview([(snapshots, 0.05)])
+
+    assert (rule_engine.stats, rule_engine._cache) == (stats, cache)
+    assert actions == rule_engine.evaluate_full(devices, 0.05, linear=True)[0]
+
+
+def test_compiled_plans_match_the_linear_scan():
+    devices = build_home(seed=9)
+    raw = []
+    for i, (operator, value) in enumerate([
+        (">", 28), (">=", 30), ("<", 18), ("<=", 18), ("==", 22),
+        (">", 29), ("!=", 25), (">", 24.5), ("<", 16), ("==", 22),
+    ]):
+        raw.append({
+            "rule_id": f"temp_{i}",
+            "description": "",
+            "priority": 100 - i * (i % 3),      # some ties: file order decides
+            "enabled": True,
+            "when": {"device_type": "AC", "sensor": "ambient_temperature",
+                     "operator": operator, "value": value},
+            "then": {"action": "SET_STATE", "payload": {"set_temperature": 20 + i}},
+        })
+    raw.append({
+        "rule_id": "ml_high", "description": "", "priority": 60, "enabled": True,
+        "when": {"device_type": "AC", "sensor": "predicted_energy", "operator": ">", "value": 3},
+        "then": {"action": "SET_STATE", "payload": {"power": "OFF"}},
+    })
+    rule_engine = RuleEngine(build_rules(raw, devices))
+    analysis = rule_engine._analysis()
+    assert analysis.report()["lookups"] and analysis.dead
+
+    base = next(d.snapshot() for d in devices.values() if d.device_type == "AC")
+    temperatures = [None, float("nan"), 15, 16, 17.9, 18, 18.1, 22, 24.5, 25, 28, 28.5, 29, 30, 31]
+    for temperature in temperatures:
+        for prediction in (None, 1.0, 3.0, 3.5):
+            snapshot = {**base, "ambient_temperature": temperature}
+            expected, _ = rule_engine._match_linear(snapshot, prediction)
+            actual, _ = rule_engine._match(snapshot, prediction, analysis)
+            assert (actual and actual.rule_id) == (expected and expected.rule_id), (temperature, prediction)
@@ -0,0 +1,46 @@
+import os
+import json
+import multiprocessing
+
+from engine.shared_state import SharedStateReader, SharedStateWriter
+from engine.state_publisher import StateView
+
+
+def _publish(name, ready, finished, done):
+    writer = SharedStateWriter(name=name, size=256 * 1024)
+    ready.set()
+    # Bodies change size every version, so stale lengths would cut the
+    # JSON short or mix two versions
+    for version in range(1, 20_000):
+        snapshots = {"dev": {"version": version, "pad": "x" * (version % 97 * 40)}}
+        writer.write(StateView("e", version, snapshots, False, 4), {})
+    finished.set()
+    done.wait()
+    writer.close()
+
+
+def test_reader_never_sees_a_torn_snapshot():
+    name = f"test_state_{os.getpid()}"
+    context = multiprocessing.get_context("fork")
+    ready, finished, done = context.Event(), context.Event(), context.Event()
+    process = context.Process(target=_publish, args=(name, ready, finished, done))
+    process.start()
+    ready.wait(10)
+
+    reader = SharedStateReader(name=name, retries=10_000)
+    versions = set()
+    try:
+        while len(versions) < 200 and not finished.is_set():
+            snapshot = reader.read()
+            if snapshot is None or snapshot.meta["version"] in versions:
+                continue
+            body = json.loads(snapshot.body)
+            assert body["dev"]["version"] == snapshot.meta["version"]
+            assert snapshot.seq % 2 == 0
+            versions.add(snapshot.meta["version"])
+    finally:
+        reader.close()
+        done.set()
+        process.join(10)
+
+    assert versions
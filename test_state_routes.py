@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from api import routes
+from api.routes import attach_routes
+from automation import decision_emitter
+from devices.factory import build_home
+from engine.simulator_loop import SimulatorEngine
+from engine.state_publisher import StatePublisher
+from ml.training import FEATURES
+from models.schemas import WhatIfFeatures
+from rules.engine import RuleEngine
+from rules.loader import load_rules
+
+
+def _reader_role(snapshots):
+    """
+    A SHARED_STATE reader worker whose owner published `snapshots`.
+    """
+    return SimpleNamespace(
+        is_owner=False,
+        reader=SimpleNamespace(read=lambda: SimpleNamespace(snapshots=lambda: snapshots))
+    )
+
+
+def _client(role=None):
+    devices = build_home(seed=2)
+    rule_engine = RuleEngine(load_rules("rules/rules.json", devices))
+    engine = SimulatorEngine(devices, rule_engine=rule_engine, publisher=StatePublisher())
+    engine.publish_state()
+
+    router = APIRouter()
+    attach_routes(router, engine.devices, rule_engine, engine.predictor, engine, role=role)
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app), engine
+
+
+def test_state_etag_304_and_gzip():
+    client, engine = _client()
+
+    first = client.get("/state")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and set(first.json()) == set(engine.devices)
+
+    cached = client.get("/state", headers={"If-None-Match": f'"other", {etag}'})
+    assert cached.status_code == 304 and cached.content == b""
+
+    projected = client.get("/state", params={"devices": "ac_1", "fields": "power"})
+    assert projected.headers["etag"] != etag
+    assert list(projected.json()) == ["ac_1"]
+
+    zipped = client.get("/state", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.json() == first.json()
+
+    previous = decision_emitter.DELIVER_EVENTS
+    decision_emitter.set_event_delivery(False)
+    try:
+        engine.tick()
+    finally:
+        decision_emitter.set_event_delivery(previous)
+    fresh = client.get("/state", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+
+
+def test_what_if_rows_take_only_typed_model_features():
+    assert tuple(WhatIfFeatures.model_fields) == FEATURES
+    client, _ = _client()
+
+    ok = client.post("/decision/batch", json={"rows": [
+        {},
+        {"hour_of_day": 3, "features": {"ambient_temperature": 35, "occupancy": 1}},
+    ]})
+    assert ok.status_code == 200 and ok.json()["count"] == 2
+
+    for features in ({"ambient_temperature": "hot"}, {"bogus": 1}):
+        bad = client.post("/decision/batch", json={"rows": [{"features": features}]})
+        assert bad.status_code == 422
+
+
+def test_what_if_on_a_reader_worker_uses_the_owners_state():
+    client, engine = _client()
+    local = client.post("/decision/batch", json={"rows": [{"hour_of_day": 14}]}).json()
+
+    # The owner's AC is on and drawing; this worker's copy never ticked
+    published = {device_id: d.snapshot() for device_id, d in engine.devices.items()}
+    ac_id = engine.devices.first("AC")
+    published[ac_id] = {**published[ac_id], "power": "ON", "current_watts": 3000, "power_draw": 3000}
+
+    reader, _ = _client(role=_reader_role(published))
+    shared = reader.post("/decision/batch", json={"rows": [{"hour_of_day": 14}]}).json()
+    assert shared["results"] != local["results"]
+
+
+def test_engine_internals_are_owner_only():
+    owner, _ = _client()
+    reader, _ = _client(role=_reader_role({}))
+
+    for path in ("/schedule", "/debug/ticks", "/debug/rules", "/rules/analysis"):
+        assert owner.get(path).status_code == 200
+        response = reader.get(path)
+        assert response.status_code == 503 and response.headers["retry-after"] == "1"
+
+
+def test_event_export_validates_and_normalises_time_bounds(monkeypatch):
+    events = [
+        {"timestamp": f"2026-01-01T{hour:02d}:00:00", "device_id": "ac_1", "action_taken": True}
+        for hour in range(6)
+    ]
+    monkeypatch.setattr(routes, "AUTOMATION_EVENTS", events)
+    client, _ = _client()
+
+    assert client.get("/export/events", params={"since": "yesterday"}).status_code == 400
+
+    # 03:00+02:00 is 01:00 UTC; a plain string comparison would keep 03:00 onwards
+    exported = client.get("/export/events", params={"since": "2026-01-01T03:00:00+02:00"})
+    assert exported.status_code == 200
+    assert exported.headers["x-export-rows"] == "5"
@@ -0,0 +1,58 @@
+import csv
+import random
+from types import SimpleNamespace
+
+import joblib
+import pandas as pd
+
+from ml import training
+from ml.predictor import MODEL_PATH
+from ml.training import FEATURES, LABEL, TrainingLog, train_candidate
+
+
+def _features(rng):
+    ac_power = rng.choice([0, 1])
+    return {
+        "hour_of_day": rng.randrange(24),
+        "ambient_temperature": rng.uniform(15, 38),
+        "occupancy": rng.choice([0, 1]),
+        "ac_power": ac_power,
+        "set_temperature": rng.choice([22, 23, 24, 25, 26]),
+        "total_current_load": rng.uniform(0, 2.5) + ac_power * 1.5,
+        "cumulative_energy": rng.uniform(0, 50),
+    }
+
+
+def test_label_is_the_kwh_used_over_the_simulated_hour(tmp_path):
+    log = TrainingLog(path=str(tmp_path / "rows.csv"), flush_every=1, max_rows=3)
+    device = SimpleNamespace(energy={"total_kwh": 0.0})
+    devices = {"ac_1": device}
+    features = {name: 1 for name in FEATURES}
+
+    log.record(None, devices, tick_seconds=15)      # baseline only
+    for _ in range(5):
+        device.energy["total_kwh"] += 0.005         # 1.2 kW for 15 s
+        log.record(features, devices, tick_seconds=15)
+
+    # Rotated once at max_rows; nothing older than that is kept
+    assert log.paths() == [log.path + ".1", log.path]
+    rows = [row for path in log.paths() for row in csv.DictReader(open(path))]
+    assert len(rows) == 5
+    assert all(abs(float(row[LABEL]) - 1.2) < 1e-9 for row in rows)
+
+
+def test_candidate_on_another_label_scale_is_refused(tmp_path, monkeypatch):
+    monkeypatch.setattr(training.os, "nice", lambda _: 0)
+    live = joblib.load(MODEL_PATH)
+    rng = random.Random(3)
+    frame = pd.DataFrame([_features(rng) for _ in range(300)], columns=list(FEATURES))
+    predictions = live.predict(frame)
+
+    path = str(tmp_path / "rows.csv")
+    frame.assign(**{LABEL: predictions * 0.4}).to_csv(path, index=False)
+    result = train_candidate([path], MODEL_PATH, str(tmp_path / "v1.pkl"), min_rows=100)
+    assert "error" in result and result["label_scale"] < 0.5
+
+    frame.assign(**{LABEL: predictions}).to_csv(path, index=False)
+    result = train_candidate([path], MODEL_PATH, str(tmp_path / "v1.pkl"), min_rows=100)
+    assert "error" not in result and result["label_scale"] == 1.0
@@ -0,0 +1,309 @@
+# Local load test: starts the app plus a stand-in LLM backend, drives
+# the API from many concurrent async clients and reports per-route
+# latency and tick-period jitter.
+#
+#   python -m tools.loadtest --concurrency 50 --duration 30 --llm-latency 0.5
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import numpy as np
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = "state=50,decision=15,mode=5,events_post=25,events_get=5"
+
+
+# ==============================
+# STAND-IN LLM BACKEND
+# ==============================
+def start_llm_stub(port, latency, jitter, actions):
+    """
+    Serves GET /actions like the real backend, after a configurable
+    delay. `actions` is the list returned in every response.
+    """
+    body = json.dumps({"actions": actions}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(max(0.0, random.gauss(latency, jitter)))
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def default_llm_actions(count):
+    cycle = [
+        {"device_id": "ac_1", "device_type": "AC", "action": "SET_TEMPERATURE", "value": 24},
+        {"device_id": "fan_1", "device_type": "Fan", "action": "ON", "value": None},
+        {"device_id": "light_1", "device_type": "Light", "action": "OFF", "value": None},
+    ]
+    return [dict(cycle[i % len(cycle)], room="living_room") for i in range(count)]
+
+
+# ==============================
+# APP UNDER TEST
+# ==============================
+def start_app(port, llm_url, tick_seconds, data_dir):
+    env = dict(
+        os.environ,
+        LLM_ACTIONS_URL=llm_url,
+        BASE_URL=f"http://127.0.0.1:{port}",
+        TICK_SECONDS=str(tick_seconds),
+        # Everything the app persists stays in the run's temp dir: a
+        # load test must not leave rows, segments or model versions in
+        # the repo's data/, nor resume a model version activated there
+        ENERGY_STORE_DIR=os.path.join(data_dir, "energy"),
+        CHECKPOINT_PATH=os.path.join(data_dir, "simulator.ckpt"),
+        TRAINING_DATA=os.path.join(data_dir, "training", "rows.csv"),
+        MODEL_VERSIONS_DIR=os.path.join(data_dir, "models"),
+        AUTOMATION_LOG_DIR=os.path.join(data_dir, "automation_logs"),
+        RETRAIN_EVERY_TICKS="0",
+    )
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "main:app",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--log-level", "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("App did not become ready")
+
+
+# ==============================
+# LOAD GENERATION
+# ==============================
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+async def _request(client, route):
+    if route == "state":
+        return await client.get("/state")
+    if route == "decision":
+        return await client.get("/decision")
+    if route == "mode":
+        # Flip into MANUAL (slow LLM path) and back again
+        target = "/mode/manual" if random.random() < 0.5 else "/mode/auto"
+        return await client.post(target, json={})
+    if route == "events_post":
+        return await client.post("/automation-events", json={
+            "device_id": "ac_1",
+            "device_type": "AC",
+            "action_taken": True,
+            "explanation": "load test",
+        })
+    if route == "events_get":
+        return await client.get("/automation-events")
+    raise ValueError(f"Unknown route: {route}")
+
+
+async def _client_loop(client, routes, weights, deadline, samples, errors):
+    while time.monotonic() < deadline:
+        route = random.choices(routes, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = await _request(client, route)
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        elapsed = time.perf_counter() - started
+
+        if ok:
+            samples.setdefault(route, []).append(elapsed)
+        else:
+            errors[route] = errors.get(route, 0) + 1
+
+
+async def drive(base_url, concurrency, duration, mix):
+    weights = parse_mix(mix)
+    routes = list(weights)
+    samples, errors = {}, {}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.monotonic() + duration
+        await asyncio.gather(*(
+            _client_loop(client, routes, [weights[r] for r in routes], deadline, samples, errors)
+            for _ in range(concurrency)
+        ))
+
+    return samples, errors
+
+
+# ==============================
+# REPORTING
+# ==============================
+def _percentiles_ms(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000
+    return {
+        "p50": round(float(p50), 2),
+        "p95": round(float(p95), 2),
+        "p99": round(float(p99), 2),
+        "max": round(max(values) * 1000, 2),
+    }
+
+
+def tick_report(timings, tick_seconds, window_start):
+    """
+    Jitter = |actual interval between tick starts - configured
+    period|, over ticks that started inside the load window.
+    """
+    ticks = [t for t in timings["ticks"] if t["start"] >= window_start]
+    starts = [t["start"] for t in ticks]
+    durations = [t["duration"] for t in ticks]
+    intervals = np.diff(starts) if len(starts) > 1 else np.array([])
+
+    # A tick's period is its own duration plus the inter-tick sleep
+    expected = np.array(durations[:-1]) + tick_seconds if len(durations) > 1 else np.array([])
+    jitter = np.abs(intervals - expected).tolist() if len(intervals) else []
+
+    return {
+        "ticks": len(ticks),
+        "period_jitter_ms": _percentiles_ms(jitter),
+        "tick_duration_ms": _percentiles_ms(durations),
+        "mean_period_s": round(float(np.mean(intervals)), 4) if len(intervals) else None,
+    }
+
+
+def build_report(samples, errors, duration, ticks):
+    routes = {}
+    for route in sorted(set(samples) | set(errors)):
+        values = samples.get(route, [])
+        routes[route] = {
+            "requests": len(values),
+            "errors": errors.get(route, 0),
+            "throughput_rps": round(len(values) / duration, 1),
+            "latency_ms": _percentiles_ms(values),
+        }
+
+    total = sum(len(v) for v in samples.values())
+    return {
+        "duration_s": duration,
+        "total_requests": total,
+        "throughput_rps": round(total / duration, 1),
+        "routes": routes,
+        "tick": ticks,
+    }
+
+
+def print_report(report):
+    print(f"\n{'route':<12} {'reqs':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for route, stats in report["routes"].items():
+        lat = stats["latency_ms"]
+        print(
+            f"{route:<12} {stats['requests']:>7} {stats['errors']:>5} "
+            f"{stats['throughput_rps']:>8} {lat['p50']!s:>8} {lat['p95']!s:>8} {lat['p99']!s:>8}"
+        )
+    print(f"\ntotal: {report['total_requests']} requests, {report['throughput_rps']} req/s")
+
+    tick = report["tick"]
+    print(
+        f"ticks under load: {tick['ticks']}, mean period {tick['mean_period_s']} s, "
+        f"jitter p50/p95/p99 = {tick['period_jitter_ms']['p50']}/"
+        f"{tick['period_jitter_ms']['p95']}/{tick['period_jitter_ms']['p99']} ms, "
+        f"tick duration p95 = {tick['tick_duration_ms']['p95']} ms"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local API load test")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="route=weight,...")
+    parser.add_argument("--tick-seconds", type=float, default=1.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--llm-port", type=int, default=8766)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.1, help="seconds (stddev)")
+    parser.add_argument("--llm-actions", type=int, default=3, help="actions per LLM response")
+    parser.add_argument("--llm-payload", help="JSON file with the actions list to return")
+    parser.add_argument("--json", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.llm_payload:
+        with open(args.llm_payload) as f:
+            actions = json.load(f)
+    else:
+        actions = default_llm_actions(args.llm_actions)
+
+    llm = start_llm_stub(args.llm_port, args.llm_latency, args.llm_jitter, actions)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        app = start_app(
+            args.port,
+            f"http://127.0.0.1:{args.llm_port}/actions",
+            args.tick_seconds,
+            data_dir
+        )
+        try:
+            wait_ready(base_url)
+
+            window_start = httpx.get(f"{base_url}/debug/ticks").json()
+            window_start = max((t["start"] for t in window_start["ticks"]), default=0.0)
+
+            samples, errors = asyncio.run(
+                drive(base_url, args.concurrency, args.duration, args.mix)
+            )
+            timings = httpx.get(f"{base_url}/debug/ticks").json()
+        finally:
+            app.terminate()
+            app.wait(timeout=10)
+            llm.shutdown()
+
+    report = build_report(
+        samples,
+        errors,
+        args.duration,
+        tick_report(timings, args.tick_seconds, window_start)
+    )
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()